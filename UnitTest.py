@@ -143,7 +143,7 @@ def test_garmin_api(config_path: Optional[str] = None, days: int = 1):
                 print(f"最低心率: {sleep_data.get('heart_rate', {}).get('min', 0)}")
                 print(f"最高心率: {sleep_data.get('heart_rate', {}).get('max', 0)}")
                 print(f"静息心率: {sleep_data.get('resting_heart_rate', 0)}")
-                print(f"压力指数: {garmin_client.get_stress_data(date)}")
+                print(f"压力指数: {garmin_client.get_stress_data(date, format_time=True)}")
                 print(f"身体电量变化: {sleep_data.get('body_battery_change', 0)}")
                 print(f"身体电量开始值: {sleep_data.get('body_battery', {}).get('start', 0)}")
                 print(f"身体电量结束值: {sleep_data.get('body_battery', {}).get('end', 0)}")
@@ -0,0 +1,294 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import modules.garmin.garmin_client as garmin_client_module
+from modules.garmin.cache_store import SQLiteCacheStore
+from modules.garmin.garmin_client import GarminClient
+from modules.notion.notion_client import NotionClient
+
+
+def _days(start, end):
+    day = datetime.strptime(start, "%Y-%m-%d")
+    while day <= datetime.strptime(end, "%Y-%m-%d"):
+        yield day.strftime("%Y-%m-%d")
+        day += timedelta(days=1)
+
+
+class FakeTokens:
+    """
+    模拟garth令牌客户端
+    """
+
+    def dump(self, path):
+        with open(os.path.join(path, "oauth2_token.json"), "w", encoding="utf-8") as f:
+            f.write("{}")
+
+
+class FakeGarmin:
+    """
+    模拟garminconnect客户端，记录每次请求，可以指定请求失败的日期
+    """
+
+    # 所有实例的登录调用，login_error 不为空时登录抛出该异常
+    logins = []
+    login_error = None
+
+    def __init__(self, email=None, password=None, is_cn=True, proxies=None):
+        self.failing_dates = set()
+        self.activities = []
+        self.stress = {}
+        self.calls = []
+        self.garth = FakeTokens()
+
+    def login(self, tokenstore=None):
+        FakeGarmin.logins.append(tokenstore)
+        if FakeGarmin.login_error is not None:
+            raise FakeGarmin.login_error
+
+    def get_stats(self, date_str):
+        self.calls.append(("get_stats", date_str))
+        if date_str in self.failing_dates:
+            raise ConnectionError(f"获取{date_str}失败")
+        return {"calendarDate": date_str, "totalKilocalories": 2000}
+
+    def get_stress_data(self, date_str):
+        self.calls.append(("get_stress_data", date_str))
+        if date_str in self.failing_dates:
+            raise ConnectionError(f"获取{date_str}失败")
+        return self.stress.get(date_str)
+
+    def get_daily_steps(self, start, end):
+        self.calls.append(("get_daily_steps", start, end))
+        return [{"calendarDate": day, "totalSteps": 1000} for day in _days(start, end)]
+
+    def get_activities_by_date(self, start, end):
+        self.calls.append(("get_activities_by_date", start, end))
+        return [activity for activity in self.activities if start <= activity["startTimeLocal"][:10] <= end]
+
+    def get_weigh_ins(self, start, end):
+        self.calls.append(("get_weigh_ins", start, end))
+        summaries = []
+        for day in _days(start, end):
+            if day in self.failing_dates:
+                continue
+            summaries.append({
+                "summaryDate": day,
+                "latestWeight": {"calendarDate": day, "weight": 70000, "timestampGMT": 1704067200000}
+            })
+        return {"dailyWeightSummaries": summaries}
+
+
+@pytest.fixture
+def fake_garmin(monkeypatch):
+    monkeypatch.setattr(garmin_client_module, "Garmin", FakeGarmin)
+    monkeypatch.setattr(FakeGarmin, "logins", [])
+    monkeypatch.setattr(FakeGarmin, "login_error", None)
+    return FakeGarmin
+
+
+@pytest.fixture
+def garmin_client(tmp_path, fake_garmin):
+    client = GarminClient({
+        "email": f"test-{tmp_path.name}",
+        "password": "",
+        "token_store": str(tmp_path / "tokens"),
+        "store_timeseries": False,
+        "concurrent_fetch": False,
+        "rate_limit": {"rate": 1000, "burst": 1000}
+    })
+    # 使用临时目录中的缓存，不影响本地缓存
+    client.cache_store.close()
+    client.cache_dir = str(tmp_path)
+    client.cache_store = SQLiteCacheStore(str(tmp_path / "garmin_cache.db"))
+    yield client
+    client.close()
+
+
+class FakeResponse:
+    """
+    模拟requests的响应
+    """
+
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self._body = body if body is not None else {}
+        self.headers = headers or {}
+        self.text = json.dumps(self._body, ensure_ascii=False)
+
+    def json(self):
+        return self._body
+
+
+class FakeNotion:
+    """
+    模拟Notion API：日记数据库的查询（过滤、排序、分页）、页面的创建和更新，记录每次请求
+
+    errors 中的 (方法, 路径前缀) -> 状态码列表会依次用于匹配的请求，用完后恢复正常响应。
+    """
+
+    def __init__(self, database_id="db"):
+        self.database_id = database_id
+        self.pages = {}
+        self.blocks = {}
+        self.requests = []
+        self.errors = {}
+        self._clock = 0
+        self._lock = threading.Lock()
+
+    def _tick(self):
+        self._clock += 1
+        return (datetime(2024, 2, 1) + timedelta(minutes=self._clock)).strftime("%Y-%m-%dT%H:%M:00.000Z")
+
+    def add_page(self, date_str, food="", page_id=None, last_edited_time=None):
+        page_id = page_id or f"page-{len(self.pages) + 1}"
+        self.pages[page_id] = {
+            "object": "page",
+            "id": page_id,
+            "last_edited_time": last_edited_time or self._tick(),
+            "archived": False,
+            "properties": {
+                "Date": {"type": "date", "date": {"start": date_str}},
+                "饮食": {"type": "rich_text", "rich_text": [{"plain_text": food}] if food else []}
+            }
+        }
+        return self.pages[page_id]
+
+    def add_blocks(self, parent_id, blocks):
+        """
+        添加子块，块中的 children 字段会展开为下一层子块
+        """
+        result = []
+        for block in blocks:
+            block = dict(block)
+            children = block.pop("children", None)
+            block["id"] = f"{parent_id}-{len(result) + 1}"
+            block["has_children"] = bool(children)
+            if children:
+                self.add_blocks(block["id"], children)
+            result.append(block)
+        self.blocks[parent_id] = result
+
+    def _set_properties(self, page, properties):
+        for name, value in properties.items():
+            if "rich_text" in value:
+                text = "".join(part["text"]["content"] for part in value["rich_text"])
+                value = {"type": "rich_text", "rich_text": [{"plain_text": text}] if text else []}
+            page["properties"][name] = value
+        page["last_edited_time"] = self._tick()
+
+    def _matches(self, page, condition):
+        if "and" in condition:
+            return all(self._matches(page, item) for item in condition["and"])
+        if condition.get("timestamp") == "last_edited_time":
+            return page["last_edited_time"] >= condition["last_edited_time"]["on_or_after"]
+        date_str = (page["properties"]["Date"].get("date") or {}).get("start", "")
+        bounds = condition["date"]
+        if "on_or_after" in bounds and date_str < bounds["on_or_after"][:10]:
+            return False
+        if "on_or_before" in bounds and date_str > bounds["on_or_before"][:10]:
+            return False
+        return True
+
+    def _query(self, body):
+        pages = [page for page in self.pages.values()
+                 if "filter" not in body or self._matches(page, body["filter"])]
+        for sort in reversed(body.get("sorts", [])):
+            if "property" in sort:
+                key = lambda page: page["properties"]["Date"]["date"]["start"]
+            else:
+                key = lambda page: page[sort["timestamp"]]
+            pages.sort(key=key, reverse=sort["direction"] == "descending")
+
+        start = int(body.get("start_cursor") or 0)
+        end = start + body.get("page_size", 100)
+        has_more = end < len(pages)
+        return {"results": pages[start:end], "has_more": has_more, "next_cursor": str(end) if has_more else None}
+
+    def handle(self, method, path, body=None, params=None):
+        with self._lock:
+            return self._handle(method, path, body, params)
+
+    def _handle(self, method, path, body, params):
+        # 客户端会复用并修改同一个查询字典，记录请求时保存副本
+        self.requests.append((method, path, json.loads(json.dumps(body)) if body is not None else None))
+        for (error_method, prefix), statuses in self.errors.items():
+            if method == error_method and path.startswith(prefix) and statuses:
+                status = statuses.pop(0)
+                if isinstance(status, Exception):
+                    raise status
+                return status, {"message": "error"}, {"Retry-After": "0"}
+
+        if method == "POST" and path == f"/databases/{self.database_id}/query":
+            return 200, self._query(body or {}), {}
+        if method == "POST" and path == "/pages":
+            page = self.add_page("")
+            self._set_properties(page, body["properties"])
+            return 200, page, {}
+        if method == "GET" and path.startswith("/blocks/") and path.endswith("/children"):
+            blocks = self.blocks.get(path.split("/")[2], [])
+            start = int((params or {}).get("start_cursor") or 0)
+            end = start + int((params or {}).get("page_size") or 100)
+            has_more = end < len(blocks)
+            return 200, {"results": blocks[start:end], "has_more": has_more, "next_cursor": str(end) if has_more else None}, {}
+        if method == "PATCH" and path.startswith("/pages/"):
+            page = self.pages[path.split("/")[2]]
+            self._set_properties(page, body["properties"])
+            return 200, page, {}
+        return 404, {"message": "not found"}, {}
+
+    def count(self, method, path_prefix):
+        return sum(1 for request in self.requests if request[0] == method and request[1].startswith(path_prefix))
+
+
+class FakeSession:
+    """
+    模拟requests.Session，请求转发给FakeNotion
+    """
+
+    def __init__(self, notion, base_url="https://api.notion.com/v1"):
+        self.notion = notion
+        self.base_url = base_url
+
+    def request(self, method, url, json=None, params=None, **kwargs):
+        status, body, headers = self.notion.handle(method, url[len(self.base_url):], json, params)
+        return FakeResponse(status, body, headers)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_notion():
+    return FakeNotion()
+
+
+@pytest.fixture
+def notion_client(fake_notion):
+    client = NotionClient({
+        "api_key": "test",
+        "database_id": fake_notion.database_id,
+        "page_size": 2,
+        "use_mirror": False,
+        "rate_limit": {"rate": 1000, "burst": 1000}
+    })
+    client.session = FakeSession(fake_notion)
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def mirror_client(fake_notion, tmp_path):
+    client = NotionClient({
+        "api_key": "test",
+        "database_id": fake_notion.database_id,
+        "page_size": 2,
+        "mirror_path": str(tmp_path / "notion_mirror.db"),
+        "rate_limit": {"rate": 1000, "burst": 1000}
+    })
+    client.session = FakeSession(fake_notion)
+    yield client
+    client.close()
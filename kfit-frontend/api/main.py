@@ -24,8 +24,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 try:
     from main import analyze_daily_health, analyze_weekly_health, get_model
     from config.config import Config
-    from modules.garmin.garmin_client import GarminClient
-    from modules.notion.notion_client import NotionClient
+    from modules.garmin.async_client import AsyncGarminClient
+    from modules.notion.async_client import AsyncNotionClient
     from modules.diary.diary_parser import DiaryParser
 except ImportError as e:
     logger.error(f"导入KFit模块失败: {e}")
@@ -48,13 +48,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 全局配置和客户端实例
+# 全局配置和客户端实例（garmin_client和notion_client为异步客户端，不会阻塞事件循环）
 config = None
 garmin_client = None
 notion_client = None
 diary_parser = None
 
-def init_clients():
+async def init_clients():
     """初始化所有客户端"""
     global config, garmin_client, notion_client, diary_parser
 
@@ -62,14 +62,18 @@ def init_clients():
         config = Config()
         logger.info("配置加载成功")
 
-        # 初始化Garmin客户端
+        # 初始化Garmin客户端，重新加载配置时关闭旧客户端（在线程池中关闭，不阻塞事件循环）
+        if garmin_client:
+            await garmin_client.aclose()
         garmin_config = config.get_garmin_config()
-        garmin_client = GarminClient(garmin_config)
+        garmin_client = AsyncGarminClient.from_config(garmin_config)
         logger.info("Garmin客户端初始化成功")
 
         # 初始化Notion客户端
+        if notion_client:
+            await notion_client.close()
         notion_config = config.get_notion_config()
-        notion_client = NotionClient(notion_config)
+        notion_client = AsyncNotionClient.from_config(notion_config)
         logger.info("Notion客户端初始化成功")
 
         # 初始化日记解析器
@@ -84,7 +88,15 @@ def init_clients():
 @app.on_event("startup")
 async def startup_event():
     """应用启动时执行"""
-    init_clients()
+    await init_clients()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """应用关闭时释放客户端资源"""
+    if garmin_client:
+        await garmin_client.aclose()
+    if notion_client:
+        await notion_client.close()
 
 @app.get("/api/health")
 async def health_check():
@@ -96,7 +108,8 @@ async def health_check():
             "garmin": garmin_client is not None,
             "notion": notion_client is not None,
             "diary": diary_parser is not None
-        }
+        },
+        "garmin_cache": garmin_client.get_cache_stats() if garmin_client else {}
     }
 
 @app.get("/api/config")
@@ -142,7 +155,7 @@ async def update_config(config_data: Dict[str, Any]):
             # 重新加载配置
             global config
             config = Config()
-            init_clients()
+            await init_clients()
 
             return {"status": "success", "message": "配置已更新"}
         else:
@@ -220,13 +233,7 @@ async def get_fitness_data(start_date: str, end_date: str):
         # 如果客户端已初始化，尝试获取真实数据
         if garmin_client:
             try:
-                data = []
-                current_date = start_dt
-                while current_date <= end_dt:
-                    daily_data = garmin_client.get_daily_fitness_data(current_date)
-                    daily_data["date"] = current_date.strftime("%Y-%m-%d")
-                    data.append(daily_data)
-                    current_date += timedelta(days=1)
+                data = await garmin_client.get_fitness_range(start_dt, end_dt)
                 logger.info(f"成功获取{len(data)}天健身数据")
                 return data
             except Exception as e:
@@ -241,6 +248,21 @@ async def get_fitness_data(start_date: str, end_date: str):
         logger.error(f"获取健身数据失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/stress")
+async def get_stress_data(start_date: str, end_date: str):
+    """获取压力数据"""
+    if not garmin_client:
+        raise HTTPException(status_code=503, detail="Garmin客户端未初始化")
+
+    try:
+        start_dt = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end_dt = datetime.strptime(end_date, "%Y-%m-%d").date()
+        return await garmin_client.get_stress_range(start_dt, end_dt)
+
+    except Exception as e:
+        logger.error(f"获取压力数据失败: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 def generate_mock_nutrition_data(start_date: date, end_date: date) -> List[Dict[str, Any]]:
     """生成模拟营养数据用于前端开发"""
     data = []
@@ -288,7 +310,8 @@ async def get_nutrition_data(start_date: str, end_date: str):
         # 如果客户端已初始化，尝试获取真实数据
         if notion_client:
             try:
-                data = notion_client.get_food_data_range(start_dt, end_dt)
+                # 相同日期范围的并发请求在客户端内合并为一次查询
+                data = await notion_client.get_food_data_range(start_dt, end_dt)
                 # 转换为前端格式
                 formatted_data = []
                 for item in data:
@@ -331,12 +354,16 @@ async def get_summary(start_date: str, end_date: str):
         nutrition_data = await get_nutrition_data(start_date, end_date)
         df_nutrition = pd.DataFrame(nutrition_data)
 
+        # 睡眠只统计有睡眠记录的夜晚
+        sleep_hours = df_fitness["sleep"].apply(lambda x: x.get("duration", 0))
+        sleep_hours = sleep_hours[sleep_hours > 0]
+
         # 计算摘要
         summary = {
             "steps": int(df_fitness["steps"].sum()),
             "calories": int(df_fitness["calories"].sum()),
             "activity_hours": round(df_fitness["duration"].sum() / 60, 1),
-            "sleep_hours": round(df_fitness["sleep"].apply(lambda x: x.get("duration", 0)).mean(), 1),
+            "sleep_hours": round(sleep_hours.mean(), 1) if len(sleep_hours) > 0 else 0,
             "avg_heart_rate": int(df_fitness["heart_rate"].apply(lambda x: x.get("avg", 0)).mean()),
             "activity_count": len(df_fitness[df_fitness["activities"].apply(lambda x: len(x) if isinstance(x, list) else 0) > 0]),
             "nutrition_days": len(df_nutrition),
@@ -363,13 +390,10 @@ async def get_recent_activities(limit: int = 10):
         # 如果客户端已初始化，尝试获取真实数据
         if garmin_client:
             try:
-                current_date = start_date
-                while current_date <= end_date:
-                    activities = garmin_client.get_activities(current_date)
+                activities_by_day = await garmin_client.get_activities_range(start_date, end_date)
+                for day, activities in activities_by_day.items():
                     for activity in activities:
-                        activity["date"] = current_date.strftime("%Y-%m-%d")
-                        all_activities.append(activity)
-                    current_date += timedelta(days=1)
+                        all_activities.append(dict(activity, date=day))
             except Exception as e:
                 logger.warning(f"获取真实活动数据失败: {e}，使用模拟数据")
 
@@ -10,6 +10,10 @@ from config.config import Config
 # 导入Notion和Garmin客户端
 from modules.notion.notion_client import NotionClient
 from modules.garmin.garmin_client import GarminClient
+from modules.garmin.sleep import reduce_sleep_nights
+from modules.sync.backfill import GarminBackfill, NotionBackfill, BACKFILL_METRICS, NOTION_BACKFILL_METRIC
+from modules.sync.state import SyncState
+from modules.sync.incremental import GarminSync
 
 # 导入模型工厂
 from models.base_model import BaseModel
@@ -182,7 +186,7 @@ def analyze_weekly_health(end_date: Optional[datetime] = None, config_path: Opti
         "calories": 0,
         "activities": [],
         "heart_rate": {"avg": 0, "min": 0, "max": 0},
-        "sleep": {"duration": 0, "deep": 0, "light": 0}
+        "sleep": reduce_sleep_nights([])
     }
     
     # 计算平均值和总和
@@ -193,13 +197,11 @@ def analyze_weekly_health(end_date: Optional[datetime] = None, config_path: Opti
         total_heart_rate_avg = 0
         total_heart_rate_min = 0
         total_heart_rate_max = 0
-        total_sleep_duration = 0
-        total_sleep_deep = 0
-        total_sleep_light = 0
         
         for fitness_data in fitness_data_list:
             total_steps += fitness_data.get("steps", 0)
-            total_calories += fitness_data.get("calories", 0)
+            calories = fitness_data.get("calories", 0)
+            total_calories += calories.get("total", 0) if isinstance(calories, dict) else calories
             
             heart_rate = fitness_data.get("heart_rate", {})
             total_heart_rate_avg += heart_rate.get("avg", 0)
@@ -211,11 +213,6 @@ def analyze_weekly_health(end_date: Optional[datetime] = None, config_path: Opti
             if heart_rate.get("max", 0) > total_heart_rate_max:
                 total_heart_rate_max = heart_rate.get("max")
             
-            sleep = fitness_data.get("sleep", {})
-            total_sleep_duration += sleep.get("duration", 0)
-            total_sleep_deep += sleep.get("deep", 0)
-            total_sleep_light += sleep.get("light", 0)
-            
             weekly_fitness_data["activities"].extend(fitness_data.get("activities", []))
         
         # 计算平均值
@@ -224,9 +221,8 @@ def analyze_weekly_health(end_date: Optional[datetime] = None, config_path: Opti
         weekly_fitness_data["heart_rate"]["avg"] = round(total_heart_rate_avg / valid_days, 1)
         weekly_fitness_data["heart_rate"]["min"] = total_heart_rate_min
         weekly_fitness_data["heart_rate"]["max"] = total_heart_rate_max
-        weekly_fitness_data["sleep"]["duration"] = round(total_sleep_duration / valid_days, 1)
-        weekly_fitness_data["sleep"]["deep"] = round(total_sleep_deep / valid_days, 1)
-        weekly_fitness_data["sleep"]["light"] = round(total_sleep_light / valid_days, 1)
+        # 睡眠取有睡眠记录的夜晚的平均值
+        weekly_fitness_data["sleep"] = reduce_sleep_nights([fitness_data.get("sleep", {}) for fitness_data in fitness_data_list])
     
     # 如果没有数据，提示用户
     if not weekly_food_data.get('items') and not weekly_fitness_data.get('activities'):
@@ -330,7 +326,7 @@ def analyze_diary_health(date: Optional[datetime] = None, config_path: Optional[
         "calories": 0,
         "activities": [],
         "heart_rate": {"avg": 0, "min": 0, "max": 0},
-        "sleep": {"duration": 0, "deep": 0, "light": 0}
+        "sleep": reduce_sleep_nights([])
     }
     
     # 分析健康数据
@@ -363,6 +359,201 @@ def analyze_diary_health(date: Optional[datetime] = None, config_path: Optional[
         print(f"\n分析报告已保存到: {output_file}")
 
 
+def analyze_diary_period_health(period: str = "week", end_date: Optional[datetime] = None,
+                                start_date: Optional[datetime] = None, config_path: Optional[str] = None):
+    """
+    分析日记文件中一个周期（一周、一个月或自定义范围）的健康数据，每个周期只调用一次大模型
+    
+    Args:
+        period: 周期，week、month或custom
+        end_date: 结束日期（month为所在月份中的任意一天），默认为今天
+        start_date: 开始日期，仅custom使用
+        config_path: 配置文件路径，默认为None
+    """
+    from modules.diary.diary_weekly_analyzer import DiaryWeeklyAnalyzer
+    
+    try:
+        start_date, end_date = DiaryWeeklyAnalyzer.period_range(period, end_date, start_date)
+    except ValueError as e:
+        print(f"错误: {e}")
+        return
+    
+    start_date_str = start_date.strftime("%Y-%m-%d")
+    end_date_str = end_date.strftime("%Y-%m-%d")
+    period_names = {"week": "周", "month": "月", "custom": "阶段"}
+    period_name = period_names.get(period, "阶段")
+    print(f"\n===== 分析日记文件中 {start_date_str} 至 {end_date_str} 的健康数据 =====")
+    
+    # 加载配置
+    config = Config(config_path)
+    
+    # 获取日记配置
+    diary_config = config.get_diary_config()
+    diary_file_path = diary_config.get('file_path')
+    
+    if not diary_file_path:
+        print("错误: 未配置日记文件路径，请在config.yaml中设置diary.file_path")
+        return
+    
+    if not os.path.exists(diary_file_path):
+        print(f"错误: 日记文件不存在: {diary_file_path}")
+        return
+    
+    # 通过日记索引一次获取整个周期的饮食数据
+    print("\n从日记文件获取饮食数据...")
+    analyzer = DiaryWeeklyAnalyzer(diary_config)
+    period_data = analyzer.collect_period(diary_file_path, start_date, end_date)
+    print(f"找到 {period_data['recorded_days']}/{period_data['total_days']} 天的日记, {len(period_data['items'])} 条饮食记录")
+    
+    # 如果没有数据，提示用户
+    if not period_data['items']:
+        print("\n警告: 没有找到饮食数据，无法进行分析")
+        return
+    
+    # 初始化大模型
+    print("\n初始化大模型...")
+    model = get_model(config)
+    model_info = model.get_model_info()
+    print(f"使用模型: {model_info.get('provider')} - {model_info.get('model')}")
+    
+    # 构建一个空的健身数据结构
+    fitness_data = {
+        "start_date": start_date_str,
+        "end_date": end_date_str,
+        "steps": 0,
+        "calories": 0,
+        "activities": [],
+        "heart_rate": {"avg": 0, "min": 0, "max": 0},
+        "sleep": reduce_sleep_nights([])
+    }
+    
+    # 分析健康数据（饮食项目带有日期，整个周期一次分析）
+    print("\n分析健康数据...")
+    analysis = model.analyze_health(DiaryWeeklyAnalyzer.format_for_analysis(period_data), fitness_data)
+    
+    # 输出分析结果
+    print(f"\n===== {period_name}健康分析结果 =====")
+    print(f"\n总体健康状况:\n{analysis.get('summary', '')}")
+    
+    if analysis.get('food_analysis'):
+        print(f"\n饮食分析:\n{analysis.get('food_analysis')}")
+    
+    if analysis.get('recommendations'):
+        print(f"\n改进建议:\n{analysis.get('recommendations')}")
+    
+    # 保存分析结果
+    analysis_config = config.get('analysis', {})
+    if analysis_config.get('weekly_report', True):
+        output_dir = analysis_config.get('output_dir', './output')
+        os.makedirs(output_dir, exist_ok=True)
+        
+        output_file = os.path.join(output_dir, f"diary_{period}_health_report_{start_date_str}_to_{end_date_str}.txt")
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(f"===== {start_date_str} 至 {end_date_str} 日记{period_name}健康分析报告 =====\n\n")
+            f.write(f"记录天数: {period_data['recorded_days']}/{period_data['total_days']}\n\n")
+            f.write(f"总体健康状况:\n{analysis.get('summary', '')}\n\n")
+            f.write(f"饮食分析:\n{analysis.get('food_analysis', '')}\n\n")
+            f.write(f"改进建议:\n{analysis.get('recommendations', '')}\n\n")
+        
+        print(f"\n{period_name}分析报告已保存到: {output_file}")
+
+
+def backfill_history(start_date: datetime, end_date: datetime, metrics: Optional[list] = None,
+                     config_path: Optional[str] = None):
+    """
+    回填历史数据到本地缓存（Garmin）和本地镜像（Notion日记），之后查询这段时间的数据不再请求远程接口
+    
+    Args:
+        start_date: 开始日期
+        end_date: 结束日期
+        metrics: 要回填的指标，默认回填全部常用Garmin指标，配置了Notion时同时回填Notion日记
+        config_path: 配置文件路径
+    """
+    print(f"\n===== 回填 {start_date.strftime('%Y-%m-%d')} 至 {end_date.strftime('%Y-%m-%d')} 的历史数据 =====")
+    
+    # 加载配置
+    config = Config(config_path)
+    notion_config = config.get_notion_config()
+    if metrics:
+        backfill_notion = NOTION_BACKFILL_METRIC in metrics
+        garmin_metrics = [metric for metric in metrics if metric != NOTION_BACKFILL_METRIC]
+    else:
+        # 配置了Notion数据库并启用本地镜像时同时回填Notion日记
+        backfill_notion = bool(
+            notion_config.get('api_key') and notion_config.get('database_id') and notion_config.get('use_mirror', True)
+        )
+        garmin_metrics = None
+    
+    if garmin_metrics is None or garmin_metrics:
+        garmin_config = config.get_garmin_config()
+        garmin_client = GarminClient(garmin_config)
+        try:
+            backfill = GarminBackfill(garmin_client, chunk_days=garmin_config.get('backfill_chunk_days', 30))
+            report = backfill.run(start_date, end_date, garmin_metrics)
+        finally:
+            garmin_client.close()
+        _print_backfill_report("Garmin", report)
+    
+    if backfill_notion:
+        notion_client = NotionClient(notion_config)
+        try:
+            backfill = NotionBackfill(notion_client, chunk_days=notion_config.get('backfill_chunk_days', 30))
+            report = backfill.run(start_date, end_date)
+        finally:
+            notion_client.close()
+        _print_backfill_report("Notion日记", report)
+
+
+def _print_backfill_report(source: str, report: dict):
+    """
+    打印回填报告
+    
+    Args:
+        source: 数据源名称
+        report: 回填报告
+    """
+    print(f"\n===== {source}回填完成 =====")
+    print(f"处理天数: {report['days']}, 请求: {report['fetched']}, 跳过（已缓存）: {report['skipped']}, 失败: {report['failed']}")
+    print(f"{source}调用: {report['calls']}次, 用时: {report.get('elapsed', 0)}秒")
+    print(f"吞吐量: {report.get('days_per_sec', 0)}天/秒, {report.get('calls_per_sec', 0)}次/秒")
+    if report['failed']:
+        print("提示: 部分日期获取失败，稍后重新运行相同命令即可补全")
+
+
+def sync_incremental(metrics: Optional[list] = None, config_path: Optional[str] = None):
+    """
+    增量同步：只请求每个指标上次同步之后的日期（以及最近几天的重新检查）
+    
+    Args:
+        metrics: 要同步的指标，默认同步全部常用指标
+        config_path: 配置文件路径
+    """
+    print("\n===== 增量同步 =====")
+    
+    # 加载配置
+    config = Config(config_path)
+    garmin_config = config.get_garmin_config()
+    garmin_client = GarminClient(garmin_config)
+    state = SyncState(os.path.join(garmin_client.cache_dir, 'sync_state.db'))
+    
+    try:
+        sync = GarminSync(
+            garmin_client,
+            state,
+            recheck_days=garmin_config.get('sync_recheck_days', 2),
+            initial_days=garmin_config.get('sync_initial_days', 30)
+        )
+        report = sync.run(metrics)
+    finally:
+        state.close()
+        garmin_client.close()
+    
+    for metric, result in report["metrics"].items():
+        print(f"{metric}: {result['from']} 至 {result['to']}, 请求{result['fetched']}天, "
+              f"失败{result['failed']}天, 已同步至 {result['last_synced_date']}")
+    print(f"\nGarmin调用: {report['calls']}次, 用时: {report['elapsed']}秒")
+
+
 def main():
     """
     主函数
@@ -372,8 +563,18 @@ def main():
     parser.add_argument('--config', type=str, help='配置文件路径')
     parser.add_argument('--date', type=str, help='分析日期，格式为YYYY-MM-DD，默认为今天')
     parser.add_argument('--weekly', action='store_true', help='生成周报告')
+    parser.add_argument('--monthly', action='store_true', help='生成--date所在月份的月报告（配合--diary使用）')
     parser.add_argument('--diary', action='store_true', help='使用日记文件进行分析')
     parser.add_argument('--test-garmin', action='store_true', help='测试Garmin API模块')
+    parser.add_argument('--backfill', action='store_true', help='回填历史数据到本地缓存，配合--from和--to使用')
+    parser.add_argument('--from', dest='from_date', type=str,
+                        help='回填或日记阶段分析（配合--diary）的开始日期，格式为YYYY-MM-DD')
+    parser.add_argument('--to', dest='to_date', type=str,
+                        help='回填结束日期（默认为昨天）或日记阶段分析的结束日期（默认为今天），格式为YYYY-MM-DD')
+    parser.add_argument('--sync', action='store_true', help='增量同步：只获取上次同步之后的新数据，适合每天定时运行')
+    parser.add_argument('--metrics', type=str,
+                        help=f"回填或同步的指标，逗号分隔，可选: {', '.join(BACKFILL_METRICS)}；"
+                             f"回填时还可以使用 {NOTION_BACKFILL_METRIC}（Notion日记）")
     
     args = parser.parse_args()
     
@@ -391,10 +592,34 @@ def main():
         if args.test_garmin:
             # 测试Garmin API模块
             test_garmin_api(args.config)
-        elif args.weekly and args.diary:
-            # 目前没有实现周度日记分析功能
-            print("周度日记分析功能尚未实现")
-            # analyze_weekly_diary_health(date, args.config)
+        elif args.backfill:
+            if not args.from_date:
+                print("错误: 回填需要指定--from开始日期")
+                return
+            try:
+                start_date = datetime.strptime(args.from_date, "%Y-%m-%d")
+                if args.to_date:
+                    end_date = datetime.strptime(args.to_date, "%Y-%m-%d")
+                else:
+                    end_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+            except ValueError:
+                print(f"错误: 日期格式不正确，应为YYYY-MM-DD，例如2023-01-01")
+                return
+            metrics = [metric.strip() for metric in args.metrics.split(',') if metric.strip()] if args.metrics else None
+            backfill_history(start_date, end_date, metrics, args.config)
+        elif args.sync:
+            metrics = [metric.strip() for metric in args.metrics.split(',') if metric.strip()] if args.metrics else None
+            sync_incremental(metrics, args.config)
+        elif args.diary and (args.weekly or args.monthly or args.from_date):
+            # 日记周期分析：--weekly为截至--date的7天，--monthly为--date所在月份，--from/--to为自定义范围
+            try:
+                start_date = datetime.strptime(args.from_date, "%Y-%m-%d") if args.from_date else None
+                end_date = datetime.strptime(args.to_date, "%Y-%m-%d") if args.to_date else date
+            except ValueError:
+                print(f"错误: 日期格式不正确，应为YYYY-MM-DD，例如2023-01-01")
+                return
+            period = "custom" if start_date else ("month" if args.monthly else "week")
+            analyze_diary_period_health(period, end_date, start_date, args.config)
         elif args.weekly:
             analyze_weekly_health(date, args.config)
         elif args.diary:
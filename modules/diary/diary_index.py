@@ -0,0 +1,345 @@
+import bisect
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+# 字节正则中的\s只匹配ASCII空白，其余Unicode空白（全角空格、不换行空格等）按UTF-8编码逐个列出，
+# 使字节匹配与文本正则中的\s一致
+_EXTRA_SPACE_BYTES = [char.encode('utf-8') for char in map(chr, range(0x3001))
+                      if char.isspace() and not re.match(rb'\s', char.encode('utf-8'))]
+
+# 日期标题，与 DiaryParser.date_pattern 相同，在UTF-8字节上匹配
+DATE_HEADING_PATTERN = re.compile(
+    rb'#+(?:\s|' + b'|'.join(re.escape(space) for space in _EXTRA_SPACE_BYTES) + rb')*(\d{4}-\d{2}-\d{2})'
+)
+
+# 索引文件格式版本，解析规则变化时递增，旧的索引文件会被重建
+INDEX_VERSION = 2
+
+
+class DiaryIndex:
+    """
+    日记日期索引
+
+    一次扫描日记文件，记录每个日期标题之后的内容在文件中的字节位置（偏移, 长度），
+    查询某一天或某个日期范围时直接按位置截取，只解码需要的部分。
+    同一日期出现多次时使用第一次出现的内容。
+    """
+
+    def __init__(self, sections: Dict[str, Tuple[int, int]], tail_start: int = 0,
+                 food_items: Optional[Dict[str, List[str]]] = None):
+        """
+        初始化日记索引
+
+        Args:
+            sections: 日期字符串（YYYY-MM-DD）到（字节偏移, 字节长度）的映射
+            tail_start: 最后一个日期标题的起始字节位置，文件末尾追加内容时从这里重新扫描
+            food_items: 日期到饮食项目列表的映射，只包含内容非空的日期
+        """
+        self.sections = sections
+        self.tail_start = tail_start
+        self.food_items = food_items if food_items is not None else {}
+        self._dates = sorted(sections)
+
+    @staticmethod
+    def _scan(data: bytes, pattern: re.Pattern, start: int = 0) -> Tuple[Dict[str, Tuple[int, int]], int]:
+        sections = {}
+        previous = None
+        tail_start = start
+        for match in pattern.finditer(data, start):
+            if previous is not None:
+                date_str, section_start = previous
+                sections.setdefault(date_str, (section_start, match.start() - section_start))
+            previous = (match.group(1).decode('ascii'), match.end())
+            tail_start = match.start()
+        if previous is not None:
+            date_str, section_start = previous
+            sections.setdefault(date_str, (section_start, len(data) - section_start))
+        return sections, tail_start
+
+    @classmethod
+    def build(cls, data: bytes, pattern: re.Pattern = DATE_HEADING_PATTERN) -> 'DiaryIndex':
+        """
+        扫描日记内容，建立索引
+
+        Args:
+            data: 日记文件的UTF-8字节内容（bytes或mmap）
+            pattern: 日期标题的字节正则表达式，第一个分组为日期
+
+        Returns:
+            DiaryIndex: 日记索引
+        """
+        sections, tail_start = cls._scan(data, pattern)
+        return cls(sections, tail_start)
+
+    def update_tail(self, data: bytes, pattern: re.Pattern = DATE_HEADING_PATTERN) -> List[str]:
+        """
+        文件末尾追加内容后更新索引，只重新扫描最后一个日期标题之后的部分
+
+        Args:
+            data: 追加后的日记字节内容，开头部分必须与建立索引时相同
+            pattern: 日期标题的字节正则表达式
+
+        Returns:
+            List[str]: 内容有变化的日期
+        """
+        tail_sections, tail_start = self._scan(data, pattern, self.tail_start)
+        changed = []
+        for date_str, section in tail_sections.items():
+            # 同一日期出现多次时保留第一次出现的内容；之前的最后一段会随追加内容变长
+            previous = self.sections.get(date_str)
+            if previous is None or previous[0] >= self.tail_start:
+                if previous != section:
+                    self.sections[date_str] = section
+                    changed.append(date_str)
+        self.tail_start = tail_start
+        self._dates = sorted(self.sections)
+        return changed
+
+    def __len__(self) -> int:
+        return len(self.sections)
+
+    def __contains__(self, date_str: str) -> bool:
+        return date_str in self.sections
+
+    def dates(self) -> List[str]:
+        """
+        获取索引中的全部日期
+
+        Returns:
+            List[str]: 排序后的日期字符串列表
+        """
+        return list(self._dates)
+
+    def dates_between(self, start_date: str, end_date: str) -> List[str]:
+        """
+        获取日期范围内（含两端）有内容的日期
+
+        Args:
+            start_date: 开始日期字符串
+            end_date: 结束日期字符串
+
+        Returns:
+            List[str]: 排序后的日期字符串列表
+        """
+        left = bisect.bisect_left(self._dates, start_date)
+        right = bisect.bisect_right(self._dates, end_date)
+        return self._dates[left:right]
+
+    def read(self, data: bytes, date_str: str) -> Optional[str]:
+        """
+        读取某一天的内容
+
+        Args:
+            data: 建立索引时使用的日记字节内容
+            date_str: 日期字符串
+
+        Returns:
+            Optional[str]: 日期标题之后到下一个日期标题之前的内容，日期不存在时返回None
+        """
+        section = self.sections.get(date_str)
+        if section is None:
+            return None
+        offset, length = section
+        return bytes(data[offset:offset + length]).decode('utf-8', errors='replace')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "sections": {date_str: list(section) for date_str, section in self.sections.items()},
+            "tail_start": self.tail_start,
+            "food_items": self.food_items
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DiaryIndex':
+        return cls(
+            {date_str: tuple(section) for date_str, section in data["sections"].items()},
+            data.get("tail_start", 0),
+            data.get("food_items", {})
+        )
+
+
+class DiaryCorpusIndex(DiaryIndex):
+    """
+    多文件日记（每天或每月一个文件）合并后的日期索引
+
+    sections 中的位置是相对于 files 中对应文件的字节偏移；
+    同一日期出现在多个文件中时，使用按路径排序后第一个文件中的内容。
+    """
+
+    def __init__(self, sections: Dict[str, Tuple[int, int]], files: Dict[str, str],
+                 food_items: Optional[Dict[str, List[str]]] = None):
+        """
+        初始化合并索引
+
+        Args:
+            sections: 日期字符串到（字节偏移, 字节长度）的映射
+            files: 日期字符串到所在文件路径的映射
+            food_items: 日期到饮食项目列表的映射
+        """
+        super().__init__(sections, 0, food_items)
+        self.files = files
+
+    @classmethod
+    def merge(cls, file_indexes: Dict[str, DiaryIndex]) -> 'DiaryCorpusIndex':
+        """
+        合并各文件的索引
+
+        Args:
+            file_indexes: 文件路径到该文件索引的映射
+
+        Returns:
+            DiaryCorpusIndex: 合并后的索引
+        """
+        sections, files, food_items = {}, {}, {}
+        for file_path in sorted(file_indexes):
+            index = file_indexes[file_path]
+            for date_str, section in index.sections.items():
+                if date_str in sections:
+                    continue
+                sections[date_str] = section
+                files[date_str] = file_path
+                if date_str in index.food_items:
+                    food_items[date_str] = index.food_items[date_str]
+        return cls(sections, files, food_items)
+
+
+def file_digest(data: bytes, length: Optional[int] = None) -> str:
+    """
+    计算日记内容（或开头length个字节）的SHA-256摘要
+
+    Args:
+        data: 日记字节内容
+        length: 只计算开头的字节数，默认为全部内容
+
+    Returns:
+        str: 十六进制摘要
+    """
+    # 使用memoryview避免复制，mmap关闭前必须释放
+    with memoryview(data) as view:
+        return hashlib.sha256(view[:length] if length is not None else view).hexdigest()
+
+
+class DiaryIndexStore:
+    """
+    日记索引的磁盘存储
+
+    每个日记文件对应索引目录中的一个JSON文件（按文件绝对路径命名），
+    同时保存文件的修改时间、大小和内容摘要，用于判断索引是否仍然有效。
+    """
+
+    def __init__(self, index_dir: str):
+        """
+        初始化索引存储
+
+        Args:
+            index_dir: 索引目录
+        """
+        self.index_dir = index_dir
+        os.makedirs(index_dir, exist_ok=True)
+
+    def _index_path(self, file_path: str) -> str:
+        key = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.index_dir, f"{key}.json")
+
+    def load(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        读取日记文件的索引
+
+        Args:
+            file_path: 日记文件路径
+
+        Returns:
+            Optional[Dict[str, Any]]: 包含 mtime_ns、size、sha256 和 index（DiaryIndex）的字典，不存在或格式不符时返回None
+        """
+        index_path = self._index_path(file_path)
+        if not os.path.exists(index_path):
+            return None
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get("version") != INDEX_VERSION or stored.get("path") != os.path.abspath(file_path):
+                return None
+            stored["index"] = DiaryIndex.from_dict(stored["index"])
+            return stored
+        except Exception as e:
+            print(f"读取日记索引失败: {e}")
+            return None
+
+    def save(self, file_path: str, mtime_ns: int, size: int, sha256: str, index: DiaryIndex):
+        """
+        保存日记文件的索引（先写临时文件再替换）
+
+        Args:
+            file_path: 日记文件路径
+            mtime_ns: 文件修改时间（纳秒）
+            size: 文件大小
+            sha256: 文件内容摘要
+            index: 日记索引
+        """
+        index_path = self._index_path(file_path)
+        temp_path = f"{index_path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "version": INDEX_VERSION,
+                    "path": os.path.abspath(file_path),
+                    "mtime_ns": mtime_ns,
+                    "size": size,
+                    "sha256": sha256,
+                    "index": index.to_dict()
+                }, f, ensure_ascii=False)
+            os.replace(temp_path, index_path)
+        except Exception as e:
+            print(f"保存日记索引失败: {e}")
+
+    def load_corpus(self, key: str) -> Dict[str, Dict[str, Any]]:
+        """
+        读取多文件日记中各文件的索引
+
+        Args:
+            key: 日记目录和文件匹配模式组成的标识
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 文件路径到 mtime_ns、size、sha256、index（DiaryIndex）的映射，不存在时为空
+        """
+        index_path = self._index_path(key)
+        if not os.path.exists(index_path):
+            return {}
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get("version") != INDEX_VERSION or stored.get("path") != key:
+                return {}
+            for entry in stored["files"].values():
+                entry["index"] = DiaryIndex.from_dict(entry["index"])
+            return stored["files"]
+        except Exception as e:
+            print(f"读取日记索引失败: {e}")
+            return {}
+
+    def save_corpus(self, key: str, files: Dict[str, Dict[str, Any]]):
+        """
+        保存多文件日记中各文件的索引
+
+        Args:
+            key: 日记目录和文件匹配模式组成的标识
+            files: 文件路径到 mtime_ns、size、sha256、index（DiaryIndex）的映射
+        """
+        index_path = self._index_path(key)
+        temp_path = f"{index_path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "version": INDEX_VERSION,
+                    "path": key,
+                    "files": {
+                        file_path: dict(entry, index=entry["index"].to_dict())
+                        for file_path, entry in files.items()
+                    }
+                }, f, ensure_ascii=False)
+            os.replace(temp_path, index_path)
+        except Exception as e:
+            print(f"保存日记索引失败: {e}")
@@ -1,7 +1,46 @@
+import glob
+import mmap
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, Iterator, Union
+
+from modules.diary.diary_index import DiaryIndex, DiaryCorpusIndex, DiaryIndexStore, file_digest
+
+# 文件名中的日期，用于没有日期标题的每日笔记（如 2024-01-01.md）
+FILE_DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# 需要重新解析的文件数达到该值时才使用进程池，文件较少时进程启动开销更大
+PARALLEL_PARSE_THRESHOLD = 16
+
+def _index_diary_file(file_path: str, config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    解析多文件日记中的单个文件（在进程池中执行）
+    
+    Args:
+        file_path: 文件路径
+        config: 日记配置
+        
+    Returns:
+        Optional[Dict[str, Any]]: 文件的 mtime_ns、size、sha256 和 index（DiaryIndex），读取失败时返回None
+    """
+    parser = DiaryParser(dict(config, persist_index=False))
+    try:
+        stat = os.stat(file_path)
+        with parser.open_mapped(file_path) as data:
+            index = DiaryIndex.build(data)
+            if not index.sections:
+                # 没有日期标题时整个文件属于文件名中的日期
+                match = FILE_DATE_PATTERN.search(os.path.basename(file_path))
+                if match:
+                    index = DiaryIndex({match.group(0): (0, len(data))})
+            parser._update_food_items(index, data, index.dates())
+            return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": file_digest(data), "index": index}
+    except Exception as e:
+        print(f"解析日记文件失败: {file_path}, {e}")
+        return None
 
 class DiaryParser:
     """
@@ -18,6 +57,24 @@ class DiaryParser:
         self.date_pattern = re.compile(r'#+\s*(\d{4}-\d{2}-\d{2})')
         self.food_pattern = re.compile(r'#+\s*饮食\s*\n([\s\S]*?)(?=\n#+|$)')
         
+        self.config = config
+        
+        # 日期索引缓存：文件路径 -> (修改时间, 文件大小, 索引)，文件未变化时重复使用
+        self._indexes: Dict[str, Tuple[int, int, DiaryIndex]] = {}
+        
+        # 多文件日记：日记路径为目录时，按glob匹配目录中的文件（如每天一个Markdown文件）
+        self.glob_pattern = config.get('glob') or '**/*.md'
+        self.parse_workers = config.get('parse_workers') or None  # 并行解析的进程数，默认为CPU核数
+        self._corpora: Dict[str, Tuple[Dict[str, Tuple[int, int]], Dict[str, Dict[str, Any]], DiaryCorpusIndex]] = {}
+        
+        # 索引（包括每天的饮食信息）保存到磁盘，文件未变化时不再重新解析
+        self.index_store = None
+        if config.get('persist_index', True):
+            index_dir = config.get('index_dir') or os.path.join(
+                os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'cache', 'diary_index'
+            )
+            self.index_store = DiaryIndexStore(index_dir)
+        
     def read_diary_file(self, file_path: str) -> str:
         """
         读取整个日记文件
@@ -35,6 +92,227 @@ class DiaryParser:
             print(f"读取日记文件失败: {e}")
             return ""
     
+    @contextmanager
+    def open_mapped(self, file_path: str) -> Iterator[Union[mmap.mmap, bytes]]:
+        """
+        以只读内存映射方式打开日记文件，文件内容按需从磁盘读入，不会整体复制到内存
+        
+        Args:
+            file_path: 日记文件路径
+            
+        Yields:
+            Union[mmap.mmap, bytes]: 映射的文件内容（空文件为b""）
+        """
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # 空文件不能映射
+                yield b""
+                return
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mapped
+            finally:
+                mapped.close()
+    
+    def get_index(self, file_path: str) -> Optional[DiaryIndex]:
+        """
+        获取日记文件的日期索引
+        
+        文件修改时间和大小与索引记录一致时直接使用内存或磁盘中的索引，不读取日记文件；
+        只在文件末尾追加了内容时，增量更新索引；其他修改重新建立索引。
+        
+        Args:
+            file_path: 日记文件路径或多文件日记目录
+            
+        Returns:
+            Optional[DiaryIndex]: 日期索引，读取失败时返回None
+        """
+        if os.path.isdir(file_path):
+            return self.get_corpus_index(file_path)
+        
+        try:
+            stat = os.stat(file_path)
+            cached = self._indexes.get(file_path)
+            if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                return cached[2]
+            index = self._load_index(file_path, stat)
+        except Exception as e:
+            print(f"读取日记文件失败: {e}")
+            return None
+        
+        self._indexes[file_path] = (stat.st_mtime_ns, stat.st_size, index)
+        return index
+    
+    def _load_index(self, file_path: str, stat: os.stat_result) -> DiaryIndex:
+        """
+        从磁盘读取索引并检查是否有效，必要时增量更新或重新建立
+        
+        Args:
+            file_path: 日记文件路径
+            stat: 日记文件的状态
+            
+        Returns:
+            DiaryIndex: 日期索引
+        """
+        stored = self.index_store.load(file_path) if self.index_store else None
+        if stored and stored["mtime_ns"] == stat.st_mtime_ns and stored["size"] == stat.st_size:
+            return stored["index"]
+        
+        # 在映射的字节上扫描日期标题，每次只解码一天的内容，内存占用与日记长度无关
+        with self.open_mapped(file_path) as data:
+            size = len(data)
+            digest = file_digest(data)
+            
+            if stored and stored["size"] == size and stored["sha256"] == digest:
+                # 只有修改时间变化，内容相同
+                index = stored["index"]
+            elif stored and stored["size"] < size and stored["sha256"] == file_digest(data, stored["size"]):
+                # 只在末尾追加了内容，重新解析最后一天及新增的日期
+                index = stored["index"]
+                self._update_food_items(index, data, index.update_tail(data))
+            else:
+                index = DiaryIndex.build(data)
+                self._update_food_items(index, data, index.dates())
+        
+        if self.index_store:
+            self.index_store.save(file_path, stat.st_mtime_ns, size, digest, index)
+        return index
+    
+    def get_corpus_index(self, dir_path: str) -> Optional[DiaryCorpusIndex]:
+        """
+        获取多文件日记的合并索引
+        
+        按 glob 匹配目录中的文件，修改时间和大小与上次一致的文件直接使用已保存的索引，
+        其余文件重新解析（数量较多时使用进程池并行解析），然后合并为一个日期索引。
+        
+        Args:
+            dir_path: 日记目录
+            
+        Returns:
+            Optional[DiaryCorpusIndex]: 合并后的索引，目录读取失败时返回None
+        """
+        key = f"{os.path.abspath(dir_path)}|{self.glob_pattern}"
+        try:
+            paths = sorted(
+                path for path in glob.glob(os.path.join(dir_path, self.glob_pattern), recursive=True)
+                if os.path.isfile(path)
+            )
+            stats = {path: os.stat(path) for path in paths}
+        except Exception as e:
+            print(f"读取日记目录失败: {e}")
+            return None
+        fingerprints = {path: (stat.st_mtime_ns, stat.st_size) for path, stat in stats.items()}
+        
+        cached = self._corpora.get(key)
+        if cached and cached[0] == fingerprints:
+            return cached[2]
+        
+        # 已保存的各文件索引
+        if cached:
+            files = cached[1]
+        elif self.index_store:
+            files = self.index_store.load_corpus(key)
+        else:
+            files = {}
+        files = {path: entry for path, entry in files.items() if path in fingerprints}
+        
+        changed = [
+            path for path, fingerprint in fingerprints.items()
+            if path not in files or (files[path]["mtime_ns"], files[path]["size"]) != fingerprint
+        ]
+        if changed:
+            if len(changed) >= PARALLEL_PARSE_THRESHOLD:
+                workers = self.parse_workers or os.cpu_count() or 1
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    results = list(executor.map(
+                        _index_diary_file, changed, [self.config] * len(changed),
+                        chunksize=max(1, len(changed) // (workers * 4))
+                    ))
+            else:
+                results = [_index_diary_file(path, self.config) for path in changed]
+            
+            for path, result in zip(changed, results):
+                if result is None:
+                    files.pop(path, None)
+                else:
+                    files[path] = result
+            if self.index_store:
+                self.index_store.save_corpus(key, files)
+        
+        index = DiaryCorpusIndex.merge({path: entry["index"] for path, entry in files.items()})
+        self._corpora[key] = (fingerprints, files, index)
+        return index
+    
+    def _update_food_items(self, index: DiaryIndex, data: bytes, date_strs: List[str]):
+        """
+        重新提取指定日期的饮食信息并保存到索引中，内容为空的日期不记录
+        
+        Args:
+            index: 日期索引
+            data: 日记字节内容
+            date_strs: 日期字符串列表
+        """
+        for date_str in date_strs:
+            date_content = index.read(data, date_str)
+            if date_content:
+                index.food_items[date_str] = self.extract_food_items(date_content)
+            else:
+                index.food_items.pop(date_str, None)
+    
+    def iter_date_contents(self, file_path: str, start_date: datetime,
+                           end_date: datetime) -> Iterator[Tuple[str, str]]:
+        """
+        逐天读取日期范围内的日记内容，只解码范围内的日期
+        
+        Args:
+            file_path: 日记文件路径或多文件日记目录
+            start_date: 开始日期
+            end_date: 结束日期
+            
+        Yields:
+            Tuple[str, str]: (日期字符串, 当天内容)，跳过内容为空的日期
+        """
+        index = self.get_index(file_path)
+        if not index:
+            return
+        date_strs = index.dates_between(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
+        if not date_strs:
+            return
+        try:
+            if isinstance(index, DiaryCorpusIndex):
+                # 多文件日记逐天读取所在文件中的对应部分
+                for date_str in date_strs:
+                    offset, length = index.sections[date_str]
+                    with open(index.files[date_str], 'rb') as f:
+                        f.seek(offset)
+                        date_content = f.read(length).decode('utf-8', errors='replace')
+                    if date_content:
+                        yield date_str, date_content
+                return
+            
+            with self.open_mapped(file_path) as data:
+                for date_str in date_strs:
+                    date_content = index.read(data, date_str)
+                    if date_content:
+                        yield date_str, date_content
+        except Exception as e:
+            print(f"读取日记文件失败: {e}")
+    
+    def read_date_content(self, file_path: str, date: datetime) -> str:
+        """
+        通过索引读取日记文件中指定日期的内容，只读取该日期对应的部分
+        
+        Args:
+            file_path: 日记文件路径或多文件日记目录
+            date: 日期
+            
+        Returns:
+            str: 指定日期的内容，不存在时返回空字符串
+        """
+        for _, date_content in self.iter_date_contents(file_path, date, date):
+            return date_content
+        return ""
+    
     def extract_date_content(self, content: str, target_date: datetime) -> str:
         """
         从日记内容中提取指定日期的内容
@@ -94,7 +372,7 @@ class DiaryParser:
         获取指定日期的饮食数据
         
         Args:
-            file_path: 日记文件路径
+            file_path: 日记文件路径或多文件日记目录
             date: 日期，默认为今天
             
         Returns:
@@ -104,22 +382,14 @@ class DiaryParser:
         if date is None:
             date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         
-        # 读取日记文件
-        content = self.read_diary_file(file_path)
-        if not content:
+        # 读取日记索引，其中已包含每天提取好的饮食信息
+        index = self.get_index(file_path)
+        if not index:
             return {"date": date.strftime("%Y-%m-%d"), "items": []}
         
-        # 提取指定日期的内容
-        date_content = self.extract_date_content(content, date)
-        if not date_content:
-            return {"date": date.strftime("%Y-%m-%d"), "items": []}
-        
-        # 提取饮食信息
-        food_items = self.extract_food_items(date_content)
-        
         return {
             "date": date.strftime("%Y-%m-%d"),
-            "items": food_items
+            "items": list(index.food_items.get(date.strftime("%Y-%m-%d"), []))
         }
     
     def get_food_data_range(self, file_path: str, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
@@ -127,39 +397,26 @@ class DiaryParser:
         获取指定日期范围内的饮食数据
         
         Args:
-            file_path: 日记文件路径
+            file_path: 日记文件路径或多文件日记目录
             start_date: 开始日期
             end_date: 结束日期
             
         Returns:
             List[Dict[str, Any]]: 饮食数据列表
         """
-        # 计算日期范围
-        days = (end_date - start_date).days + 1
-        
-        # 读取日记文件
-        content = self.read_diary_file(file_path)
-        if not content:
+        # 读取日记索引
+        index = self.get_index(file_path)
+        if not index:
             return []
         
         result = []
-        current_date = start_date
         
-        # 遍历日期范围
-        for _ in range(days):
-            # 提取当前日期的内容
-            date_content = self.extract_date_content(content, current_date)
-            
-            # 如果找到内容，提取饮食信息
-            if date_content:
-                food_items = self.extract_food_items(date_content)
-                
+        # 只遍历索引中位于日期范围内且内容非空的日期
+        for date_str in index.dates_between(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")):
+            if date_str in index.food_items:
                 result.append({
-                    "date": current_date.strftime("%Y-%m-%d"),
-                    "items": food_items
+                    "date": date_str,
+                    "items": list(index.food_items[date_str])
                 })
-            
-            # 移动到下一天
-            current_date = current_date.replace(day=current_date.day + 1)
         
         return result
\ No newline at end of file
@@ -1,12 +1,16 @@
+import calendar
 import os
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 from modules.diary.diary_parser import DiaryParser
 
+# 支持的分析周期
+PERIODS = ("week", "month", "custom")
+
 class DiaryWeeklyAnalyzer:
     """
-    日记周分析器类，负责分析一周的日记数据
+    日记周期分析器类，负责汇总一周、一个月或任意日期范围的日记数据
     """
     
     def __init__(self, config: Dict[str, Any]):
@@ -19,6 +23,117 @@ class DiaryWeeklyAnalyzer:
         self.config = config
         self.diary_parser = DiaryParser(config)
     
+    @staticmethod
+    def period_range(period: str, end_date: Optional[datetime] = None,
+                     start_date: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+        """
+        计算分析周期的日期范围
+        
+        Args:
+            period: 周期，week（截至end_date的7天）、month（end_date所在的自然月，截至今天）、custom（start_date至end_date）
+            end_date: 结束日期（month为所在月份中的任意一天），默认为今天
+            start_date: 开始日期，仅custom使用
+            
+        Returns:
+            Tuple[datetime, datetime]: 开始日期和结束日期（都包含）
+        """
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        if end_date is None:
+            end_date = today
+        end_date = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        
+        if period == "week":
+            return end_date - timedelta(days=6), end_date
+        if period == "month":
+            month_start = end_date.replace(day=1)
+            month_end = end_date.replace(day=calendar.monthrange(end_date.year, end_date.month)[1])
+            return month_start, min(month_end, max(today, month_start))
+        if period == "custom":
+            if start_date is None:
+                raise ValueError("自定义周期需要指定开始日期")
+            start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+            if start_date > end_date:
+                raise ValueError("开始日期不能晚于结束日期")
+            return start_date, end_date
+        raise ValueError(f"不支持的分析周期: {period}，可选: {', '.join(PERIODS)}")
+    
+    def collect_period(self, file_path: str, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """
+        汇总日期范围内的饮食数据，只查询一次日记索引
+        
+        Args:
+            file_path: 日记文件路径或多文件日记目录
+            start_date: 开始日期
+            end_date: 结束日期
+            
+        Returns:
+            Dict[str, Any]: 周期饮食数据，包含全部饮食项目（items）、每天的数据（days）、
+                有记录的天数（recorded_days）和周期总天数（total_days）
+        """
+        days = self.diary_parser.get_food_data_range(file_path, start_date, end_date)
+        
+        return {
+            "start_date": start_date.strftime("%Y-%m-%d"),
+            "end_date": end_date.strftime("%Y-%m-%d"),
+            "items": [item for day in days for item in day.get("items", [])],
+            "days": days,
+            "recorded_days": len(days),
+            "total_days": (end_date - start_date).days + 1
+        }
+    
+    def analyze_period(self, file_path: str, period: str, end_date: Optional[datetime] = None,
+                       start_date: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        汇总一个周期的日记数据
+        
+        Args:
+            file_path: 日记文件路径或多文件日记目录
+            period: 周期，week、month或custom
+            end_date: 结束日期，默认为今天
+            start_date: 开始日期，仅custom使用
+            
+        Returns:
+            Dict[str, Any]: 周期饮食数据，另外包含周期名称（period）
+        """
+        start_date, end_date = self.period_range(period, end_date, start_date)
+        period_data = self.collect_period(file_path, start_date, end_date)
+        period_data["period"] = period
+        return period_data
+    
+    @staticmethod
+    def format_for_analysis(period_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        将周期数据转换为大模型分析使用的饮食数据，每个饮食项目前加上日期，一个周期只需一次分析
+        
+        Args:
+            period_data: collect_period 或 analyze_period 的返回值
+            
+        Returns:
+            Dict[str, Any]: 饮食数据字典
+        """
+        return {
+            "start_date": period_data["start_date"],
+            "end_date": period_data["end_date"],
+            "items": [
+                f"{day['date']}: {item}"
+                for day in period_data.get("days", [])
+                for item in day.get("items", [])
+            ]
+        }
+    
+    def analyze_monthly_diary(self, file_path: str, date: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        分析一个月的日记数据
+        
+        Args:
+            file_path: 日记文件路径
+            date: 所在月份中的任意一天，默认为今天
+            
+        Returns:
+            Dict[str, Any]: 一个月的饮食数据
+        """
+        return self.analyze_period(file_path, "month", date)
+    
     def analyze_weekly_diary(self, file_path: str, end_date: Optional[datetime] = None) -> Dict[str, Any]:
         """
         分析一周的日记数据
@@ -37,17 +152,5 @@ class DiaryWeeklyAnalyzer:
         # 计算开始日期（7天前）
         start_date = end_date - timedelta(days=6)
         
-        # 获取日期范围内的饮食数据
-        food_data_list = self.diary_parser.get_food_data_range(file_path, start_date, end_date)
-        
-        # 合并数据
-        weekly_food_data = {
-            "start_date": start_date.strftime("%Y-%m-%d"),
-            "end_date": end_date.strftime("%Y-%m-%d"),
-            "items": []
-        }
-        
-        for food_data in food_data_list:
-            weekly_food_data["items"].extend(food_data.get("items", []))
-        
-        return weekly_food_data
\ No newline at end of file
+        # 获取日期范围内的饮食数据并合并
+        return self.collect_period(file_path, start_date, end_date)
\ No newline at end of file
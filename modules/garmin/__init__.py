@@ -1,5 +1,6 @@
 # Garmin模块初始化文件
 
 from .garmin_client import GarminClient
+from .async_client import AsyncGarminClient
 
-__all__ = ['GarminClient']
\ No newline at end of file
+__all__ = ['GarminClient', 'AsyncGarminClient']
\ No newline at end of file
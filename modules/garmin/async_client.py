@@ -0,0 +1,173 @@
+from typing import Dict, Any, List, Optional, Callable, Hashable
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+
+from ..utils.single_flight import AsyncSingleFlight
+from .garmin_client import GarminClient
+from .timeseries import TimeSeries
+
+
+class AsyncGarminClient:
+    """
+    GarminClient的异步封装，供FastAPI等asyncio程序使用
+
+    同步方法在独立的线程池中执行，不会阻塞事件循环；并发数由信号量限制；
+    相同（指标, 日期）的请求在完成前只会执行一次，其他调用者等待同一个结果。
+    缓存、会话和时间序列存储与同步客户端共用。
+    """
+
+    def __init__(self, client: GarminClient, max_concurrency: Optional[int] = None):
+        """
+        初始化异步Garmin客户端
+
+        Args:
+            client: 同步Garmin客户端
+            max_concurrency: 同时执行的最大请求数，默认与同步客户端的max_workers相同
+        """
+        self.client = client
+        self.max_concurrency = max(1, int(max_concurrency or client.max_workers))
+        # 同步客户端内部会把逐日请求提交到自己的线程池，这里使用单独的线程池避免互相占满
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="garmin-async")
+        self._semaphore = None
+        self._single_flight = AsyncSingleFlight()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'AsyncGarminClient':
+        """
+        根据Garmin配置创建异步客户端
+
+        Args:
+            config: Garmin配置字典
+
+        Returns:
+            AsyncGarminClient: 异步客户端
+        """
+        return cls(GarminClient(config), config.get('async_max_concurrency'))
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # 信号量需要在事件循环中创建
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _call(self, func: Callable, *args, **kwargs) -> Any:
+        async with self._get_semaphore():
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def _run(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """
+        执行同步方法，相同key的请求合并为一次
+
+        Args:
+            key: 请求标识，如 ("sleep", "2024-01-01")
+            func: 同步客户端的方法
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            Any: 方法返回值
+        """
+        return await self._single_flight.do(key, self._call, func, *args, **kwargs)
+
+    @staticmethod
+    def _date_key(date: Optional[datetime]) -> str:
+        if date is None:
+            return datetime.now().strftime("%Y-%m-%d")
+        return date.strftime("%Y-%m-%d")
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息（只读取内存中的计数，直接同步返回）
+        """
+        stats = self.client.get_cache_stats()
+        stats["async_single_flight"] = self._single_flight.stats()
+        return stats
+
+    async def get_steps_data(self, date: Optional[datetime] = None) -> Dict[str, Any]:
+        return await self._run(("steps", self._date_key(date)), self.client.get_steps_data, date)
+
+    async def get_heart_rate(self, date: Optional[datetime] = None) -> Dict[str, Any]:
+        return await self._run(("heart_rate", self._date_key(date)), self.client.get_heart_rate, date)
+
+    async def get_sleep_data(self, date: Optional[datetime] = None) -> Dict[str, Any]:
+        return await self._run(("sleep", self._date_key(date)), self.client.get_sleep_data, date)
+
+    async def get_activities(self, date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        return await self._run(("activities", self._date_key(date)), self.client.get_activities, date)
+
+    async def get_stress_data(self, date: Optional[datetime] = None, include_values: bool = True,
+                              format_time: bool = False) -> Dict[str, Any]:
+        return await self._run(
+            ("stress", self._date_key(date), include_values, format_time),
+            self.client.get_stress_data, date, include_values, format_time
+        )
+
+    async def get_daily_fitness_data(self, date: Optional[datetime] = None) -> Dict[str, Any]:
+        return await self._run(("fitness", self._date_key(date)), self.client.get_daily_fitness_data, date)
+
+    async def get_daily_weigh_ins(self, date: Optional[datetime] = None,
+                                  enddate: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        return await self._run(
+            ("weigh_ins", self._date_key(date), self._date_key(enddate or date)),
+            self.client.get_daily_weigh_ins, date, enddate
+        )
+
+    async def get_activities_range(self, start_date: datetime, end_date: datetime) -> Dict[str, List[Dict[str, Any]]]:
+        return await self._run(
+            ("activities_range", self._date_key(start_date), self._date_key(end_date)),
+            self.client.get_activities_range, start_date, end_date
+        )
+
+    async def get_fitness_range(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+        return await self._run(
+            ("fitness_range", self._date_key(start_date), self._date_key(end_date)),
+            self.client.get_fitness_range, start_date, end_date
+        )
+
+    async def get_sleep_range(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        return await self._run(
+            ("sleep_range", self._date_key(start_date), self._date_key(end_date)),
+            self.client.get_sleep_range, start_date, end_date
+        )
+
+    async def get_stress_range(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        return await self._run(
+            ("stress_range", self._date_key(start_date), self._date_key(end_date)),
+            self.client.get_stress_range, start_date, end_date
+        )
+
+    async def get_weigh_ins_range(self, start_date: datetime, end_date: datetime) -> Dict[str, List[Dict[str, Any]]]:
+        return await self._run(
+            ("weigh_ins_range", self._date_key(start_date), self._date_key(end_date)),
+            self.client.get_weigh_ins_range, start_date, end_date
+        )
+
+    async def get_weekly_fitness_data(self, end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        return await self._run(("weekly_fitness", self._date_key(end_date)), self.client.get_weekly_fitness_data, end_date)
+
+    async def get_timeseries(self, metric: str, start_date: datetime,
+                             end_date: Optional[datetime] = None) -> Optional[TimeSeries]:
+        return await self._run(
+            ("timeseries", metric, self._date_key(start_date), self._date_key(end_date or start_date)),
+            self.client.get_timeseries, metric, start_date, end_date
+        )
+
+    async def get_name(self):
+        return await self._run(("name",), self.client.get_name)
+
+    def close(self):
+        """
+        关闭线程池和同步客户端
+        """
+        self._executor.shutdown(wait=False)
+        self.client.close()
+
+    async def aclose(self):
+        """
+        在默认线程池中关闭客户端，等待同步客户端进行中的请求时不阻塞事件循环
+        """
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self.close)
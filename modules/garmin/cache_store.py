@@ -0,0 +1,677 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Iterable, Callable, NamedTuple
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# 旧版缓存文件名格式：<指标>_<YYYY-MM-DD>.json
+JSON_CACHE_FILE_PATTERN = re.compile(r'^(?P<metric>.+)_(?P<date>\d{4}-\d{2}-\d{2})\.json$')
+
+
+# 缓存条目类型：正常数据、无数据（负缓存）、请求失败
+ENTRY_DATA = 'data'
+ENTRY_EMPTY = 'empty'
+ENTRY_ERROR = 'error'
+
+
+class CacheEntry(NamedTuple):
+    """
+    一条缓存数据及其过期时间
+
+    kind为error时，data是请求失败期间返回给调用方的数据，error_count为连续失败次数。
+    """
+    data: Any
+    expires_at: Optional[float] = None
+    kind: str = ENTRY_DATA
+    error_count: int = 0
+
+
+class CacheStore(ABC):
+    """
+    Garmin数据缓存后端抽象基类，按 (指标, 日期) 存取数据
+    """
+
+    @abstractmethod
+    def get_entries(self, metric: str, date_strs: Iterable[str],
+                    include_expired: bool = False) -> Dict[str, CacheEntry]:
+        """
+        批量读取同一指标多个日期未过期的缓存条目
+
+        Args:
+            metric: 指标名称，如steps、sleep
+            date_strs: 日期字符串列表，格式为YYYY-MM-DD
+            include_expired: 是否同时返回已过期的条目
+
+        Returns:
+            Dict[str, CacheEntry]: 日期到缓存条目的映射，只包含命中的日期
+        """
+        pass
+
+    @abstractmethod
+    def put_entries(self, metric: str, entries: Dict[str, CacheEntry]):
+        """
+        批量写入同一指标多个日期的缓存条目
+
+        Args:
+            metric: 指标名称
+            entries: 日期到缓存条目的映射
+        """
+        pass
+
+    def get(self, metric: str, date_str: str) -> Optional[Any]:
+        """
+        读取一条缓存
+
+        Args:
+            metric: 指标名称，如steps、sleep
+            date_str: 日期字符串，格式为YYYY-MM-DD
+
+        Returns:
+            Optional[Any]: 缓存数据，如果不存在或已过期则返回None
+        """
+        entry = self.get_entries(metric, [date_str]).get(date_str)
+        return entry.data if entry is not None else None
+
+    def put(self, metric: str, date_str: str, data: Any, ttl: Optional[float] = None):
+        """
+        写入一条缓存
+
+        Args:
+            metric: 指标名称
+            date_str: 日期字符串
+            data: 要缓存的数据（可JSON序列化）
+            ttl: 有效期（秒），None表示永不过期
+        """
+        self.put_many(metric, {date_str: data}, ttl)
+
+    def get_many(self, metric: str, date_strs: Iterable[str]) -> Dict[str, Any]:
+        """
+        批量读取同一指标多个日期的缓存
+
+        Args:
+            metric: 指标名称
+            date_strs: 日期字符串列表
+
+        Returns:
+            Dict[str, Any]: 日期到缓存数据的映射，只包含命中的日期
+        """
+        return {date_str: entry.data for date_str, entry in self.get_entries(metric, date_strs).items()}
+
+    def put_many(self, metric: str, items: Dict[str, Any], ttl: Optional[float] = None,
+                 kind: str = ENTRY_DATA):
+        """
+        批量写入同一指标多个日期的缓存
+
+        Args:
+            metric: 指标名称
+            items: 日期到数据的映射
+            ttl: 有效期（秒），None表示永不过期
+            kind: 条目类型
+        """
+        expires_at = time.time() + ttl if ttl is not None else None
+        self.put_entries(metric, {date_str: CacheEntry(data, expires_at, kind) for date_str, data in items.items()})
+
+    def expire(self, metric: str, date_strs: Iterable[str]):
+        """
+        将缓存条目标记为已过期，下次读取时会重新请求；过期的数据保留，请求失败时仍可返回
+
+        Args:
+            metric: 指标名称
+            date_strs: 日期字符串列表
+        """
+        now = time.time()
+        entries = self.get_entries(metric, date_strs, include_expired=True)
+        if entries:
+            self.put_entries(metric, {date_str: entry._replace(expires_at=now) for date_str, entry in entries.items()})
+
+    def get_range(self, metric: str, start_date: str, end_date: str) -> Dict[str, Any]:
+        """
+        读取同一指标一个日期范围内（含两端）的缓存
+
+        Args:
+            metric: 指标名称
+            start_date: 开始日期字符串
+            end_date: 结束日期字符串
+
+        Returns:
+            Dict[str, Any]: 日期到缓存数据的映射，只包含命中的日期
+        """
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        days = (datetime.strptime(end_date, "%Y-%m-%d") - start).days + 1
+        date_strs = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(max(days, 0))]
+        return self.get_many(metric, date_strs)
+
+    def close(self):
+        """
+        释放缓存后端占用的资源
+        """
+        pass
+
+
+def _is_json_envelope(content: Any) -> bool:
+    """
+    判断JSON缓存文件内容是否为带过期时间的格式（旧格式直接保存数据）
+
+    Args:
+        content: 缓存文件内容
+
+    Returns:
+        bool: 是否为带过期时间的格式
+    """
+    return (
+        isinstance(content, dict)
+        and {"expires_at", "data"} <= set(content.keys())
+        and set(content.keys()) <= {"expires_at", "data", "kind", "error_count"}
+    )
+
+
+class JsonFileCacheStore(CacheStore):
+    """
+    每条缓存一个JSON文件的缓存后端
+    """
+
+    def __init__(self, cache_dir: str, default_ttl: Optional[float] = 3600):
+        """
+        初始化JSON文件缓存
+
+        Args:
+            cache_dir: 缓存目录
+            default_ttl: 旧格式缓存文件（无过期时间）按修改时间计算的有效期（秒）
+        """
+        self.cache_dir = cache_dir
+        self.default_ttl = default_ttl
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _get_cache_path(self, metric: str, date_str: str) -> str:
+        """
+        获取缓存文件路径
+
+        Args:
+            metric: 指标名称
+            date_str: 日期字符串
+
+        Returns:
+            str: 缓存文件路径
+        """
+        return os.path.join(self.cache_dir, f"{metric}_{date_str}.json")
+
+    def get_entries(self, metric: str, date_strs: Iterable[str],
+                    include_expired: bool = False) -> Dict[str, CacheEntry]:
+        result = {}
+        for date_str in date_strs:
+            entry = self._read_entry(metric, date_str)
+            if entry is None:
+                continue
+            if include_expired or entry.expires_at is None or entry.expires_at > time.time():
+                result[date_str] = entry
+        return result
+
+    def _read_entry(self, metric: str, date_str: str) -> Optional[CacheEntry]:
+        """
+        读取单个缓存文件
+
+        Args:
+            metric: 指标名称
+            date_str: 日期字符串
+
+        Returns:
+            Optional[CacheEntry]: 缓存条目，文件不存在或读取失败时返回None
+        """
+        cache_path = self._get_cache_path(metric, date_str)
+
+        # 检查缓存文件是否存在
+        if not os.path.exists(cache_path):
+            return None
+
+        # 读取缓存
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                content = json.load(f)
+        except Exception as e:
+            print(f"读取缓存失败: {e}")
+            return None
+
+        # 带过期时间的缓存格式
+        if _is_json_envelope(content):
+            return CacheEntry(
+                content.get("data"),
+                content.get("expires_at"),
+                content.get("kind", ENTRY_DATA),
+                content.get("error_count", 0)
+            )
+
+        # 旧格式缓存按文件修改时间计算过期时间
+        expires_at = os.path.getmtime(cache_path) + self.default_ttl if self.default_ttl is not None else None
+        return CacheEntry(content, expires_at)
+
+    def put_entries(self, metric: str, entries: Dict[str, CacheEntry]):
+        for date_str, entry in entries.items():
+            cache_path = self._get_cache_path(metric, date_str)
+            try:
+                with open(cache_path, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        "expires_at": entry.expires_at,
+                        "kind": entry.kind,
+                        "error_count": entry.error_count,
+                        "data": entry.data
+                    }, f, ensure_ascii=False)
+            except Exception as e:
+                print(f"保存缓存失败: {e}")
+
+
+class SQLiteCacheStore(CacheStore):
+    """
+    基于SQLite的缓存后端，以 (指标, 日期) 为主键，过期时间保存在行内
+
+    使用WAL模式，命令行和API服务进程可以同时读写同一个数据库文件。
+    """
+
+    def __init__(self, db_path: str, default_ttl: Optional[float] = 3600):
+        """
+        初始化SQLite缓存
+
+        Args:
+            db_path: 数据库文件路径
+            default_ttl: 迁移旧JSON缓存文件时使用的有效期（秒）
+        """
+        self.db_path = db_path
+        self.default_ttl = default_ttl
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._init_schema()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """
+        获取当前线程的数据库连接，每个线程使用独立连接
+
+        Returns:
+            sqlite3.Connection: 数据库连接
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _init_schema(self):
+        """
+        创建缓存表
+        """
+        conn = self._get_connection()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    metric TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL,
+                    kind TEXT NOT NULL DEFAULT 'data',
+                    error_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (metric, date)
+                ) WITHOUT ROWID
+            """)
+            # 为旧版数据库补充条目类型字段
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(cache_entries)")}
+            if "kind" not in columns:
+                conn.execute("ALTER TABLE cache_entries ADD COLUMN kind TEXT NOT NULL DEFAULT 'data'")
+            if "error_count" not in columns:
+                conn.execute("ALTER TABLE cache_entries ADD COLUMN error_count INTEGER NOT NULL DEFAULT 0")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+
+    def get_entries(self, metric: str, date_strs: Iterable[str],
+                    include_expired: bool = False) -> Dict[str, CacheEntry]:
+        date_strs = list(date_strs)
+        if not date_strs:
+            return {}
+
+        result = {}
+        # 包含过期条目时，用负无穷作为比较时间
+        now = float("-inf") if include_expired else time.time()
+        try:
+            conn = self._get_connection()
+            # 分批查询，避免超过SQLite的参数数量限制
+            for i in range(0, len(date_strs), 500):
+                batch = date_strs[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT date, data, expires_at, kind, error_count FROM cache_entries "
+                    f"WHERE metric = ? AND date IN ({placeholders}) AND (expires_at IS NULL OR expires_at > ?)",
+                    (metric, *batch, now)
+                ).fetchall()
+                for date_str, data, expires_at, kind, error_count in rows:
+                    result[date_str] = CacheEntry(json.loads(data), expires_at, kind, error_count)
+        except sqlite3.Error as e:
+            print(f"读取缓存失败: {e}")
+
+        return result
+
+    def put_entries(self, metric: str, entries: Dict[str, CacheEntry]):
+        if not entries:
+            return
+
+        now = time.time()
+        rows = [
+            (
+                metric,
+                date_str,
+                json.dumps(entry.data, ensure_ascii=False, separators=(",", ":")),
+                now,
+                entry.expires_at,
+                entry.kind,
+                entry.error_count
+            )
+            for date_str, entry in entries.items()
+        ]
+        try:
+            conn = self._get_connection()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cache_entries "
+                    "(metric, date, data, fetched_at, expires_at, kind, error_count) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+        except sqlite3.Error as e:
+            print(f"保存缓存失败: {e}")
+
+    def get_range(self, metric: str, start_date: str, end_date: str) -> Dict[str, Any]:
+        try:
+            rows = self._get_connection().execute(
+                "SELECT date, data FROM cache_entries "
+                "WHERE metric = ? AND date BETWEEN ? AND ? AND (expires_at IS NULL OR expires_at > ?) "
+                "ORDER BY date",
+                (metric, start_date, end_date, time.time())
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"读取缓存失败: {e}")
+            return {}
+
+        return {date_str: json.loads(data) for date_str, data in rows}
+
+    def migrate_json_files(self, json_dir: str) -> int:
+        """
+        将旧版的JSON缓存文件一次性导入数据库，完成后记录迁移标记，不会重复执行
+
+        导入的条目沿用文件修改时间加默认有效期作为过期时间。原JSON文件保留不动，确认无误后可手动删除。
+
+        Args:
+            json_dir: 旧JSON缓存文件所在目录
+
+        Returns:
+            int: 导入的缓存条目数量
+        """
+        conn = self._get_connection()
+        if conn.execute("SELECT value FROM cache_meta WHERE key = 'json_migrated'").fetchone():
+            return 0
+
+        rows = []
+        if os.path.isdir(json_dir):
+            for filename in os.listdir(json_dir):
+                match = JSON_CACHE_FILE_PATTERN.match(filename)
+                if not match:
+                    continue
+
+                file_path = os.path.join(json_dir, filename)
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        content = json.load(f)
+                    fetched_at = os.path.getmtime(file_path)
+                except Exception as e:
+                    print(f"迁移缓存文件{file_path}失败: {e}")
+                    continue
+
+                expires_at = fetched_at + self.default_ttl if self.default_ttl is not None else None
+                if _is_json_envelope(content):
+                    expires_at = content.get("expires_at")
+                    content = content.get("data")
+
+                rows.append((
+                    match.group("metric"),
+                    match.group("date"),
+                    json.dumps(content, ensure_ascii=False, separators=(",", ":")),
+                    fetched_at,
+                    expires_at
+                ))
+
+        with conn:
+            # 已存在的数据库条目比旧文件更新，不覆盖
+            conn.executemany(
+                "INSERT OR IGNORE INTO cache_entries (metric, date, data, fetched_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_meta (key, value) VALUES ('json_migrated', ?)",
+                (str(time.time()),)
+            )
+
+        if rows:
+            print(f"已将{len(rows)}个JSON缓存文件迁移到{self.db_path}")
+        return len(rows)
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections = []
+        self._local = threading.local()
+
+
+class MemoryCacheStore(CacheStore):
+    """
+    进程内的LRU缓存，按条目数量和（可选的）估算字节数限制容量
+
+    返回的数据对象在多次读取之间共享，调用方不应修改。
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 0,
+                 on_evict: Optional[Callable[[str, str], None]] = None,
+                 max_age: Optional[float] = None):
+        """
+        初始化内存缓存
+
+        Args:
+            max_entries: 最多保留的条目数量
+            max_bytes: 按JSON序列化长度估算的最大字节数，0表示不限制
+            on_evict: 条目被淘汰时的回调，参数为 (指标, 日期)
+            max_age: 条目写入内存后的最长保留时间（秒），超过后视为未命中，None表示不限制
+        """
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.max_age = max_age
+        self._entries = OrderedDict()  # (指标, 日期) -> (CacheEntry, 估算字节数, 写入时间)
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_entries(self, metric: str, date_strs: Iterable[str],
+                    include_expired: bool = False) -> Dict[str, CacheEntry]:
+        result = {}
+        now = time.time()
+        with self._lock:
+            for date_str in date_strs:
+                key = (metric, date_str)
+                item = self._entries.get(key)
+                if item is None:
+                    self.misses += 1
+                    continue
+
+                entry, size, stored_at = item
+                stale = self.max_age is not None and now - stored_at > self.max_age
+                if stale or (not include_expired and entry.expires_at is not None and entry.expires_at <= now):
+                    # 已过期或在内存中保留过久的条目直接移除（其他进程可能已更新磁盘缓存）
+                    del self._entries[key]
+                    self._total_bytes -= size
+                    self.misses += 1
+                    continue
+
+                self._entries.move_to_end(key)
+                self.hits += 1
+                result[date_str] = entry
+        return result
+
+    def put_entries(self, metric: str, entries: Dict[str, CacheEntry]):
+        evicted = []
+        now = time.time()
+        with self._lock:
+            for date_str, entry in entries.items():
+                key = (metric, date_str)
+                size = len(json.dumps(entry.data, ensure_ascii=False)) if self.max_bytes else 0
+
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self._total_bytes -= old[1]
+                self._entries[key] = (entry, size, now)
+                self._total_bytes += size
+
+            # 淘汰最久未使用的条目
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes and self._total_bytes > self.max_bytes and len(self._entries) > 1)
+            ):
+                key, (_, size, _) = self._entries.popitem(last=False)
+                self._total_bytes -= size
+                self.evictions += 1
+                evicted.append(key)
+
+        if self.on_evict:
+            for metric_name, date_str in evicted:
+                self.on_evict(metric_name, date_str)
+
+    def clear(self):
+        """
+        清空内存缓存
+        """
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取内存缓存的统计信息
+
+        Returns:
+            Dict[str, Any]: 条目数量、估算字节数、命中、未命中和淘汰次数
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0
+            }
+
+
+class TieredCacheStore(CacheStore):
+    """
+    两级缓存：内存LRU在前，磁盘缓存在后
+
+    读取时先查内存，未命中再查磁盘并回填内存；写入时同时写入两级。
+    """
+
+    def __init__(self, memory: MemoryCacheStore, disk: CacheStore):
+        """
+        初始化两级缓存
+
+        Args:
+            memory: 内存缓存
+            disk: 磁盘缓存
+        """
+        self.memory = memory
+        self.disk = disk
+
+    def get_entries(self, metric: str, date_strs: Iterable[str],
+                    include_expired: bool = False) -> Dict[str, CacheEntry]:
+        date_strs = list(date_strs)
+        if include_expired:
+            # 过期条目只可能完整保留在磁盘缓存中
+            return self.disk.get_entries(metric, date_strs, include_expired=True)
+
+        result = self.memory.get_entries(metric, date_strs)
+
+        missing = [date_str for date_str in date_strs if date_str not in result]
+        if missing:
+            disk_entries = self.disk.get_entries(metric, missing)
+            if disk_entries:
+                # 回填内存缓存，保留磁盘中的过期时间
+                self.memory.put_entries(metric, disk_entries)
+                result.update(disk_entries)
+        return result
+
+    def put_entries(self, metric: str, entries: Dict[str, CacheEntry]):
+        self.disk.put_entries(metric, entries)
+        self.memory.put_entries(metric, entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取内存缓存的统计信息
+
+        Returns:
+            Dict[str, Any]: 内存缓存统计
+        """
+        return self.memory.stats()
+
+    def close(self):
+        self.memory.clear()
+        self.disk.close()
+
+
+def create_cache_store(backend: str, cache_dir: str, default_ttl: Optional[float] = 3600,
+                       memory_entries: int = 0, memory_bytes: int = 0,
+                       on_evict: Optional[Callable[[str, str], None]] = None,
+                       memory_max_age: Optional[float] = None) -> CacheStore:
+    """
+    根据配置创建缓存后端
+
+    Args:
+        backend: 缓存后端类型：sqlite或json
+        cache_dir: 缓存目录
+        default_ttl: 默认有效期（秒）
+        memory_entries: 内存LRU缓存的最大条目数，0表示不使用内存缓存
+        memory_bytes: 内存LRU缓存的最大估算字节数，0表示不限制
+        on_evict: 内存缓存淘汰条目时的回调
+        memory_max_age: 内存缓存条目的最长保留时间（秒），超过后重新读取磁盘缓存，None表示不限制
+
+    Returns:
+        CacheStore: 缓存后端实例
+    """
+    if backend == 'json':
+        store = JsonFileCacheStore(cache_dir, default_ttl)
+    else:
+        if backend != 'sqlite':
+            print(f"未知的缓存后端: {backend}，使用SQLite缓存作为默认值")
+        store = SQLiteCacheStore(os.path.join(cache_dir, 'garmin_cache.db'), default_ttl)
+        store.migrate_json_files(cache_dir)
+
+    if memory_entries > 0:
+        return TieredCacheStore(MemoryCacheStore(memory_entries, memory_bytes, on_evict, memory_max_age), store)
+    return store
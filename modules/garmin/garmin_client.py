@@ -1,9 +1,15 @@
 from typing import Dict, Any, List, Optional
-import json
 import os
 from ..utils import dict_utils
-from ..utils.dict_utils import print_unique_keys
+from ..utils.single_flight import SingleFlight, single_flight
+from ..utils.rate_limiter import get_rate_limiter
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from .cache_store import create_cache_store, CacheEntry, ENTRY_DATA, ENTRY_EMPTY, ENTRY_ERROR
+from .timeseries import np, TimeSeries, TimeSeriesStore, series_from_pairs, series_from_records, METRIC_SCALES
+from .stress import summarize_stress
+from .sleep import empty_sleep_summary, summarize_sleep, reduce_sleep_nights
+import threading
 import time
 
 # 导入garminconnect库
@@ -14,7 +20,10 @@ try:
         GarminConnectTooManyRequestsError,
         GarminConnectAuthenticationError
     )
+    # 表示被Garmin限流的异常
+    THROTTLE_ERRORS = (GarminConnectTooManyRequestsError,)
 except ImportError:
+    THROTTLE_ERRORS = ()
     print("请安装python-garminconnect库: pip install garminconnect")
 
 class GarminClient:
@@ -33,51 +42,132 @@ class GarminClient:
         self.password = config.get('password')
         self.use_proxy = config.get('use_proxy', False)
         self.proxy = config.get('proxy', '')
-        self.cache_ttl = config.get('cache_ttl', 3600)  # 缓存有效期，默认1小时
+        self.cache_ttl = config.get('cache_ttl', 3600)  # 当天数据的缓存有效期，默认1小时
+        self.cache_ttl_yesterday = config.get('cache_ttl_yesterday', 6 * 3600)  # 昨天数据可能延迟同步，默认6小时
+        self.cache_immutable_after_days = config.get('cache_immutable_after_days', 2)  # 超过该天数的历史数据永不过期
+        self.error_cache_ttl = config.get('error_cache_ttl', 60)  # 请求失败后的初始退避时间
+        self.error_cache_max_ttl = config.get('error_cache_max_ttl', 3600)  # 连续失败时的最长退避时间
         self.is_cn = True
+        # 并发获取配置
+        self.concurrent_fetch = config.get('concurrent_fetch', True)
+        self.max_workers = max(1, int(config.get('max_workers', 5)))
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        # 合并相同参数的并发请求（例如仪表盘同时请求同一日期范围）
+        self._single_flight = SingleFlight()
+        # 所有Garmin API调用经过限流器，同一账号在进程内共用
+        self.rate_limiter = get_rate_limiter(f"garmin:{self.email}", config.get('rate_limit') or {})
         # 缓存目录
         self.cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'cache')
         os.makedirs(self.cache_dir, exist_ok=True)
+        # 缓存后端：sqlite（默认）或json
+        self.cache_backend = config.get('cache_backend', 'sqlite')
+        # 进程内LRU缓存位于磁盘缓存之前，0表示不使用
+        self.memory_cache_entries = config.get('memory_cache_entries', 4096)
+        self.memory_cache_bytes = config.get('memory_cache_bytes', 0)
+        # 内存缓存条目的最长保留时间，超过后重新读取磁盘缓存，以发现其他进程（如 --sync）的更新
+        self.memory_cache_max_age = config.get('memory_cache_max_age', 60)
+        # 按指标统计内存缓存淘汰的条目数
+        self._evictions = {}
+        self._evictions_lock = threading.Lock()
+        self.cache_store = create_cache_store(
+            self.cache_backend,
+            self.cache_dir,
+            self.cache_ttl,
+            memory_entries=self.memory_cache_entries,
+            memory_bytes=self.memory_cache_bytes,
+            on_evict=self._on_cache_evict,
+            memory_max_age=self.memory_cache_max_age
+        )
+        # 日内时间序列（心率、压力、步数、睡眠级别等）以NumPy数组保存，需要安装numpy
+        self.store_timeseries = config.get('store_timeseries', True) and np is not None
+        self.timeseries_store = TimeSeriesStore(os.path.join(self.cache_dir, 'timeseries')) if self.store_timeseries else None
+        # 登录令牌存储目录，用于跨进程复用会话
+        self.token_store = config.get('token_store') or os.path.join(self.cache_dir, 'garmin_tokens')
         
-        # 初始化Garmin API客户端
-        self.client = None
-        self._init_client()
+        # 登录失败后在该时间（秒）内不再尝试登录，连续失败时按指数增长
+        self.login_retry_interval = config.get('login_retry_interval', 60)
+        self.login_retry_max_interval = config.get('login_retry_max_interval', 3600)
+        
+        # Garmin API客户端在首次访问数据时才登录
+        self._client = None
+        self._login_failures = 0
+        self._login_retry_at = 0.0
+        self._login_lock = threading.Lock()
+    
+    @property
+    def client(self):
+        """
+        Garmin API客户端，首次访问时恢复会话或登录
+        
+        登录失败后的退避时间内直接返回None，不在每次访问时重复登录；退避结束后再次尝试登录。
+        
+        Returns:
+            Garmin API客户端，登录失败时返回None
+        """
+        if self._client is None and time.monotonic() >= self._login_retry_at:
+            with self._login_lock:
+                if self._client is None and time.monotonic() >= self._login_retry_at:
+                    self._init_client()
+                    if self._client is None:
+                        self._login_failures += 1
+                        backoff = min(self.login_retry_max_interval,
+                                      self.login_retry_interval * (2 ** (self._login_failures - 1)))
+                        self._login_retry_at = time.monotonic() + backoff
+                        print(f"Garmin Connect登录失败，{backoff}秒后再次尝试登录")
+                    else:
+                        self._login_failures = 0
+        return self._client
+    
+    def _create_garmin(self):
+        """
+        创建Garmin API客户端实例
+        
+        Returns:
+            Garmin: 未登录的Garmin API客户端
+        """
+        # 设置代理
+        if self.use_proxy and self.proxy:
+            proxies = {
+                "https": self.proxy
+            }
+            return Garmin(self.email, self.password, self.is_cn, proxies=proxies)
+        return Garmin(self.email, self.password, self.is_cn)
     
     def _init_client(self):
         """
-        初始化Garmin API客户端，包含重试逻辑
+        初始化Garmin API客户端，优先从令牌存储恢复会话，失败时使用账号密码登录（包含重试逻辑）
         """
+        if self._resume_session():
+            return
+        
         max_retries = 3
         retry_delay = 2  # 初始延迟2秒
         
         for attempt in range(1, max_retries + 1):
             try:
-                # 设置代理
-                if self.use_proxy and self.proxy:
-                    proxies = {
-                        "https": self.proxy
-                    }
-                    self.client = Garmin(self.email, self.password, True, proxies=proxies)
-                else:
-                    self.client = Garmin(self.email, self.password, True)
+                client = self._create_garmin()
                     
                 # 尝试登录
                 print(f"尝试Garmin Connect登录 (尝试 {attempt}/{max_retries})...")
-                self.client.login()
+                self.rate_limiter.acquire()
+                client.login()
                 print("Garmin Connect登录成功")
+                self._client = client
+                self._save_tokens()
                 return  # 登录成功，退出函数
                 
             except GarminConnectTooManyRequestsError as e:
-                # 请求过多，需要等待
-                wait_time = retry_delay * attempt
-                print(f"Garmin Connect请求过多，等待{wait_time}秒后重试: {e}")
+                # 请求过多，限流器降速并退避，其他线程的数据请求也会一起暂停
+                wait_time = self.rate_limiter.on_throttled()
+                print(f"Garmin Connect请求过多，等待{wait_time:.1f}秒后重试: {e}")
                 time.sleep(wait_time)
                 
             except GarminConnectAuthenticationError as e:
                 # 认证错误，检查凭据
                 print(f"Garmin Connect认证失败，请检查用户名和密码: {e}")
                 print("提示: 请确认config.yaml中的garmin.email和garmin.password是否正确")
-                self.client = None
+                self._client = None
                 return  # 认证错误，不再重试
                 
             except GarminConnectConnectionError as e:
@@ -89,87 +179,285 @@ class GarminClient:
                     time.sleep(wait_time)
                 else:
                     print("已达到最大重试次数，放弃连接")
-                    self.client = None
+                    self._client = None
                     
             except Exception as e:
                 # 其他未预期的错误
                 print(f"Garmin Connect连接遇到未知错误: {e}")
-                self.client = None
+                self._client = None
                 return  # 未知错误，不再重试
         
         # 如果所有重试都失败
-        if self.client is None:
+        if self._client is None:
             print("所有Garmin Connect连接尝试均失败")
             print("提示: 请检查网络连接和代理设置，或稍后再试")
     
-    def _get_cache_path(self, cache_key: str) -> str:
+    def _resume_session(self) -> bool:
+        """
+        从令牌存储恢复Garmin Connect会话，过期的访问令牌由garminconnect库自动刷新
+        
+        Returns:
+            bool: 是否成功恢复会话
+        """
+        if not os.path.isdir(self.token_store) or not os.listdir(self.token_store):
+            return False
+        
+        try:
+            client = self._create_garmin()
+            client.login(self.token_store)
+            self._client = client
+            # 恢复过程中令牌可能已被刷新，写回令牌存储
+            self._save_tokens()
+            print("已从令牌存储恢复Garmin Connect会话")
+            return True
+        except Exception as e:
+            print(f"恢复Garmin Connect会话失败，将使用账号密码重新登录: {e}")
+            return False
+    
+    def _save_tokens(self):
+        """
+        将当前会话令牌保存到令牌存储
+        """
+        # 旧版garminconnect通过garth管理令牌，新版使用内置的client
+        token_client = getattr(self._client, 'garth', None) or getattr(self._client, 'client', None)
+        if token_client is None or not hasattr(token_client, 'dump'):
+            return
+        
+        try:
+            os.makedirs(self.token_store, exist_ok=True)
+            token_client.dump(self.token_store)
+        except Exception as e:
+            print(f"保存Garmin登录令牌失败: {e}")
+    
+    def _call(self, method: str, *args, **kwargs) -> Any:
         """
-        获取缓存文件路径
+        通过限流器调用Garmin API，被限流时自动降速、退避并重试
         
         Args:
-            cache_key: 缓存键名
+            method: garminconnect客户端的方法名
+            *args: 位置参数
+            **kwargs: 关键字参数
             
         Returns:
-            str: 缓存文件路径
+            Any: API返回值
         """
-        return os.path.join(self.cache_dir, f"{cache_key}.json")
+        return self.rate_limiter.call(getattr(self.client, method), *args, throttle_errors=THROTTLE_ERRORS, **kwargs)
     
-    def _get_from_cache(self, cache_key: str) -> Optional[Dict[str, Any]]:
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """
+        获取客户端共享的线程池，首次使用时创建
+        
+        Returns:
+            ThreadPoolExecutor: 有界线程池
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="garmin"
+                )
+            return self._executor
+    
+    def close(self):
+        """
+        关闭共享线程池和缓存后端
+        """
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        self.cache_store.close()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存的统计信息（内存缓存的条目数、命中率、淘汰次数等），以及请求合并和限流的统计
+        
+        Returns:
+            Dict[str, Any]: 缓存统计，未启用内存缓存时只包含按指标的淘汰次数、请求合并和限流统计
+        """
+        stats = self.cache_store.stats() if hasattr(self.cache_store, 'stats') else {}
+        with self._evictions_lock:
+            stats["evictions_by_metric"] = dict(self._evictions)
+        stats["single_flight"] = self._single_flight.stats()
+        stats["rate_limiter"] = self.rate_limiter.stats()
+        return stats
+    
+    def _on_cache_evict(self, metric: str, date_str: str):
+        """
+        内存缓存淘汰条目时按指标计数，容量设置过小时可从 get_cache_stats 中看出哪些指标被频繁淘汰
+        
+        Args:
+            metric: 指标名称
+            date_str: 日期字符串
+        """
+        with self._evictions_lock:
+            self._evictions[metric] = self._evictions.get(metric, 0) + 1
+    
+    def _get_from_cache(self, metric: str, date_str: str) -> Optional[Any]:
         """
         从缓存获取数据
         
         Args:
-            cache_key: 缓存键名
+            metric: 指标名称
+            date_str: 日期字符串
             
         Returns:
-            Optional[Dict[str, Any]]: 缓存数据，如果缓存不存在或已过期则返回None
+            Optional[Any]: 缓存数据，如果缓存不存在或已过期则返回None
         """
-        cache_path = self._get_cache_path(cache_key)
+        return self.cache_store.get(metric, date_str)
+    
+    def _get_many_from_cache(self, metric: str, date_strs: List[str]) -> Dict[str, Any]:
+        """
+        批量从缓存获取同一指标多个日期的数据
         
-        # 检查缓存文件是否存在
-        if not os.path.exists(cache_path):
-            return None
+        Args:
+            metric: 指标名称
+            date_strs: 日期字符串列表
+            
+        Returns:
+            Dict[str, Any]: 日期到缓存数据的映射，只包含命中的日期
+        """
+        return self.cache_store.get_many(metric, date_strs)
+    
+    def _save_to_cache(self, metric: str, date_str: str, data: Any):
+        """
+        保存数据到缓存，空结果（如没有活动、没有称重）作为无数据条目同样缓存
         
-        # 检查缓存是否过期
-        file_mtime = os.path.getmtime(cache_path)
-        if time.time() - file_mtime > self.cache_ttl:
-            return None
+        Args:
+            metric: 指标名称
+            date_str: 日期字符串
+            data: 要缓存的数据
+        """
+        self._save_many_to_cache(metric, {date_str: data})
+    
+    def _save_many_to_cache(self, metric: str, items: Dict[str, Any]):
+        """
+        批量保存同一指标多个日期的数据到缓存
+        
+        Args:
+            metric: 指标名称
+            items: 日期到数据的映射
+        """
+        # 按有效期和条目类型分组写入
+        groups = {}
+        for date_str, data in items.items():
+            kind = ENTRY_DATA if data else ENTRY_EMPTY
+            groups.setdefault((self._get_cache_ttl(date_str), kind), {})[date_str] = data
+        for (ttl, kind), group in groups.items():
+            self.cache_store.put_many(metric, group, ttl, kind)
+    
+    def _handle_fetch_error(self, metric: str, date_strs: List[str], default_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        记录请求失败的日期，在退避时间内不再请求Garmin
+        
+        连续失败时退避时间按指数增长。如果之前有过期的缓存数据，失败期间继续返回旧数据，否则返回默认数据。
+        
+        Args:
+            metric: 指标名称
+            date_strs: 请求失败的日期字符串列表
+            default_data: 日期到默认数据的映射
+            
+        Returns:
+            Dict[str, Any]: 日期到失败期间返回数据的映射
+        """
+        previous = self.cache_store.get_entries(metric, date_strs, include_expired=True)
+        now = time.time()
+        
+        entries = {}
+        for date_str in date_strs:
+            data = default_data.get(date_str)
+            error_count = 1
+            
+            old_entry = previous.get(date_str)
+            if old_entry is not None:
+                if old_entry.kind == ENTRY_ERROR:
+                    error_count = old_entry.error_count + 1
+                # 保留之前的数据（可能是过期的正常数据）
+                data = old_entry.data
+            
+            backoff = min(self.error_cache_ttl * (2 ** (error_count - 1)), self.error_cache_max_ttl)
+            entries[date_str] = CacheEntry(data, now + backoff, ENTRY_ERROR, error_count)
+        
+        self.cache_store.put_entries(metric, entries)
+        return {date_str: entry.data for date_str, entry in entries.items()}
+    
+    def _get_cache_ttl(self, date_str: str) -> Optional[float]:
+        """
+        根据数据日期的新旧程度确定缓存有效期
+        
+        当天的数据仍在变化，使用较短的有效期；昨天的数据可能因手表延迟同步而更新，使用中等有效期；
+        更早的数据已不会再变化，永不过期。
         
-        # 读取缓存
+        Args:
+            date_str: 日期字符串
+            
+        Returns:
+            Optional[float]: 有效期（秒），None表示永不过期
+        """
         try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"读取缓存失败: {e}")
-            return None
+            day = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            return self.cache_ttl
+        
+        age_days = (datetime.now().date() - day).days
+        if age_days <= 0:
+            return self.cache_ttl
+        if age_days < self.cache_immutable_after_days:
+            return self.cache_ttl_yesterday
+        return None
     
-    def _save_to_cache(self, cache_key: str, data: Dict[str, Any]):
+    def _store_series(self, metric: str, date_str: str, parse, *args, **kwargs):
         """
-        保存数据到缓存
+        解析并保存某一天的日内时间序列，未启用时间序列存储时直接跳过
         
         Args:
-            cache_key: 缓存键名
-            data: 要缓存的数据
+            metric: 时间序列名称
+            date_str: 日期字符串
+            parse: 解析函数，series_from_pairs 或 series_from_records
+            *args: 传给解析函数的参数
+            **kwargs: 传给解析函数的关键字参数
         """
-        cache_path = self._get_cache_path(cache_key)
+        if self.timeseries_store is None:
+            return
         
         try:
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self.timeseries_store.save(metric, date_str, parse(*args, **kwargs))
         except Exception as e:
-            print(f"保存缓存失败: {e}")
+            print(f"保存{metric}时间序列失败: {e}")
+    
+    def get_timeseries(self, metric: str, start_date: datetime, end_date: Optional[datetime] = None) -> Optional[TimeSeries]:
+        """
+        读取已保存的日内时间序列
+        
+        时间序列在对应的获取方法（如get_heart_rate）从Garmin拉取数据时写入，
+        可用的指标有 heart_rate、stress、body_battery、steps、sleep_levels、sleep_movement、respiration。
+        
+        Args:
+            metric: 时间序列名称
+            start_date: 开始日期
+            end_date: 结束日期（包含），默认与开始日期相同
+            
+        Returns:
+            Optional[TimeSeries]: 按日期拼接的时间序列，未启用或没有数据时返回None
+        """
+        if self.timeseries_store is None:
+            return None
+        
+        end_date = end_date or start_date
+        return self.timeseries_store.load_range(metric, start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
     
+    @single_flight
     def get_steps_data(self, date: Optional[datetime] = None) -> Dict[str, Any]:
         # 设置默认日期为今天
         if date is None:
             date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         
         date_str = date.strftime("%Y-%m-%d")
-        cache_key = f"steps_{date_str}"
+        cache_metric = "steps"
         
         # 尝试从缓存获取
-        cached_data = self._get_from_cache(cache_key)
-        if cached_data:
+        cached_data = self._get_from_cache(cache_metric, date_str)
+        if cached_data is not None:
             return cached_data
         
         # 如果客户端未初始化或登录失败，返回空数据
@@ -178,7 +466,7 @@ class GarminClient:
         
         try:
             # 获取步数数据
-            steps_data = self.client.get_steps_data(date.isoformat())
+            steps_data = self._call("get_steps_data", date.isoformat())
             
             # for i in steps_data:
             #     print(i)
@@ -203,6 +491,10 @@ class GarminClient:
             elif isinstance(steps_data, dict):
                 total_steps = steps_data.get("totalSteps", 0)
             
+            # 保存分时段步数
+            if isinstance(steps_data, list):
+                self._store_series("steps", date_str, series_from_records, steps_data, "startGMT", "steps", end_key="endGMT")
+            
             result = {
                 "date": date_str, 
                 "steps": total_steps,
@@ -210,25 +502,27 @@ class GarminClient:
             }
             
             # 保存到缓存
-            self._save_to_cache(cache_key, result)
+            self._save_to_cache(cache_metric, date_str, result)
             
             return result
         
         except Exception as e:
             print(f"获取步数数据失败: {e}")
-            return {"date": date_str, "steps": 0}
+            default_data = {"date": date_str, "steps": 0}
+            return self._handle_fetch_error(cache_metric, [date_str], {date_str: default_data})[date_str]
     
+    @single_flight
     def get_heart_rate(self, date: Optional[datetime] = None) -> Dict[str, Any]:
         # 设置默认日期为今天
         if date is None:
             date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         
         date_str = date.strftime("%Y-%m-%d")
-        cache_key = f"heart_rate_{date_str}"
+        cache_metric = "heart_rate"
         
         # 尝试从缓存获取
-        cached_data = self._get_from_cache(cache_key)
-        if cached_data:
+        cached_data = self._get_from_cache(cache_metric, date_str)
+        if cached_data is not None:
             return cached_data
         
         # 如果客户端未初始化或登录失败，返回空数据
@@ -237,7 +531,7 @@ class GarminClient:
         
         try:
             # 获取心率数据
-            heart_rate_data = self.client.get_heart_rates(date.isoformat())
+            heart_rate_data = self._call("get_heart_rates", date.isoformat())
             
             # 初始化结果
             result = {
@@ -253,7 +547,7 @@ class GarminClient:
                 
                 # 如果有详细心率数据，计算最大和最小值
                 heart_rate_values = []
-                for item in heart_rate_data.get("heartRateValues", []):
+                for item in heart_rate_data.get("heartRateValues") or []:
                     if isinstance(item, (list, tuple)) and len(item) >= 2:
                         value = item[1]
                         if isinstance(value, (int, float)) and value > 0:
@@ -262,16 +556,21 @@ class GarminClient:
                 if heart_rate_values:
                     result["min"] = min(heart_rate_values)
                     result["max"] = max(heart_rate_values)
+                
+                # 保存逐分钟心率
+                self._store_series("heart_rate", date_str, series_from_pairs, heart_rate_data.get("heartRateValues"))
             
             # 保存到缓存
-            self._save_to_cache(cache_key, result)
+            self._save_to_cache(cache_metric, date_str, result)
             
             return result
         
         except Exception as e:
             print(f"获取心率数据失败: {e}")
-            return {"date": date_str, "avg": 0, "min": 0, "max": 0}
+            default_data = {"date": date_str, "avg": 0, "min": 0, "max": 0}
+            return self._handle_fetch_error(cache_metric, [date_str], {date_str: default_data})[date_str]
     
+    @single_flight
     def get_sleep_data(self, date: Optional[datetime] = None) -> Dict[str, Any]:
         """
         获取指定日期的睡眠数据
@@ -287,25 +586,24 @@ class GarminClient:
             date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         
         date_str = date.strftime("%Y-%m-%d")
-        cache_key = f"sleep_{date_str}"
+        cache_metric = "sleep"
         
-        # 尝试从缓存获取
-        cached_data = self._get_from_cache(cache_key)
-        if cached_data:
+        # 尝试从缓存获取，没有睡眠汇总字段（efficiency）的旧缓存记录重新获取
+        cached_data = self._get_from_cache(cache_metric, date_str)
+        if cached_data is not None and "efficiency" in cached_data:
             return cached_data
         
         # 如果客户端未初始化或登录失败，返回空数据
+        default_data = {"date": date_str, **empty_sleep_summary()}
         if not self.client:
-            return {"date": date_str, "duration": 0, "deep": 0, "light": 0, "rem": 0, "awake": 0}
+            return default_data
         
         try:
             # 转换日期格式为YYYY-MM-DD
             api_date = date.strftime("%Y-%m-%d")
-            print(api_date)
-            sleep_data = self.client.get_sleep_data(api_date)
-            print_unique_keys(sleep_data)
+            sleep_data = self._call("get_sleep_data", api_date)
 
-#Print to find what can be extract from garmin api
+# Garmin睡眠接口返回的字段
 # - remSleepData
 # - sleepHeartRate
 # - sleepMovement
@@ -319,18 +617,10 @@ class GarminClient:
 # - bodyBatteryChange
 # - dailySleepDTO
 # - sleepBodyBattery
-            # for i,j in sleep_data.items():
-            #     if i == "sleepLevels":
-            #         print(i,j)
-
 
             result = {
                 "date": date_str,
-                "duration": 0,
-                "deep": 0,
-                "light": 0,
-                "rem": 0,
-                "awake": 0,
+                **empty_sleep_summary(),
                 "heart_rate": {"avg": 0, "min": 0, "max": 0},
                 "stress": 0,
                 "body_battery": {"start": 0, "end": 0, "change": 0},
@@ -347,22 +637,39 @@ class GarminClient:
             
             # 处理睡眠数据
             if isinstance(sleep_data, dict):
-                # 填充睡眠移动数据
-                if "sleepMovement" in sleep_data:
-                    result["sleep_movement"] = sleep_data["sleepMovement"]
+                # 由睡眠级别区间计算各阶段时长、睡眠效率和入睡后清醒时长
+                levels_arrays = None
+                if np is not None:
+                    levels_arrays = series_from_records(sleep_data.get("sleepLevels"), "startGMT", "activityLevel", end_key="endGMT")
+                result.update(summarize_sleep(TimeSeries.from_arrays(levels_arrays), sleep_data.get("dailySleepDTO")))
+                
+                # 睡眠移动、睡眠级别和呼吸数据保存为时间序列，未启用时间序列存储时保留原始列表
+                if self.timeseries_store is not None:
+                    self._store_series("sleep_movement", date_str, series_from_records, sleep_data.get("sleepMovement"),
+                                       "startGMT", "activityLevel", end_key="endGMT", scale=METRIC_SCALES["sleep_movement"])
+                    self._store_series("sleep_levels", date_str, lambda: levels_arrays)
+                    self._store_series("respiration", date_str, series_from_records,
+                                       sleep_data.get("wellnessEpochRespirationDataDTOList"),
+                                       "startTimeGMT", "respirationValue", scale=METRIC_SCALES["respiration"])
+                    for key in ("sleep_movement", "sleep_levels", "respiration_data"):
+                        result.pop(key)
+                else:
+                    # 填充睡眠移动数据
+                    if "sleepMovement" in sleep_data:
+                        result["sleep_movement"] = sleep_data["sleepMovement"]
+                    
+                    # 填充睡眠级别数据
+                    if "sleepLevels" in sleep_data:
+                        result["sleep_levels"] = sleep_data["sleepLevels"]
+                    
+                    # 填充呼吸数据
+                    if "wellnessEpochRespirationDataDTOList" in sleep_data:
+                        result["respiration_data"] = sleep_data["wellnessEpochRespirationDataDTOList"]
                 
                 # 填充REM睡眠数据
                 if "remSleepData" in sleep_data:
                     result["rem_sleep_data"] = sleep_data["remSleepData"]
                 
-                # 填充睡眠级别数据
-                if "sleepLevels" in sleep_data:
-                    result["sleep_levels"] = sleep_data["sleepLevels"]
-                
-                # 填充呼吸数据
-                if "wellnessEpochRespirationDataDTOList" in sleep_data:
-                    result["respiration_data"] = sleep_data["wellnessEpochRespirationDataDTOList"]
-                
                 # 填充呼吸平均值数据
                 if "wellnessEpochRespirationAveragesList" in sleep_data:
                     result["respiration_averages"] = sleep_data["wellnessEpochRespirationAveragesList"]
@@ -390,7 +697,7 @@ class GarminClient:
                 
 
             # 保存到缓存
-            self._save_to_cache(cache_key, result)
+            self._save_to_cache(cache_metric, date_str, result)
             
             return result
         
@@ -398,8 +705,37 @@ class GarminClient:
             print(f"获取睡眠数据失败: {e}")
 
             # 返回默认睡眠数据结构
-            return {"date": date_str, "duration": 0, "deep": 0, "light": 0, "rem": 0, "awake": 0}
+            return self._handle_fetch_error(cache_metric, [date_str], {date_str: default_data})[date_str]
     
+    @single_flight
+    def get_sleep_range(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """
+        获取日期范围内每晚的睡眠汇总以及整个范围的平均值
+        
+        每晚的汇总在首次获取时计算并缓存，周期汇总只是对这些记录的简单归约。
+        
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            
+        Returns:
+            Dict[str, Any]: 每晚的睡眠数据（nights）以及各项平均值
+        """
+        days = self._iter_dates(start_date, end_date)
+        if self.concurrent_fetch and len(days) > 1:
+            executor = self._get_executor()
+            nights = [future.result() for future in [executor.submit(self.get_sleep_data, day) for day in days]]
+        else:
+            nights = [self.get_sleep_data(day) for day in days]
+        
+        return {
+            "start_date": start_date.strftime("%Y-%m-%d"),
+            "end_date": end_date.strftime("%Y-%m-%d"),
+            **reduce_sleep_nights(nights),
+            "nights": nights
+        }
+    
+    @single_flight
     def get_activities(self, date: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """
         获取指定日期的活动数据
@@ -415,11 +751,11 @@ class GarminClient:
             date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         
         date_str = date.strftime("%Y-%m-%d")
-        cache_key = f"activities_{date_str}"
+        cache_metric = "activities"
         
         # 尝试从缓存获取
-        cached_data = self._get_from_cache(cache_key)
-        if cached_data:
+        cached_data = self._get_from_cache(cache_metric, date_str)
+        if cached_data is not None:
             return cached_data
         
         # 如果客户端未初始化或登录失败，返回空列表
@@ -428,36 +764,145 @@ class GarminClient:
         
         try:
             # 获取活动数据
-            activities = self.client.get_activities_by_date(date.isoformat(), date.isoformat())
+            activities = self._call("get_activities_by_date", date.isoformat(), date.isoformat())
             
             # for i in activities:
             #     print(i)
 
             # 提取活动信息
-            result = []
-            for activity in activities:
-                # 提取活动类型、时长和消耗的卡路里
-                activity_type = activity.get("activityType", {}).get("typeKey", "未知")
-                duration_minutes = activity.get("duration", 0) / 60  # 转换为分钟
-                calories = activity.get("calories", 0)
-                distance = activity.get("distance", 0) / 1000  # 转换为公里
-                
-                result.append({
-                    "type": activity_type,
-                    "duration": round(duration_minutes, 1),
-                    "calories": calories,
-                    "distance": round(distance, 2)
-                })
+            result = [self._parse_activity(activity) for activity in activities]
             
             # 保存到缓存
-            self._save_to_cache(cache_key, result)
+            self._save_to_cache(cache_metric, date_str, result)
             
             return result
         
         except Exception as e:
             print(f"获取活动数据失败: {e}")
-            return []
+            return self._handle_fetch_error(cache_metric, [date_str], {date_str: []})[date_str]
+    
+    def _parse_activity(self, activity: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        从Garmin原始活动记录中提取活动信息
+        
+        Args:
+            activity: Garmin返回的单条活动记录
+            
+        Returns:
+            Dict[str, Any]: 活动类型、时长（分钟）、卡路里和距离（公里）
+        """
+        # 提取活动类型、时长和消耗的卡路里
+        activity_type = (activity.get("activityType") or {}).get("typeKey", "未知")
+        duration_minutes = (activity.get("duration") or 0) / 60  # 转换为分钟
+        calories = activity.get("calories", 0)
+        distance = (activity.get("distance") or 0) / 1000  # 转换为公里
+        
+        return {
+            "type": activity_type,
+            "duration": round(duration_minutes, 1),
+            "calories": calories,
+            "distance": round(distance, 2)
+        }
+    
+    @single_flight
+    def get_activities_range(self, start_date: datetime, end_date: datetime) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        获取日期范围内的活动数据，使用区间接口一次请求整个范围，再按天拆分并写入每日缓存
+        
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: 日期字符串到当天活动列表的映射
+        """
+        date_strs = [day.strftime("%Y-%m-%d") for day in self._iter_dates(start_date, end_date)]
+        
+        # 先从缓存批量读取，只对缺失的日期发起请求
+        result = self._get_many_from_cache("activities", date_strs)
+        missing = [date_str for date_str in date_strs if date_str not in result]
+        
+        if not missing:
+            return result
+        
+        # 如果客户端未初始化或登录失败，缺失日期返回空列表
+        if not self.client:
+            result.update({date_str: [] for date_str in missing})
+            return result
+        
+        try:
+            activities = self._call("get_activities_by_date", missing[0], missing[-1])
+        except Exception as e:
+            print(f"获取活动数据失败: {e}")
+            result.update(self._handle_fetch_error("activities", missing, {date_str: [] for date_str in missing}))
+            return result
+        
+        # 按活动开始时间（本地时间）拆分到每一天
+        per_day = {date_str: [] for date_str in missing}
+        for activity in activities or []:
+            day = str(activity.get("startTimeLocal") or "")[:10]
+            if day in per_day:
+                per_day[day].append(self._parse_activity(activity))
+        
+        self._save_many_to_cache("activities", per_day)
+        result.update(per_day)
+        
+        return result
+    
+    @single_flight
+    def _get_steps_range(self, start_date: datetime, end_date: datetime) -> Dict[str, int]:
+        """
+        获取日期范围内每天的总步数
+        
+        结果按天缓存在 daily_steps 指标下（与回填、增量同步检查的缓存指标相同），
+        缺失的日期通过每日步数区间接口一次获取
+        
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            
+        Returns:
+            Dict[str, int]: 日期字符串到当天总步数的映射
+        """
+        date_strs = [day.strftime("%Y-%m-%d") for day in self._iter_dates(start_date, end_date)]
+        
+        cached_steps = self._get_many_from_cache("daily_steps", date_strs)
+        result = {date_str: data.get("steps", 0) for date_str, data in cached_steps.items()}
+        missing = [date_str for date_str in date_strs if date_str not in result]
+        
+        if not missing:
+            return result
+        
+        # 如果客户端未初始化或登录失败，缺失日期返回0
+        if not self.client:
+            result.update({date_str: 0 for date_str in missing})
+            return result
+        
+        try:
+            daily_steps = self._call("get_daily_steps", missing[0], missing[-1])
+        except Exception as e:
+            print(f"获取每日步数数据失败: {e}")
+            default_data = {date_str: {"date": date_str, "steps": 0} for date_str in missing}
+            served = self._handle_fetch_error("daily_steps", missing, default_data)
+            result.update({date_str: data.get("steps", 0) for date_str, data in served.items()})
+            return result
+        
+        fetched = {}
+        for entry in daily_steps or []:
+            day = entry.get("calendarDate", "")
+            if day in missing:
+                fetched[day] = entry.get("totalSteps") or 0
+        
+        # 没有返回记录的日期作为无数据缓存
+        self._save_many_to_cache("daily_steps", {
+            date_str: {"date": date_str, "steps": fetched.get(date_str, 0)} for date_str in missing
+        })
+        for date_str in missing:
+            result[date_str] = fetched.get(date_str, 0)
+        
+        return result
     
+    @single_flight
     def get_daily_fitness_data(self, date: Optional[datetime] = None) -> Dict[str, Any]:
         """
         获取指定日期的综合健身数据
@@ -474,19 +919,47 @@ class GarminClient:
         
         date_str = date.strftime("%Y-%m-%d")
         
-        # 获取各项数据
-        steps_data = self.get_steps_data(date)
-        heart_rate_data = self.get_heart_rate(date)
-        sleep_data = self.get_sleep_data(date)
-        activities = self.get_activities(date)
+        # 获取各项数据，各接口互不依赖，可并发请求
+        if self.concurrent_fetch:
+            executor = self._get_executor()
+            steps_future = executor.submit(self.get_steps_data, date)
+            heart_rate_future = executor.submit(self.get_heart_rate, date)
+            sleep_future = executor.submit(self.get_sleep_data, date)
+            activities_future = executor.submit(self.get_activities, date)
+            summary_future = executor.submit(self._get_daily_summary, date_str)
+            
+            steps_data = steps_future.result()
+            heart_rate_data = heart_rate_future.result()
+            sleep_data = sleep_future.result()
+            activities = activities_future.result()
+            daily_summary = summary_future.result()
+        else:
+            steps_data = self.get_steps_data(date)
+            heart_rate_data = self.get_heart_rate(date)
+            sleep_data = self.get_sleep_data(date)
+            activities = self.get_activities(date)
+            daily_summary = self._get_daily_summary(date_str)
         
-        try:
-            # 使用client对象获取每日总结数据
-            daily_summary = self.client.get_stats(date_str)
-        except Exception as e:
-            print(f"获取每日总结数据失败: {e}")
-            daily_summary = {}
+        return self._build_daily_record(date_str, steps_data.get("steps", 0), heart_rate_data,
+                                        sleep_data, activities, daily_summary)
+    
+    def _build_daily_record(self, date_str: str, steps: int, heart_rate_data: Dict[str, Any],
+                            sleep_data: Dict[str, Any], activities: List[Dict[str, Any]],
+                            daily_summary: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        将各项数据整合为每日综合健身数据
         
+        Args:
+            date_str: 日期字符串
+            steps: 总步数
+            heart_rate_data: 心率数据
+            sleep_data: 睡眠数据
+            activities: 活动列表
+            daily_summary: 每日总结数据
+            
+        Returns:
+            Dict[str, Any]: 综合健身数据字典
+        """
         # 获取活动消耗卡路里
         activity_calories = 0
         for activity in activities:
@@ -495,7 +968,7 @@ class GarminClient:
         # 整合数据
         return {
             "date": date_str,
-            "steps": steps_data.get("steps", 0),
+            "steps": steps,
             "calories": {
                 "total": daily_summary.get("totalKilocalories", 0),  # 全天总消耗
                 "active": daily_summary.get("activeKilocalories", 0),  # 活动消耗
@@ -512,11 +985,118 @@ class GarminClient:
                 "deep": sleep_data.get("deep", 0),
                 "light": sleep_data.get("light", 0),
                 "rem": sleep_data.get("rem", 0),
-                "awake": sleep_data.get("awake", 0)
+                "awake": sleep_data.get("awake", 0),
+                "efficiency": sleep_data.get("efficiency", 0),
+                "waso": sleep_data.get("waso", 0)
             },
             "activities": activities
         }
     
+    @single_flight
+    def get_fitness_range(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+        """
+        获取日期范围内每天的综合健身数据
+        
+        活动和步数使用Garmin的区间接口一次获取，心率、睡眠和每日总结没有区间接口，
+        逐日请求（启用并发时在共享线程池中并行执行）。返回的每条记录与
+        get_daily_fitness_data 的结构相同。
+        
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            
+        Returns:
+            List[Dict[str, Any]]: 按日期排序的综合健身数据列表
+        """
+        days = self._iter_dates(start_date, end_date)
+        if not days:
+            return []
+        
+        if self.concurrent_fetch:
+            executor = self._get_executor()
+            activities_future = executor.submit(self.get_activities_range, start_date, end_date)
+            steps_future = executor.submit(self._get_steps_range, start_date, end_date)
+            day_futures = [
+                (
+                    executor.submit(self.get_heart_rate, day),
+                    executor.submit(self.get_sleep_data, day),
+                    executor.submit(self._get_daily_summary, day.strftime("%Y-%m-%d"))
+                )
+                for day in days
+            ]
+            activities_by_day = activities_future.result()
+            steps_by_day = steps_future.result()
+            per_day = [tuple(future.result() for future in futures) for futures in day_futures]
+        else:
+            activities_by_day = self.get_activities_range(start_date, end_date)
+            steps_by_day = self._get_steps_range(start_date, end_date)
+            per_day = [
+                (self.get_heart_rate(day), self.get_sleep_data(day), self._get_daily_summary(day.strftime("%Y-%m-%d")))
+                for day in days
+            ]
+        
+        result = []
+        for day, (heart_rate_data, sleep_data, daily_summary) in zip(days, per_day):
+            date_str = day.strftime("%Y-%m-%d")
+            result.append(self._build_daily_record(
+                date_str,
+                steps_by_day.get(date_str, 0),
+                heart_rate_data,
+                sleep_data,
+                activities_by_day.get(date_str, []),
+                daily_summary
+            ))
+        
+        return result
+    
+    def _iter_dates(self, start_date: datetime, end_date: datetime) -> List[datetime]:
+        """
+        生成从开始日期到结束日期（含）的每一天
+        
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            
+        Returns:
+            List[datetime]: 日期列表，类型与传入的日期一致
+        """
+        days = (end_date - start_date).days + 1
+        return [start_date + timedelta(days=i) for i in range(max(days, 0))]
+    
+    @single_flight
+    def _get_daily_summary(self, date_str: str) -> Dict[str, Any]:
+        """
+        获取指定日期的每日总结数据（总消耗、活动消耗、基础代谢等）
+        
+        Args:
+            date_str: 日期字符串，格式为YYYY-MM-DD
+            
+        Returns:
+            Dict[str, Any]: 每日总结数据，失败时返回空字典
+        """
+        cache_metric = "stats"
+        
+        # 尝试从缓存获取
+        cached_data = self._get_from_cache(cache_metric, date_str)
+        if cached_data is not None:
+            return cached_data
+        
+        # 如果客户端未初始化或登录失败，返回空数据
+        if not self.client:
+            return {}
+        
+        try:
+            # 使用client对象获取每日总结数据
+            daily_summary = self._call("get_stats", date_str) or {}
+            
+            # 保存到缓存
+            self._save_to_cache(cache_metric, date_str, daily_summary)
+            
+            return daily_summary
+        except Exception as e:
+            print(f"获取每日总结数据失败: {e}")
+            return self._handle_fetch_error(cache_metric, [date_str], {date_str: {}})[date_str]
+    
     def get_weekly_fitness_data(self, end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """
         获取一周的健身数据
@@ -534,102 +1114,151 @@ class GarminClient:
         # 计算开始日期（7天前）
         start_date = end_date - timedelta(days=6)
         
-        # 获取每天的数据
-        result = []
-        current_date = start_date
-        while current_date <= end_date:
-            daily_data = self.get_daily_fitness_data(current_date)
-            result.append(daily_data)
-            current_date += timedelta(days=1)
-        
-        return result
+        # 按区间获取每天的数据
+        return self.get_fitness_range(start_date, end_date)
 
-    def get_stress_data(self, date: Optional[datetime] = None) -> Dict[str, Any]:
+    @single_flight
+    def get_stress_data(self, date: Optional[datetime] = None, include_values: bool = True,
+                        format_time: bool = False) -> Dict[str, Any]:
         """
         获取指定日期的压力数据
         
+        缓存中只保存统计信息，逐点压力值保存在时间序列存储中；未启用时间序列存储时，
+        需要逐点压力值的调用不使用缓存，重新请求Garmin。
+        
         Args:
             date: 日期，默认为今天
+            include_values: 是否返回逐点压力值（values字段），只需要统计信息时传False
+            format_time: 返回逐点压力值时是否附加格式化的时间字符串，只在需要显示时传True
             
         Returns:
-            Dict[str, Any]: 压力数据字典，包含时间序列和统计信息
+            Dict[str, Any]: 压力数据字典，包含逐点压力值、统计信息、各压力等级时长（分钟）和身体电量变化；
+                未安装numpy或请求失败时values为空列表
         """
         # 设置默认日期为今天
         if date is None:
             date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         
         date_str = date.strftime("%Y-%m-%d")
-        cache_key = f"stress_{date_str}"
+        cache_metric = "stress"
         
-        # 尝试从缓存获取
-        cached_data = self._get_from_cache(cache_key)
-        if cached_data:
+        # 尝试从缓存获取，逐点压力值不在缓存中，没有时间序列存储时无法从缓存得到
+        cached_data = None
+        if not include_values or self.timeseries_store is not None or np is None:
+            cached_data = self._get_from_cache(cache_metric, date_str)
+        if cached_data is not None:
+            if include_values:
+                return self._with_stress_values(cached_data, date_str, None, format_time)
             return cached_data
         
         # 如果客户端未初始化或登录失败，返回空数据
+        default_data = {"date": date_str, **summarize_stress(None)}
         if not self.client:
-            return {"date": date_str, "values": [], "avg": 0, "max": 0, "min": 0}
+            return self._with_stress_values(default_data, date_str, None, format_time) if include_values else default_data
         
         try:
             # 获取压力数据
-            stress_data = self.client.get_stress_data(date_str)
-            
-            for i in stress_data:
-                print(f"    {i}")
-# userProfilePK
-# calendarDate
-# startTimestampGMT
-# endTimestampGMT
-# startTimestampLocal
-# endTimestampLocal
-# maxStressLevel
-# avgStressLevel
-# stressChartValueOffset
-# stressChartYAxisOrigin
-# stressValueDescriptorsDTOList
-# stressValuesArray
-# bodyBatteryValueDescriptorsDTOList
-# bodyBatteryValuesArray
-
-            # 处理压力数据
-            values = []
-            if isinstance(stress_data, list):
-                values = [{
-                    "value": entry.get("value", 0),
-                    "timestamp": entry.get("startGMT", 0),
-                    "time": datetime.fromtimestamp(entry.get("startGMT", 0)/1000).strftime('%Y-%m-%d %H:%M:%S')
-                } for entry in stress_data]
-            
-            # 计算统计信息
-            stress_values = [v["value"] for v in values if v["value"] > 0]
-            avg_stress = round(sum(stress_values)/len(stress_values), 1) if stress_values else 0
-            max_stress = max(stress_values) if stress_values else 0
-            min_stress = min(stress_values) if stress_values else 0
+            stress_data = self._call("get_stress_data", date_str)
             
-            result = {
-                "date": date_str,
-                "values": values,
-                "avg": avg_stress,
-                "max": max_stress,
-                "min": min_stress
-            }
+            stress_series = None
+            if isinstance(stress_data, dict) and np is not None:
+                # stressValuesArray: [[时间戳毫秒, 压力值], ...]
+                # bodyBatteryValuesArray: [[时间戳毫秒, 状态, 电量, 版本], ...]
+                stress_arrays = series_from_pairs(stress_data.get("stressValuesArray"))
+                body_battery_arrays = series_from_pairs(stress_data.get("bodyBatteryValuesArray"), value_index=2)
+                if self.timeseries_store is not None:
+                    self.timeseries_store.save("stress", date_str, stress_arrays)
+                    self.timeseries_store.save("body_battery", date_str, body_battery_arrays)
+                
+                stress_series = TimeSeries.from_arrays(stress_arrays)
+                result = {"date": date_str, **summarize_stress(stress_series, TimeSeries.from_arrays(body_battery_arrays))}
+            elif isinstance(stress_data, dict):
+                # 未安装numpy时使用Garmin返回的统计值
+                result = dict(default_data)
+                result["avg"] = stress_data.get("avgStressLevel") or 0
+                result["max"] = stress_data.get("maxStressLevel") or 0
+            else:
+                result = default_data
             
             # 保存到缓存
-            self._save_to_cache(cache_key, result)
+            self._save_to_cache(cache_metric, date_str, result)
             
+            if include_values:
+                return self._with_stress_values(result, date_str, stress_series, format_time)
             return result
         
         except Exception as e:
             print(f"获取压力数据失败: {e}")
-            return {"date": date_str, "values": [], "avg": 0, "max": 0, "min": 0}
+            result = self._handle_fetch_error(cache_metric, [date_str], {date_str: default_data})[date_str]
+            if include_values:
+                return self._with_stress_values(result, date_str, None, format_time)
+            return result
+    
+    def _with_stress_values(self, result: Dict[str, Any], date_str: str, stress_series: Optional[TimeSeries],
+                            format_time: bool) -> Dict[str, Any]:
+        """
+        在压力统计结果中附加逐点压力值
+        
+        Args:
+            result: 压力统计结果
+            date_str: 日期字符串
+            stress_series: 已解析的压力时间序列，为None时从时间序列存储读取
+            format_time: 是否附加格式化的时间字符串
+            
+        Returns:
+            Dict[str, Any]: 包含values字段的新字典
+        """
+        if stress_series is None and self.timeseries_store is not None:
+            stress_series = self.timeseries_store.load("stress", date_str)
+        values = stress_series.to_list(format_time) if stress_series is not None else []
+        return dict(result, values=values)
+    
+    @single_flight
+    def get_stress_range(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """
+        获取日期范围内的压力数据
+        
+        每天的统计来自缓存（缺失的日期逐日请求），整个范围的统计直接在内存映射的时间序列上计算，
+        多周的数据也只需要几毫秒。
+        
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            
+        Returns:
+            Dict[str, Any]: 每天的压力统计（days）以及整个范围的统计信息
+        """
+        days = self._iter_dates(start_date, end_date)
+        if self.concurrent_fetch and len(days) > 1:
+            executor = self._get_executor()
+            daily = [future.result() for future in [executor.submit(self.get_stress_data, day, False) for day in days]]
+        else:
+            daily = [self.get_stress_data(day, False) for day in days]
+        
+        if self.timeseries_store is not None and days:
+            summary = summarize_stress(
+                self.get_timeseries("stress", days[0], days[-1]),
+                self.get_timeseries("body_battery", days[0], days[-1])
+            )
+        else:
+            summary = summarize_stress(None)
+        
+        return {
+            "start_date": start_date.strftime("%Y-%m-%d"),
+            "end_date": end_date.strftime("%Y-%m-%d"),
+            **summary,
+            "days": daily
+        }
 
 
+    @single_flight
     def get_daily_weigh_ins(self, date: Optional[datetime] = None, enddate: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """
         获取指定日期的体重数据
         
         Args:
             date: 日期，默认为今天
+            enddate: 结束日期，默认与date相同
             
         Returns:
             List[Dict[str, Any]]: 体重数据列表，包含每次测量的详细信息
@@ -638,13 +1267,17 @@ class GarminClient:
         if date is None:
             date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         
+        # 默认只查询当天
+        if enddate is None:
+            enddate = date
+        
         date_str = date.strftime("%Y-%m-%d")
         enddate_str = enddate.strftime("%Y-%m-%d")
-        cache_key = f"weight_{date_str}"
+        cache_metric = "weight"
         
         # 尝试从缓存获取
-        cached_data = self._get_from_cache(cache_key)
-        if cached_data:
+        cached_data = self._get_from_cache(cache_metric, date_str)
+        if cached_data is not None:
             return cached_data
         
         # 如果客户端未初始化或登录失败，返回空列表
@@ -653,7 +1286,7 @@ class GarminClient:
         
         try:
             # 获取体重数据
-            weight_data = self.client.get_weigh_ins(date_str, enddate_str)
+            weight_data = self._call("get_weigh_ins", date_str, enddate_str)
             
             # 处理返回的字典结构
             result = []
@@ -661,42 +1294,107 @@ class GarminClient:
                 # 处理每日体重摘要
                 daily_summaries = weight_data.get('dailyWeightSummaries', [])
                 for summary in daily_summaries:
-                    # 获取最新体重记录
-                    latest_weight = summary.get('latestWeight', {})
-                    if latest_weight:
-                        timestamp = latest_weight.get('timestampGMT', "")
-                        # 将时间戳转换为标准时间格式
-                        if timestamp:
-                            try:
-                                dt = datetime.fromtimestamp(timestamp / 1000)
-                                time_str = dt.strftime('%Y-%m-%d %H:%M:%S')
-                            except (TypeError, ValueError):
-                                time_str = "未知时间"
-                        else:
-                            time_str = "未知时间"
-                            
-                        result.append({
-                            "timestamp": timestamp,
-                            "time": time_str,  # 新增标准时间格式字段
-                            "date": latest_weight.get('calendarDate', ""),
-                            "weight": latest_weight.get('weight', 0) / 1000 if latest_weight.get('weight') else 0,
-                            "bmi": latest_weight.get('bmi'),
-                            "body_fat": latest_weight.get('bodyFat'),
-                            "water_percentage": latest_weight.get('bodyWater'),
-                            "bone_mass": latest_weight.get('boneMass'),
-                            "muscle_mass": latest_weight.get('muscleMass'),
-                            "visceral_fat": latest_weight.get('visceralFat'),
-                            "metabolic_age": latest_weight.get('metabolicAge'),
-                            "source_type": latest_weight.get('sourceType')
-                        })
+                    weight_entry = self._parse_weight_summary(summary)
+                    if weight_entry:
+                        result.append(weight_entry)
             
             # 保存到缓存
-            self._save_to_cache(cache_key, result)
+            self._save_to_cache(cache_metric, date_str, result)
             
             return result
         
         except Exception as e:
             print(f"获取体重数据失败: {e}")
-            return []
+            return self._handle_fetch_error(cache_metric, [date_str], {date_str: []})[date_str]
+    
+    def _parse_weight_summary(self, summary: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        从每日体重摘要中提取最新一次测量
+        
+        Args:
+            summary: dailyWeightSummaries中的单条摘要
+            
+        Returns:
+            Optional[Dict[str, Any]]: 体重测量数据，没有测量时返回None
+        """
+        # 获取最新体重记录
+        latest_weight = summary.get('latestWeight', {})
+        if not latest_weight:
+            return None
+        
+        timestamp = latest_weight.get('timestampGMT', "")
+        # 将时间戳转换为标准时间格式
+        if timestamp:
+            try:
+                dt = datetime.fromtimestamp(timestamp / 1000)
+                time_str = dt.strftime('%Y-%m-%d %H:%M:%S')
+            except (TypeError, ValueError):
+                time_str = "未知时间"
+        else:
+            time_str = "未知时间"
+        
+        return {
+            "timestamp": timestamp,
+            "time": time_str,  # 新增标准时间格式字段
+            "date": latest_weight.get('calendarDate', ""),
+            "weight": latest_weight.get('weight', 0) / 1000 if latest_weight.get('weight') else 0,
+            "bmi": latest_weight.get('bmi'),
+            "body_fat": latest_weight.get('bodyFat'),
+            "water_percentage": latest_weight.get('bodyWater'),
+            "bone_mass": latest_weight.get('boneMass'),
+            "muscle_mass": latest_weight.get('muscleMass'),
+            "visceral_fat": latest_weight.get('visceralFat'),
+            "metabolic_age": latest_weight.get('metabolicAge'),
+            "source_type": latest_weight.get('sourceType')
+        }
+    
+    @single_flight
+    def get_weigh_ins_range(self, start_date: datetime, end_date: datetime) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        获取日期范围内的体重数据，一次请求整个范围，再按天拆分并写入每日缓存
+        
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: 日期字符串到当天体重数据列表的映射
+        """
+        date_strs = [day.strftime("%Y-%m-%d") for day in self._iter_dates(start_date, end_date)]
+        
+        # 先从缓存批量读取，只对缺失的日期发起请求
+        result = self._get_many_from_cache("weight", date_strs)
+        missing = [date_str for date_str in date_strs if date_str not in result]
+        
+        if not missing:
+            return result
+        
+        # 如果客户端未初始化或登录失败，缺失日期返回空列表
+        if not self.client:
+            result.update({date_str: [] for date_str in missing})
+            return result
+        
+        try:
+            weight_data = self._call("get_weigh_ins", missing[0], missing[-1])
+        except Exception as e:
+            print(f"获取体重数据失败: {e}")
+            result.update(self._handle_fetch_error("weight", missing, {date_str: [] for date_str in missing}))
+            return result
+        
+        per_day = {date_str: [] for date_str in missing}
+        if isinstance(weight_data, dict):
+            for summary in weight_data.get('dailyWeightSummaries', []):
+                weight_entry = self._parse_weight_summary(summary)
+                if not weight_entry:
+                    continue
+                day = summary.get('summaryDate') or weight_entry.get("date", "")
+                if day in per_day:
+                    per_day[day].append(weight_entry)
+        
+        self._save_many_to_cache("weight", per_day)
+        result.update(per_day)
+        
+        return result
+    
     def get_name(self):
-        return self.client.get_full_name()
+        return self._call("get_full_name")
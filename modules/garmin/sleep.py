@@ -0,0 +1,124 @@
+from typing import Dict, Any, List, Optional
+
+from .timeseries import np, TimeSeries
+
+# Garmin sleepLevels 中 activityLevel 对应的睡眠阶段
+SLEEP_STAGES = ["deep", "light", "rem", "awake"]
+AWAKE_LEVEL = 3
+
+# dailySleepDTO 中各阶段时长（秒）的字段
+DAILY_SLEEP_FIELDS = {
+    "deep": "deepSleepSeconds",
+    "light": "lightSleepSeconds",
+    "rem": "remSleepSeconds",
+    "awake": "awakeSleepSeconds",
+}
+
+
+def empty_sleep_summary() -> Dict[str, Any]:
+    """
+    没有睡眠数据时的汇总结构
+
+    Returns:
+        Dict[str, Any]: 各字段为0的睡眠汇总
+    """
+    return {
+        "duration": 0,
+        "deep": 0,
+        "light": 0,
+        "rem": 0,
+        "awake": 0,
+        "in_bed": 0,
+        "efficiency": 0,
+        "waso": 0,
+        "sleep_start": 0,
+        "sleep_end": 0
+    }
+
+
+def summarize_sleep(levels: Optional[TimeSeries], daily_sleep: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    根据睡眠级别区间计算一晚的睡眠汇总，所有区间一次性向量化计算
+
+    没有睡眠级别数据（或未安装numpy）时使用 dailySleepDTO 中的时长。
+
+    Args:
+        levels: 睡眠级别区间序列，值为 0深睡/1浅睡/2REM/3清醒
+        daily_sleep: Garmin返回的 dailySleepDTO
+
+    Returns:
+        Dict[str, Any]: 睡眠时长和各阶段时长（小时）、卧床时长（小时）、睡眠效率（%）、
+        入睡后清醒时长WASO（分钟）以及入睡和醒来时间戳（毫秒）
+    """
+    result = empty_sleep_summary()
+
+    if levels is not None and levels.ends is not None and len(levels.valid()):
+        levels = levels.valid()
+        starts = levels.timestamps.astype(np.int64)
+        ends = levels.ends.astype(np.int64)
+        stages = np.clip(levels.raw_values, 0, AWAKE_LEVEL)
+        durations = ends - starts
+
+        seconds = np.bincount(stages, weights=durations, minlength=len(SLEEP_STAGES))
+        asleep = stages != AWAKE_LEVEL
+        sleep_seconds = float(seconds[:AWAKE_LEVEL].sum())
+        in_bed_seconds = int(ends.max() - starts.min())
+
+        # 入睡后清醒：第一次入睡到最后一次醒来之间的清醒区间
+        waso_seconds = 0
+        if asleep.any():
+            onset = starts[asleep].min()
+            final_wake = ends[asleep].max()
+            waso_mask = ~asleep & (starts >= onset) & (ends <= final_wake)
+            waso_seconds = int(durations[waso_mask].sum())
+            result["sleep_start"] = int(onset) * 1000
+            result["sleep_end"] = int(final_wake) * 1000
+
+        for name, value in zip(SLEEP_STAGES, seconds):
+            result[name] = round(float(value) / 3600, 2)
+        result["duration"] = round(sleep_seconds / 3600, 2)
+        result["in_bed"] = round(in_bed_seconds / 3600, 2)
+        result["efficiency"] = round(sleep_seconds / in_bed_seconds * 100, 1) if in_bed_seconds else 0
+        result["waso"] = round(waso_seconds / 60)
+        return result
+
+    if daily_sleep:
+        for name, field in DAILY_SLEEP_FIELDS.items():
+            result[name] = round((daily_sleep.get(field) or 0) / 3600, 2)
+        sleep_seconds = daily_sleep.get("sleepTimeSeconds") or 0
+        result["duration"] = round(sleep_seconds / 3600, 2)
+        start = daily_sleep.get("sleepStartTimestampGMT") or 0
+        end = daily_sleep.get("sleepEndTimestampGMT") or 0
+        if start and end > start:
+            in_bed_seconds = (end - start) / 1000
+            result["sleep_start"] = start
+            result["sleep_end"] = end
+            result["in_bed"] = round(in_bed_seconds / 3600, 2)
+            result["efficiency"] = round(sleep_seconds / in_bed_seconds * 100, 1)
+
+    return result
+
+
+def reduce_sleep_nights(nights: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    将多晚的睡眠汇总合并为周期汇总（平均值），没有睡眠记录的夜晚不参与平均
+
+    Args:
+        nights: 每晚的睡眠汇总列表
+
+    Returns:
+        Dict[str, Any]: 各字段的平均值以及有睡眠记录的夜晚数（night_count）
+    """
+    recorded = [night for night in nights if night.get("duration", 0) > 0]
+    result = {key: 0 for key in ("duration", "deep", "light", "rem", "awake", "in_bed", "efficiency", "waso")}
+    result["night_count"] = len(recorded)
+    if not recorded:
+        return result
+
+    for key in result:
+        if key == "night_count":
+            continue
+        total = sum(night.get(key, 0) for night in recorded)
+        result[key] = round(total / len(recorded), 1 if key == "efficiency" else 2)
+    result["waso"] = round(result["waso"])
+    return result
@@ -0,0 +1,52 @@
+from typing import Dict, Any, Optional
+
+from .timeseries import TimeSeries
+
+# Garmin压力等级划分：0-25休息，26-50低，51-75中，76-100高
+STRESS_LEVEL_BOUNDS = [26, 51, 76]
+STRESS_LEVEL_NAMES = ["rest", "low", "medium", "high"]
+
+
+def summarize_stress(stress: Optional[TimeSeries], body_battery: Optional[TimeSeries] = None) -> Dict[str, Any]:
+    """
+    计算压力统计信息，全部使用向量化运算
+
+    Args:
+        stress: 压力时间序列，平均/最大/最小压力只统计大于0的值（0和负值表示未佩戴、活动中等）
+        body_battery: 身体电量时间序列
+
+    Returns:
+        Dict[str, Any]: 平均/最大/最小压力、各压力等级的时长（分钟）以及身体电量变化
+    """
+    result = {
+        "avg": 0,
+        "max": 0,
+        "min": 0,
+        "levels": {name: 0 for name in STRESS_LEVEL_NAMES},
+        "body_battery": {"start": 0, "end": 0, "max": 0, "min": 0}
+    }
+
+    if stress is not None and len(stress):
+        valid = stress.valid()
+        if len(valid):
+            values = valid.values
+            values = values[values > 0]
+            if len(values):
+                result["avg"] = round(float(values.mean()), 1)
+                result["max"] = int(values.max())
+                result["min"] = int(values.min())
+            seconds = stress.time_in_zone(STRESS_LEVEL_BOUNDS)
+            result["levels"] = {name: round(value / 60) for name, value in zip(STRESS_LEVEL_NAMES, seconds)}
+
+    if body_battery is not None and len(body_battery):
+        valid = body_battery.valid()
+        if len(valid):
+            values = valid.values
+            result["body_battery"] = {
+                "start": int(values[0]),
+                "end": int(values[-1]),
+                "max": int(values.max()),
+                "min": int(values.min())
+            }
+
+    return result
@@ -0,0 +1,557 @@
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import json
+import os
+import threading
+import uuid
+
+# 导入numpy库
+try:
+    import numpy as np
+except ImportError:
+    np = None
+    print("请安装numpy库以启用日内时间序列存储: pip install numpy")
+
+# 跨进程文件锁：POSIX系统使用fcntl，Windows使用msvcrt
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# 采样点：时间戳（秒）+ 值；区间：开始时间戳、结束时间戳（秒）+ 值
+SAMPLE_DTYPE = [('t', '<u4'), ('v', '<i2')]
+INTERVAL_DTYPE = [('t', '<u4'), ('e', '<u4'), ('v', '<i2')]
+
+# 缺失值在int16数组中的表示
+MISSING_VALUE = -1
+
+# 以整数保存的小数指标的缩放倍数，读取时除以该倍数
+METRIC_SCALES = {
+    'sleep_movement': 100,
+    'respiration': 10,
+}
+
+
+class TimeSeries:
+    """
+    日内时间序列，保存为紧凑的NumPy数组并提供向量化统计
+
+    值小于0的采样点视为缺失，不参与统计。
+    """
+
+    def __init__(self, timestamps, values, ends=None, scale: int = 1):
+        """
+        初始化时间序列
+
+        Args:
+            timestamps: 采样时间戳（秒，uint32数组）
+            values: 原始整数值（int16数组）
+            ends: 区间结束时间戳（秒），采样点序列为None
+            scale: 缩放倍数，实际值为原始值除以该倍数
+        """
+        self.timestamps = timestamps
+        self.raw_values = values
+        self.ends = ends
+        self.scale = scale
+
+    @classmethod
+    def from_arrays(cls, arrays: Optional[Tuple], scale: int = 1) -> Optional['TimeSeries']:
+        """
+        由 series_from_pairs 或 series_from_records 的返回值创建时间序列
+
+        Args:
+            arrays: (时间戳, 值) 或 (开始时间戳, 结束时间戳, 值)
+            scale: 缩放倍数
+
+        Returns:
+            Optional[TimeSeries]: 时间序列，arrays为None时返回None
+        """
+        if arrays is None:
+            return None
+        if len(arrays) == 3:
+            return cls(arrays[0], arrays[2], arrays[1], scale)
+        return cls(arrays[0], arrays[1], None, scale)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def values(self):
+        """
+        实际值数组（已按缩放倍数换算）
+        """
+        if self.scale == 1:
+            return self.raw_values
+        return self.raw_values.astype(np.float64) / self.scale
+
+    def _valid_mask(self):
+        return self.raw_values >= 0
+
+    def valid(self) -> 'TimeSeries':
+        """
+        去掉缺失值后的时间序列
+
+        Returns:
+            TimeSeries: 只包含有效采样点的时间序列
+        """
+        mask = self._valid_mask()
+        ends = self.ends[mask] if self.ends is not None else None
+        return TimeSeries(self.timestamps[mask], self.raw_values[mask], ends, self.scale)
+
+    def between(self, start_ts: int, end_ts: int) -> 'TimeSeries':
+        """
+        截取 [start_ts, end_ts) 时间范围内的采样点，要求时间戳有序
+
+        Args:
+            start_ts: 开始时间戳（秒）
+            end_ts: 结束时间戳（秒）
+
+        Returns:
+            TimeSeries: 截取后的时间序列
+        """
+        lo = np.searchsorted(self.timestamps, start_ts, side='left')
+        hi = np.searchsorted(self.timestamps, end_ts, side='left')
+        ends = self.ends[lo:hi] if self.ends is not None else None
+        return TimeSeries(self.timestamps[lo:hi], self.raw_values[lo:hi], ends, self.scale)
+
+    def _stat(self, func) -> Optional[float]:
+        values = self.valid().values
+        if len(values) == 0:
+            return None
+        return float(func(values))
+
+    def min(self) -> Optional[float]:
+        return self._stat(np.min)
+
+    def max(self) -> Optional[float]:
+        return self._stat(np.max)
+
+    def mean(self) -> Optional[float]:
+        return self._stat(np.mean)
+
+    def percentile(self, q):
+        """
+        计算百分位数
+
+        Args:
+            q: 百分位（0-100），可以是单个数字或列表
+
+        Returns:
+            单个百分位数或百分位数列表，没有有效数据时返回None
+        """
+        values = self.valid().values
+        if len(values) == 0:
+            return None
+        result = np.percentile(values, q)
+        return result.tolist() if np.ndim(result) else float(result)
+
+    def durations(self):
+        """
+        每个采样点代表的时长（秒）
+
+        区间序列为结束时间减开始时间；采样点序列为到下一个采样点的间隔，
+        最后一个采样点以及超过3倍典型间隔的断档按典型间隔计算。
+
+        Returns:
+            numpy数组: 每个采样点的时长
+        """
+        if self.ends is not None:
+            return self.ends.astype(np.int64) - self.timestamps.astype(np.int64)
+        if len(self.timestamps) == 0:
+            return np.zeros(0, dtype=np.int64)
+        if len(self.timestamps) == 1:
+            return np.zeros(1, dtype=np.int64)
+
+        gaps = np.diff(self.timestamps.astype(np.int64))
+        typical = int(np.median(gaps))
+        gaps = np.where(gaps > typical * 3, typical, gaps)
+        return np.append(gaps, typical)
+
+    def time_in_zone(self, bounds: Sequence[float]) -> List[int]:
+        """
+        统计落在各区间内的时长，例如心率区间
+
+        Args:
+            bounds: 升序的区间边界，n个边界划分出n+1个区间
+
+        Returns:
+            List[int]: 每个区间的总时长（秒）
+        """
+        mask = self._valid_mask()
+        zones = np.digitize(self.values[mask], bounds)
+        seconds = np.bincount(zones, weights=self.durations()[mask], minlength=len(bounds) + 1)
+        return [int(value) for value in seconds]
+
+    def resample(self, seconds: int, how: str = 'mean') -> 'TimeSeries':
+        """
+        按固定时间间隔重采样
+
+        Args:
+            seconds: 重采样间隔（秒）
+            how: 聚合方式：mean、sum、min或max
+
+        Returns:
+            TimeSeries: 重采样后的采样点序列，每个时间段取时间段起点作为时间戳
+        """
+        valid = self.valid()
+        if len(valid) == 0:
+            return TimeSeries(np.zeros(0, dtype='<u4'), np.zeros(0, dtype='<i2'), None, self.scale)
+
+        buckets = (valid.timestamps // seconds) * seconds
+        bucket_starts, first_index, inverse = np.unique(buckets, return_index=True, return_inverse=True)
+        raw = valid.raw_values.astype(np.float64)
+
+        if how == 'sum':
+            aggregated = np.bincount(inverse, weights=raw)
+        elif how == 'min':
+            aggregated = np.minimum.reduceat(raw, first_index)
+        elif how == 'max':
+            aggregated = np.maximum.reduceat(raw, first_index)
+        else:
+            aggregated = np.bincount(inverse, weights=raw) / np.bincount(inverse)
+
+        return TimeSeries(
+            bucket_starts.astype('<u4'),
+            np.clip(np.rint(aggregated), MISSING_VALUE, np.iinfo(np.int16).max).astype('<i2'),
+            None,
+            self.scale
+        )
+
+    def to_list(self, format_time: bool = False) -> List[Dict[str, Any]]:
+        """
+        转换为字典列表，仅在需要逐点展示时使用
+
+        Args:
+            format_time: 是否附加格式化的本地时间字符串
+
+        Returns:
+            List[Dict[str, Any]]: 每个采样点的时间戳（毫秒）和值
+        """
+        result = []
+        values = self.values.tolist()
+        for timestamp, value in zip(self.timestamps.tolist(), values):
+            item = {"timestamp": timestamp * 1000, "value": value}
+            if format_time:
+                item["time"] = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+            result.append(item)
+        return result
+
+    @staticmethod
+    def concat(series_list: List['TimeSeries']) -> Optional['TimeSeries']:
+        """
+        按顺序拼接多段时间序列
+
+        Args:
+            series_list: 时间序列列表
+
+        Returns:
+            Optional[TimeSeries]: 拼接后的时间序列，列表为空时返回None
+        """
+        series_list = [series for series in series_list if series is not None]
+        if not series_list:
+            return None
+        if len(series_list) == 1:
+            return series_list[0]
+
+        has_ends = all(series.ends is not None for series in series_list)
+        return TimeSeries(
+            np.concatenate([series.timestamps for series in series_list]),
+            np.concatenate([series.raw_values for series in series_list]),
+            np.concatenate([series.ends for series in series_list]) if has_ends else None,
+            series_list[0].scale
+        )
+
+
+def series_from_pairs(pairs: Sequence[Sequence[Any]], value_index: int = 1, scale: int = 1) -> Optional[Tuple]:
+    """
+    将 [[时间戳毫秒, 值, ...], ...] 格式的Garmin数据转换为数组
+
+    Args:
+        pairs: Garmin返回的采样点列表
+        value_index: 值在每个采样点中的位置
+        scale: 小数值保存为整数时的缩放倍数
+
+    Returns:
+        Optional[Tuple]: (时间戳数组, 值数组)，没有数据时返回None
+    """
+    rows = [
+        (item[0], item[value_index])
+        for item in pairs or []
+        if isinstance(item, (list, tuple)) and len(item) > value_index and item[0] is not None
+    ]
+    if not rows:
+        return None
+
+    data = np.array(rows, dtype=np.float64)
+    values = np.nan_to_num(data[:, 1], nan=MISSING_VALUE) * scale
+    order = np.argsort(data[:, 0], kind='stable')
+    return (
+        (data[order, 0] // 1000).astype('<u4'),
+        np.clip(np.rint(values[order]), MISSING_VALUE, np.iinfo(np.int16).max).astype('<i2')
+    )
+
+
+def series_from_records(records: Sequence[Dict[str, Any]], start_key: str, value_key: str,
+                        end_key: Optional[str] = None, scale: int = 1) -> Optional[Tuple]:
+    """
+    将字典列表格式的Garmin数据转换为数组，时间可以是毫秒时间戳或GMT时间字符串
+
+    Args:
+        records: Garmin返回的记录列表
+        start_key: 开始时间字段
+        value_key: 值字段
+        end_key: 结束时间字段，区间数据需要提供
+        scale: 小数值保存为整数时的缩放倍数
+
+    Returns:
+        Optional[Tuple]: 采样点数据为 (时间戳数组, 值数组)，区间数据为 (开始时间戳数组, 结束时间戳数组, 值数组)，
+        没有数据时返回None
+    """
+    records = [record for record in records or [] if isinstance(record, dict) and record.get(start_key) is not None]
+    if not records:
+        return None
+
+    starts = _to_epoch_seconds([record[start_key] for record in records])
+    values = np.array(
+        [record.get(value_key) if record.get(value_key) is not None else np.nan for record in records],
+        dtype=np.float64
+    )
+    values = np.clip(np.rint(np.nan_to_num(values * scale, nan=MISSING_VALUE)), MISSING_VALUE, np.iinfo(np.int16).max)
+    order = np.argsort(starts, kind='stable')
+
+    if end_key is None:
+        return starts[order].astype('<u4'), values[order].astype('<i2')
+
+    ends = _to_epoch_seconds([record.get(end_key) or record[start_key] for record in records])
+    return starts[order].astype('<u4'), ends[order].astype('<u4'), values[order].astype('<i2')
+
+
+def _to_epoch_seconds(values: List[Any]):
+    """
+    将毫秒时间戳或GMT时间字符串（如 2024-01-01T22:15:00.0）批量转换为秒级时间戳
+
+    Args:
+        values: 时间值列表
+
+    Returns:
+        numpy数组: int64秒级时间戳
+    """
+    if isinstance(values[0], str):
+        return np.array([value[:19] for value in values], dtype='datetime64[s]').astype(np.int64)
+    return (np.array(values, dtype=np.float64) // 1000).astype(np.int64)
+
+
+class TimeSeriesStore:
+    """
+    日内时间序列存储
+
+    每个指标每月一个 .npy 文件，按天连续存放，另有一个JSON索引记录每天在文件中的偏移和长度。
+    读取时使用内存映射，只访问需要的部分。写入时生成新的数据文件再替换索引，读取方不会看到写了一半的数据。
+    同一个月的写入通过文件锁串行执行，多个进程同时写入时不会丢失彼此的数据。
+    """
+
+    def __init__(self, root_dir: str):
+        """
+        初始化时间序列存储
+
+        Args:
+            root_dir: 存储目录
+        """
+        self.root_dir = root_dir
+        self._lock = threading.Lock()
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _index_path(self, metric: str, month: str) -> str:
+        return os.path.join(self.root_dir, metric, f"{month}.json")
+
+    def _load_index(self, metric: str, month: str) -> Dict[str, Any]:
+        index_path = self._index_path(metric, month)
+        if not os.path.exists(index_path):
+            return {"file": None, "days": {}}
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"读取时间序列索引失败: {e}")
+            return {"file": None, "days": {}}
+
+    def _open_month(self, metric: str, month: str, retry: bool = True) -> Tuple[Dict[str, Any], Any]:
+        """
+        读取某个月的索引并以内存映射方式打开数据文件
+
+        Args:
+            metric: 指标名称
+            month: 月份字符串
+            retry: 数据文件不存在时是否重新读取索引再试一次
+
+        Returns:
+            Tuple: (索引, 内存映射数组)，没有数据时数组为None
+        """
+        index = self._load_index(metric, month)
+        if not index.get("file"):
+            return index, None
+        try:
+            data = np.load(os.path.join(self.root_dir, metric, index["file"]), mmap_mode='r')
+        except FileNotFoundError as e:
+            # 读取索引之后数据文件被其他写入方替换并删除，重新读取索引
+            if retry:
+                return self._open_month(metric, month, retry=False)
+            print(f"读取时间序列失败: {e}")
+            return index, None
+        except Exception as e:
+            print(f"读取时间序列失败: {e}")
+            return index, None
+        return index, data
+
+    @contextmanager
+    def _month_lock(self, metric: str, month: str):
+        """
+        锁定某个月的数据，本进程的其他线程和其他进程对该月的写入需要等待
+
+        Args:
+            metric: 指标名称
+            month: 月份字符串
+        """
+        lock_path = os.path.join(self.root_dir, metric, f"{month}.lock")
+        with self._lock, open(lock_path, 'a+b') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def save(self, metric: str, date_str: str, arrays: Optional[Tuple]):
+        """
+        保存某一天的时间序列，覆盖该天已有的数据
+
+        Args:
+            metric: 指标名称
+            date_str: 日期字符串
+            arrays: series_from_pairs 或 series_from_records 的返回值，None表示当天没有数据
+        """
+        if arrays is None:
+            return
+
+        if len(arrays) == 3:
+            rows = np.empty(len(arrays[0]), dtype=INTERVAL_DTYPE)
+            rows['t'], rows['e'], rows['v'] = arrays
+        else:
+            rows = np.empty(len(arrays[0]), dtype=SAMPLE_DTYPE)
+            rows['t'], rows['v'] = arrays
+
+        month = date_str[:7]
+        metric_dir = os.path.join(self.root_dir, metric)
+        os.makedirs(metric_dir, exist_ok=True)
+
+        with self._month_lock(metric, month):
+            index, data = self._open_month(metric, month)
+            if data is not None and data.dtype != rows.dtype:
+                print(f"时间序列{metric}的数据格式不一致，将覆盖{month}的数据")
+                index, data = {"file": None, "days": {}}, None
+
+            # 保留其他日期的数据，按日期顺序重新排列
+            days = {day: (offset, length) for day, (offset, length) in index.get("days", {}).items() if day != date_str}
+            chunks = []
+            new_days = {}
+            offset = 0
+            for day in sorted(list(days.keys()) + [date_str]):
+                chunk = rows if day == date_str else data[days[day][0]:days[day][0] + days[day][1]]
+                chunks.append(chunk)
+                new_days[day] = [offset, len(chunk)]
+                offset += len(chunk)
+
+            filename = f"{month}.{uuid.uuid4().hex[:8]}.npy"
+            np.save(os.path.join(metric_dir, filename), np.concatenate(chunks).astype(rows.dtype))
+            del data
+
+            index_path = self._index_path(metric, month)
+            temp_path = f"{index_path}.{uuid.uuid4().hex[:8]}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"file": filename, "days": new_days}, f)
+            os.replace(temp_path, index_path)
+
+            # 删除旧的数据文件
+            old_file = index.get("file")
+            if old_file and old_file != filename:
+                try:
+                    os.remove(os.path.join(metric_dir, old_file))
+                except OSError:
+                    pass
+
+    def has(self, metric: str, date_str: str) -> bool:
+        """
+        是否保存了某一天的时间序列
+
+        Args:
+            metric: 指标名称
+            date_str: 日期字符串
+
+        Returns:
+            bool: 是否存在
+        """
+        return date_str in self._load_index(metric, date_str[:7]).get("days", {})
+
+    def load(self, metric: str, date_str: str) -> Optional[TimeSeries]:
+        """
+        读取某一天的时间序列
+
+        Args:
+            metric: 指标名称
+            date_str: 日期字符串
+
+        Returns:
+            Optional[TimeSeries]: 时间序列，没有数据时返回None
+        """
+        return self.load_range(metric, date_str, date_str)
+
+    def load_range(self, metric: str, start_date: str, end_date: str) -> Optional[TimeSeries]:
+        """
+        读取日期范围内（含两端）的时间序列并按日期顺序拼接
+
+        Args:
+            metric: 指标名称
+            start_date: 开始日期字符串
+            end_date: 结束日期字符串
+
+        Returns:
+            Optional[TimeSeries]: 时间序列，没有数据时返回None
+        """
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+
+        # 按月分组，每个月只打开一次数据文件
+        months = {}
+        current = start
+        while current <= end:
+            months.setdefault(current.strftime("%Y-%m"), []).append(current.strftime("%Y-%m-%d"))
+            current += timedelta(days=1)
+
+        chunks = []
+        for month, date_strs in months.items():
+            index, data = self._open_month(metric, month)
+            if data is None:
+                continue
+            for date_str in date_strs:
+                position = index.get("days", {}).get(date_str)
+                if position:
+                    chunks.append(data[position[0]:position[0] + position[1]])
+
+        if not chunks:
+            return None
+
+        rows = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+        ends = rows['e'] if 'e' in rows.dtype.names else None
+        return TimeSeries(rows['t'], rows['v'], ends, METRIC_SCALES.get(metric, 1))
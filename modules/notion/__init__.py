@@ -1,5 +1,7 @@
 # Notion模块初始化文件
 
 from .notion_client import NotionClient
+from .mirror import NotionMirror
+from .async_client import AsyncNotionClient
 
-__all__ = ['NotionClient']
\ No newline at end of file
+__all__ = ['NotionClient', 'NotionMirror', 'AsyncNotionClient']
\ No newline at end of file
@@ -0,0 +1,352 @@
+from typing import Dict, Any, List, Optional, AsyncIterator
+from datetime import datetime
+import asyncio
+import time
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+    print("请安装httpx库以启用异步Notion客户端: pip install httpx")
+
+try:
+    import h2  # noqa: F401  httpx的HTTP/2支持依赖h2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+from ..utils.single_flight import AsyncSingleFlight
+from .notion_client import NotionClient, DIARY_QUERY_SORTS
+
+# 需要重试的HTTP状态码：被限流和服务端错误
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class AsyncNotionClient:
+    """
+    基于asyncio的Notion客户端，供FastAPI等asyncio程序使用
+
+    所有请求共用一个httpx.AsyncClient连接池（安装h2时使用HTTP/2），设置超时，由信号量限制并发数，
+    被限流（429）或服务端错误（5xx）时重试（创建页面只在被限流时重试）。请求与同步客户端共用同一个限流器和本地镜像，
+    get_food_data、get_food_data_range、create_diary_entry 的行为与同步客户端相同。
+    """
+
+    def __init__(self, client: NotionClient, max_concurrency: Optional[int] = None, http2: bool = True):
+        """
+        初始化异步Notion客户端
+
+        Args:
+            client: 同步Notion客户端，提供配置、解析方法、限流器和本地镜像
+            max_concurrency: 同时进行的最大请求数，默认与同步客户端的write_concurrency相同
+            http2: 是否使用HTTP/2（需要安装h2）
+        """
+        if httpx is None:
+            raise ImportError("异步Notion客户端需要httpx库: pip install httpx")
+
+        self.client = client
+        self.max_concurrency = max(1, int(max_concurrency or client.write_concurrency))
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._http = None
+        self._semaphore = None
+        self._mirror_lock = None
+        self._single_flight = AsyncSingleFlight()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'AsyncNotionClient':
+        """
+        根据Notion配置创建异步客户端
+
+        Args:
+            config: Notion配置字典
+
+        Returns:
+            AsyncNotionClient: 异步客户端
+        """
+        return cls(NotionClient(config), config.get('async_max_concurrency'), config.get('http2', True))
+
+    def _get_http(self) -> 'httpx.AsyncClient':
+        # 连接池、信号量和锁需要在事件循环中创建
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.client.base_url,
+                headers=self.client.headers,
+                http2=self.http2,
+                timeout=httpx.Timeout(self.client.timeout, connect=min(10, self.client.timeout)),
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._mirror_lock = asyncio.Lock()
+        return self._http
+
+    async def _request(self, method: str, path: str, idempotent: Optional[bool] = None, **kwargs) -> 'httpx.Response':
+        """
+        发送Notion API请求，被限流或服务端错误时等待后重试（优先使用Retry-After）
+
+        只有幂等的请求（GET、PATCH和数据库查询）在服务端错误或连接中断时重试；创建页面的请求可能已经生效，
+        重发会产生重复页面，只在被限流（429，Notion不会处理该请求）时重试，其他错误由调用方重新查询后决定是否重发。
+
+        Args:
+            method: HTTP方法
+            path: API路径，如 /pages
+            idempotent: 请求是否幂等，默认GET、PATCH和数据库查询为幂等
+            **kwargs: 传给httpx的参数
+
+        Returns:
+            httpx.Response: 响应
+        """
+        http = self._get_http()
+        limiter = self.client.rate_limiter
+        max_retries = self.client.max_retries
+        if idempotent is None:
+            idempotent = method in ("GET", "PATCH") or path.endswith("/query")
+
+        for attempt in range(max_retries + 1):
+            await limiter.acquire_async()
+            try:
+                async with self._semaphore:
+                    response = await http.request(method, path, **kwargs)
+            except httpx.TransportError as e:
+                # 超时和连接错误同样重试
+                if not idempotent or attempt >= max_retries:
+                    raise
+                wait_time = 2 ** attempt
+                print(f"Notion API请求失败，{wait_time}秒后重试: {e!r}")
+                await asyncio.sleep(wait_time)
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES:
+                limiter.on_success()
+                return response
+
+            if response.status_code == 429:
+                limiter.on_throttled()
+            elif not idempotent:
+                return response
+            if attempt >= max_retries:
+                return response
+            wait_time = float(response.headers.get("Retry-After", 2 ** attempt))
+            print(f"Notion API请求失败: HTTP {response.status_code}，等待{wait_time}秒后重试")
+            await asyncio.sleep(wait_time)
+        return response
+
+    async def _iter_query(self, query: Dict[str, Any], raise_errors: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        分页查询日记数据库，逐条返回结果
+
+        Args:
+            query: 查询参数（filter、sorts等）
+            raise_errors: 请求失败时是否抛出异常，默认打印错误并停止
+
+        Yields:
+            Dict[str, Any]: 页面对象
+        """
+        query = dict(query, page_size=self.client.page_size)
+        while True:
+            try:
+                response = await self._request("POST", f"/databases/{self.client.database_id}/query", json=query)
+                if response.status_code != 200:
+                    raise RuntimeError(f"HTTP {response.status_code}, {response.text}")
+            except Exception as e:
+                if raise_errors:
+                    raise
+                print(f"获取日记条目失败: {e}")
+                return
+
+            data = response.json()
+            for entry in data.get("results", []):
+                yield entry
+
+            # 继续获取下一页
+            if not data.get("has_more") or not data.get("next_cursor"):
+                return
+            query["start_cursor"] = data["next_cursor"]
+
+    async def _query_diary_entries(self, start_date: datetime, end_date: datetime,
+                                   raise_errors: bool = False) -> List[Dict[str, Any]]:
+        query = {
+            "filter": {
+                "and": [
+                    {"property": "Date", "date": {"on_or_after": start_date.isoformat()}},
+                    {"property": "Date", "date": {"on_or_before": end_date.isoformat()}}
+                ]
+            },
+            "sorts": DIARY_QUERY_SORTS
+        }
+        return [entry async for entry in self._iter_query(query, raise_errors=raise_errors)]
+
+    async def sync_mirror(self, full: bool = False) -> Dict[str, int]:
+        """
+        同步本地镜像，与 NotionClient.sync_mirror 相同
+
+        Args:
+            full: 是否全量同步
+
+        Returns:
+            Dict[str, int]: 更新的页面数（updated）、删除的页面数（deleted）和正文获取失败的页面数（failed）
+        """
+        sync = self.client._mirror_sync_query(full)
+        entries = [entry async for entry in self._iter_query(sync["query"], raise_errors=True)]
+        # 从正文读取饮食信息时需要获取块树，在线程池中执行
+        return await asyncio.get_event_loop().run_in_executor(None, self.client._apply_mirror_sync, sync, entries)
+
+    async def _ensure_mirror(self, force: bool = False) -> bool:
+        """
+        距离上次同步超过 mirror_sync_interval 时增量同步镜像，与 NotionClient._ensure_mirror 相同
+
+        Args:
+            force: 是否忽略同步间隔强制同步，写入前使用
+
+        Returns:
+            bool: 镜像是否已是最新（本次同步成功或在同步间隔内）
+        """
+        self._get_http()
+        async with self._mirror_lock:
+            if not force and time.time() - self.client._mirror_checked_at < self.client.mirror_sync_interval:
+                return True
+            try:
+                await self.sync_mirror()
+            except Exception as e:
+                print(f"同步Notion镜像失败: {e!r}")
+                return False
+            self.client._mirror_checked_at = time.time()
+            return True
+
+    async def get_food_data(self, date: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        获取指定日期的饮食数据
+
+        Args:
+            date: 日期，默认为今天
+
+        Returns:
+            Dict[str, Any]: 饮食数据字典
+        """
+        if date is None:
+            date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        data = await self.get_food_data_range(date, date)
+        if not data:
+            return {"date": date.strftime("%Y-%m-%d"), "items": []}
+        # 同一天有多个日记条目时为最后编辑的条目
+        return {"date": date.strftime("%Y-%m-%d"), "items": data[0]["items"]}
+
+    async def get_food_data_range(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+        """
+        获取指定日期范围内的饮食数据，相同日期范围的并发请求合并为一次
+
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            List[Dict[str, Any]]: 饮食数据列表
+        """
+        key = ("food_range", start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
+        return await self._single_flight.do(key, self._get_food_data_range, start_date, end_date)
+
+    async def _get_food_data_range(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+        # 使用本地镜像
+        if self.client.mirror is not None:
+            await self._ensure_mirror()
+            pages = self.client.mirror.get_range(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
+            return [{"date": page["date"], "items": page["food_items"]} for page in pages]
+
+        entries = await self._query_diary_entries(start_date, end_date)
+        # 读取正文时需要获取块树（同步请求），整个提取过程在线程池中执行，不阻塞事件循环
+        return await asyncio.get_event_loop().run_in_executor(None, self.client._food_data_from_entries, entries)
+
+    async def _find_page_id(self, date: datetime) -> Optional[str]:
+        """
+        查找某一天已有的日记页面，有本地镜像时先增量同步再从镜像查找
+
+        Args:
+            date: 日期
+
+        Returns:
+            Optional[str]: 最后编辑的页面ID，没有页面时返回None
+
+        Raises:
+            RuntimeError: 镜像同步失败或查询失败，无法确定是否已有页面
+        """
+        if self.client.mirror is not None:
+            if not await self._ensure_mirror(force=True):
+                raise RuntimeError("无法同步Notion镜像")
+            return self.client.mirror.page_id_for_date(date.strftime("%Y-%m-%d"))
+        entries = await self._query_diary_entries(date, date, raise_errors=True)
+        return entries[0].get("id") if entries else None
+
+    async def create_diary_entry(self, date: datetime, food_items: List[str]) -> bool:
+        """
+        创建或更新日记条目
+
+        创建页面的请求遇到服务端错误或连接中断时可能已经生效，重新查询该日期后再决定更新还是重新创建，
+        避免产生重复页面。
+
+        Args:
+            date: 日期
+            food_items: 饮食项目列表
+
+        Returns:
+            bool: 是否成功
+        """
+        properties = self.client._build_properties(date, food_items)
+        max_retries = self.client.max_retries
+
+        for attempt in range(max_retries + 1):
+            # 检查是否已存在该日期的条目
+            try:
+                page_id = await self._find_page_id(date)
+            except Exception as e:
+                # 无法确定已有页面时不写入，避免创建重复页面
+                print(f"查询已有日记条目失败，未写入日记条目: {e!r}")
+                return False
+
+            response = None
+            try:
+                if page_id:
+                    # 更新现有条目
+                    response = await self._request("PATCH", f"/pages/{page_id}", json={"properties": properties})
+                else:
+                    # 创建新条目
+                    response = await self._request(
+                        "POST",
+                        "/pages",
+                        json={"parent": {"database_id": self.client.database_id}, "properties": properties}
+                    )
+            except httpx.TransportError as e:
+                if page_id or attempt >= max_retries:
+                    print(f"Notion API请求失败: {e!r}")
+                    return False
+                print(f"创建日记条目失败，重新查询后重试: {e!r}")
+            except Exception as e:
+                print(f"Notion API请求失败: {e!r}")
+                return False
+
+            if response is not None:
+                if response.status_code in [200, 201]:
+                    # 写入本地镜像
+                    if self.client.mirror is not None:
+                        page = await asyncio.get_event_loop().run_in_executor(
+                            None, self.client._to_mirror_page, response.json()
+                        )
+                        self.client.mirror.upsert_pages([page])
+                    return True
+                if page_id or response.status_code not in RETRY_STATUS_CODES or attempt >= max_retries:
+                    print(f"创建/更新日记条目失败: HTTP {response.status_code}, {response.text}")
+                    return False
+                print(f"创建日记条目失败: HTTP {response.status_code}，重新查询后重试")
+
+            # 创建请求可能已经生效，等待后重新查询该日期
+            wait_time = float(response.headers.get("Retry-After", 2 ** attempt)) if response is not None else 2 ** attempt
+            await asyncio.sleep(wait_time)
+        return False
+
+    async def close(self):
+        """
+        关闭连接池和同步客户端
+        """
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        self.client.close()
@@ -0,0 +1,118 @@
+from typing import Dict, Any, List, Optional
+
+# 标题块的类型及级别
+HEADING_LEVELS = {"heading_1": 1, "heading_2": 2, "heading_3": 3}
+
+# 作为饮食项目读取的块类型
+ITEM_BLOCK_TYPES = ("bulleted_list_item", "numbered_list_item", "to_do", "paragraph")
+
+# 子块不属于当前页面内容的块类型，不递归获取
+SKIP_CHILDREN_TYPES = ("child_page", "child_database")
+
+# 标题中包含这些关键词时视为一个餐次
+MEAL_KEYWORDS = ("早餐", "早饭", "午餐", "午饭", "晚餐", "晚饭", "加餐", "夜宵", "零食", "饮食",
+                 "breakfast", "lunch", "dinner", "snack", "meal")
+
+
+def block_text(block: Dict[str, Any]) -> str:
+    """
+    获取块的纯文本内容
+
+    Args:
+        block: Notion块对象
+
+    Returns:
+        str: 文本内容，没有文本的块返回空字符串
+    """
+    content = block.get(block.get("type", ""), {})
+    if not isinstance(content, dict):
+        return ""
+    return "".join(text.get("plain_text", "") for text in content.get("rich_text", []))
+
+
+def compact_block(block: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    只保留解析饮食信息需要的字段（id、类型、纯文本），减小块树缓存的体积
+
+    Args:
+        block: Notion块对象
+
+    Returns:
+        Dict[str, Any]: 精简后的块对象
+    """
+    block_type = block.get("type", "")
+    return {
+        "id": block.get("id"),
+        "type": block_type,
+        "has_children": block.get("has_children", False),
+        block_type: {"rich_text": [{"plain_text": block_text(block)}]}
+    }
+
+
+def meal_name(text: str) -> Optional[str]:
+    """
+    判断标题是否为餐次标题
+
+    Args:
+        text: 标题文本
+
+    Returns:
+        Optional[str]: 餐次名称（去掉首尾空白的标题），不是餐次标题时返回None
+    """
+    text = text.strip()
+    lowered = text.lower()
+    if text and any(keyword in lowered for keyword in MEAL_KEYWORDS):
+        return text
+    return None
+
+
+def extract_meals(blocks: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """
+    从页面块树中提取各餐次的饮食项目
+
+    餐次标题之后的列表、待办和段落块都属于该餐次，直到出现同级或更高级的其他标题；
+    可折叠标题和嵌套列表的子块同样读取。
+
+    Args:
+        blocks: 块树，子块保存在每个块的 children 字段中
+
+    Returns:
+        Dict[str, List[str]]: 按页面顺序排列的餐次名称到饮食项目列表的映射
+    """
+    meals: Dict[str, List[str]] = {}
+    section = {"meal": None, "level": None}
+
+    def walk(children: List[Dict[str, Any]]):
+        for block in children:
+            block_type = block.get("type")
+            if block_type in HEADING_LEVELS:
+                level = HEADING_LEVELS[block_type]
+                meal = meal_name(block_text(block))
+                if meal:
+                    section["meal"], section["level"] = meal, level
+                    meals.setdefault(meal, [])
+                elif section["meal"] and level <= section["level"]:
+                    section["meal"], section["level"] = None, None
+            elif section["meal"] and block_type in ITEM_BLOCK_TYPES:
+                meals[section["meal"]].extend(
+                    line.strip() for line in block_text(block).split("\n") if line.strip()
+                )
+
+            if block.get("children"):
+                walk(block["children"])
+
+    walk(blocks)
+    return meals
+
+
+def meal_items(meals: Dict[str, List[str]]) -> List[str]:
+    """
+    将各餐次的饮食项目展开为饮食项目列表，每项带有餐次名称
+
+    Args:
+        meals: extract_meals 的返回值
+
+    Returns:
+        List[str]: 饮食项目列表，如 "早餐: 燕麦"
+    """
+    return [f"{meal}: {item}" for meal, items in meals.items() for item in items]
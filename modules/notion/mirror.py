@@ -0,0 +1,170 @@
+from typing import Dict, Any, List, Optional
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class NotionMirror:
+    """
+    Notion日记数据库的本地镜像
+
+    按页面ID保存每个日记页面的日期、最后编辑时间和提取出的饮食信息，读取时不需要访问Notion。
+    同一天有多个页面时，读取和写入都使用最后编辑的页面。
+    """
+
+    def __init__(self, db_path: str):
+        """
+        初始化本地镜像
+
+        Args:
+            db_path: SQLite数据库文件路径
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "page_id TEXT PRIMARY KEY, "
+            "date TEXT, "
+            "last_edited_time TEXT NOT NULL, "
+            "food_items TEXT NOT NULL, "
+            "synced_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_date ON pages (date)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS mirror_meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS block_trees ("
+            "page_id TEXT PRIMARY KEY, "
+            "last_edited_time TEXT NOT NULL, "
+            "tree TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM mirror_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO mirror_meta (key, value) VALUES (?, ?)", (key, value))
+            self._conn.commit()
+
+    def upsert_pages(self, pages: List[Dict[str, Any]]):
+        """
+        批量写入或更新页面
+
+        Args:
+            pages: 页面列表，每项包含 page_id、date、last_edited_time、food_items
+        """
+        if not pages:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages (page_id, date, last_edited_time, food_items, synced_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (page["page_id"], page.get("date"), page["last_edited_time"],
+                     json.dumps(page.get("food_items", []), ensure_ascii=False), now)
+                    for page in pages
+                ]
+            )
+            self._conn.commit()
+
+    def get_block_tree(self, page_id: str, last_edited_time: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        读取缓存的页面块树，页面在缓存之后编辑过时视为未命中
+
+        Args:
+            page_id: 页面ID
+            last_edited_time: 页面当前的最后编辑时间
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: 块树，未命中时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tree FROM block_trees WHERE page_id = ? AND last_edited_time = ?", (page_id, last_edited_time)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_block_tree(self, page_id: str, last_edited_time: str, tree: List[Dict[str, Any]]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO block_trees (page_id, last_edited_time, tree) VALUES (?, ?, ?)",
+                (page_id, last_edited_time, json.dumps(tree, ensure_ascii=False))
+            )
+            self._conn.commit()
+
+    def delete_pages(self, page_ids: List[str]):
+        """
+        删除页面（在Notion中已删除或归档）
+
+        Args:
+            page_ids: 页面ID列表
+        """
+        if not page_ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM pages WHERE page_id = ?", [(page_id,) for page_id in page_ids])
+            self._conn.executemany("DELETE FROM block_trees WHERE page_id = ?", [(page_id,) for page_id in page_ids])
+            self._conn.commit()
+
+    def page_ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT page_id FROM pages").fetchall()]
+
+    def page_id_for_date(self, date_str: str) -> Optional[str]:
+        """
+        查找某一天的日记页面ID，有多个页面时返回最后编辑的页面
+
+        Args:
+            date_str: 日期字符串
+
+        Returns:
+            Optional[str]: 页面ID，不存在时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_id FROM pages WHERE date = ? ORDER BY last_edited_time DESC, page_id LIMIT 1", (date_str,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_range(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """
+        读取日期范围内（含两端）的日记页面，每天一个页面，有多个页面时使用最后编辑的页面（与 page_id_for_date 相同）
+
+        Args:
+            start_date: 开始日期字符串
+            end_date: 结束日期字符串
+
+        Returns:
+            List[Dict[str, Any]]: 按日期排序的页面列表，每项包含 page_id、date、last_edited_time、food_items
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page_id, date, last_edited_time, food_items FROM pages "
+                "WHERE date BETWEEN ? AND ? ORDER BY date, last_edited_time DESC, page_id",
+                (start_date, end_date)
+            ).fetchall()
+        pages = []
+        for page_id, date_str, last_edited_time, food_items in rows:
+            if pages and pages[-1]["date"] == date_str:
+                continue
+            pages.append({"page_id": page_id, "date": date_str, "last_edited_time": last_edited_time,
+                          "food_items": json.loads(food_items)})
+        return pages
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
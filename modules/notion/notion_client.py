@@ -1,7 +1,25 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterator, Tuple, Set
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import os
+import threading
+import time
 from datetime import datetime, timedelta
+from ..utils.single_flight import SingleFlight, single_flight
+from ..utils.rate_limiter import get_rate_limiter
+from .mirror import NotionMirror
+from .blocks import SKIP_CHILDREN_TYPES, compact_block, extract_meals, meal_items
+
+# Notion数据库查询单页最多返回100条
+MAX_PAGE_SIZE = 100
+
+# 按日期查询日记条目时的排序：同一天有多个页面时最后编辑的页面排在前面，读取和写入都使用这个页面
+DIARY_QUERY_SORTS = [
+    {"property": "Date", "direction": "ascending"},
+    {"timestamp": "last_edited_time", "direction": "descending"}
+]
 
 class NotionClient:
     """
@@ -18,7 +36,13 @@ class NotionClient:
         self.api_key = config.get('api_key')
         self.database_id = config.get('database_id')
         self.food_property_name = config.get('food_property_name', '饮食')
-        self.page_size = config.get('page_size', 10)
+        # 饮食信息来源：property（页面属性）、body（页面正文块）、auto（属性为空时读取正文）
+        self.food_source = config.get('food_source', 'auto')
+        self.block_concurrency = max(1, int(config.get('block_concurrency', 3)))  # 并发获取子块的请求数
+        self.page_size = min(int(config.get('page_size', MAX_PAGE_SIZE)), MAX_PAGE_SIZE)
+        self.max_retries = config.get('max_retries', 3)
+        self.timeout = config.get('timeout', 30)  # 单次请求的超时时间（秒）
+        self.write_concurrency = max(1, int(config.get('write_concurrency', 3)))  # 批量写入时的并发请求数
         
         # 设置API请求头
         self.headers = {
@@ -29,17 +53,78 @@ class NotionClient:
         
         # API端点
         self.base_url = "https://api.notion.com/v1"
+        
+        # 复用连接的会话，避免每次请求重新建立TCP/TLS连接
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=config.get('pool_size', 10))
+        self.session.mount("https://", adapter)
+        
+        # Notion平均每秒允许约3个请求，同一数据库的所有请求共用一个限流器
+        self.rate_limiter = get_rate_limiter(
+            f"notion:{self.database_id}",
+            dict({'rate': 3.0, 'burst': 3, 'backoff_base': 1.0}, **(config.get('rate_limit') or {}))
+        )
+        
+        # 合并相同日期范围的并发查询
+        self._single_flight = SingleFlight()
+        
+        # 本地镜像：读取饮食数据时只同步Notion中有修改的页面，然后从本地读取
+        self.use_mirror = config.get('use_mirror', True)
+        self.mirror_sync_interval = config.get('mirror_sync_interval', 300)  # 读取时两次增量同步的最短间隔（秒），写入前总是先同步
+        self.mirror_full_sync_interval = config.get('mirror_full_sync_interval', 86400)  # 全量同步（清理已删除页面）的间隔
+        self.mirror = None
+        self._block_trees = {}  # 页面ID -> (最后编辑时间, 块树)，没有本地镜像时使用的内存缓存
+        self._block_executor = None
+        self._block_lock = threading.Lock()
+        self._mirror_lock = threading.Lock()
+        self._mirror_checked_at = 0.0
+        if self.use_mirror:
+            mirror_path = config.get('mirror_path') or os.path.join(
+                os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'cache', 'notion_mirror.db'
+            )
+            self.mirror = NotionMirror(mirror_path)
     
-    def get_diary_entries(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
         """
-        获取指定日期范围内的日记条目
+        发送Notion API请求，请求前获取限流令牌，被限流（HTTP 429）时按Retry-After等待后重试
         
         Args:
-            start_date: 开始日期，默认为今天
-            end_date: 结束日期，默认为今天
+            method: HTTP方法
+            path: API路径，如 /pages
+            **kwargs: 传给requests的参数
             
         Returns:
-            List[Dict[str, Any]]: 日记条目列表
+            requests.Response: 响应
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+            if response.status_code != 429:
+                self.rate_limiter.on_success()
+                return response
+            # 降低共享限流器的速率，其他并发请求也会暂停
+            self.rate_limiter.on_throttled()
+            if attempt >= self.max_retries:
+                return response
+            wait_time = float(response.headers.get("Retry-After", 2 ** attempt))
+            print(f"Notion API请求过多，等待{wait_time}秒后重试")
+            time.sleep(wait_time)
+        return response
+    
+    def iter_diary_entries(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                           raise_errors: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        逐条返回指定日期范围内的日记条目，自动翻页，每页到达后立即返回其中的条目
+        
+        Args:
+            start_date: 开始日期，默认为今天
+            end_date: 结束日期，默认为开始日期
+            raise_errors: 请求失败时是否抛出异常，默认打印错误并停止
+            
+        Yields:
+            Dict[str, Any]: 日记条目
         """
         # 设置默认日期为今天
         if start_date is None:
@@ -65,26 +150,376 @@ class NotionClient:
                     }
                 ]
             },
-            "page_size": self.page_size
+            "sorts": DIARY_QUERY_SORTS
         }
         
-        # 发送请求
-        try:
-            response = requests.post(
-                f"{self.base_url}/databases/{self.database_id}/query",
-                headers=self.headers,
-                json=filter_params
-            )
+        yield from self._iter_query(filter_params, raise_errors=raise_errors)
+    
+    def _iter_query(self, query: Dict[str, Any], raise_errors: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        分页查询日记数据库，逐条返回结果
+        
+        Args:
+            query: 查询参数（filter、sorts等）
+            raise_errors: 请求失败时是否抛出异常，默认打印错误并停止
             
-            # 检查响应
-            if response.status_code == 200:
-                return response.json().get("results", [])
+        Yields:
+            Dict[str, Any]: 页面对象
+        """
+        query = dict(query, page_size=self.page_size)
+        while True:
+            # 发送请求
+            try:
+                response = self._request(
+                    "POST",
+                    f"/databases/{self.database_id}/query",
+                    json=query
+                )
+                if response.status_code != 200:
+                    raise RuntimeError(f"HTTP {response.status_code}, {response.text}")
+            except Exception as e:
+                if raise_errors:
+                    raise
+                print(f"获取日记条目失败: {e}")
+                return
+            
+            data = response.json()
+            for entry in data.get("results", []):
+                yield entry
+            
+            # 继续获取下一页
+            if not data.get("has_more") or not data.get("next_cursor"):
+                return
+            query["start_cursor"] = data["next_cursor"]
+    
+    @single_flight
+    def get_diary_entries(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        获取指定日期范围内的全部日记条目
+        
+        Args:
+            start_date: 开始日期，默认为今天
+            end_date: 结束日期，默认为开始日期
+            
+        Returns:
+            List[Dict[str, Any]]: 日记条目列表
+        """
+        return list(self.iter_diary_entries(start_date, end_date))
+    
+    def _entry_date(self, entry: Dict[str, Any]) -> Optional[str]:
+        """
+        获取日记条目的日期，没有日期时返回None
+        
+        Args:
+            entry: Notion页面对象
+            
+        Returns:
+            Optional[str]: 日期字符串，格式为YYYY-MM-DD
+        """
+        date_value = (entry.get("properties", {}).get("Date", {}).get("date") or {}).get("start")
+        return date_value.split("T")[0] if date_value else None
+    
+    def _to_mirror_page(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        将Notion页面对象转换为镜像中保存的结构
+        
+        Args:
+            entry: Notion页面对象
+            
+        Returns:
+            Dict[str, Any]: 包含 page_id、date、last_edited_time、food_items 的字典
+        """
+        return {
+            "page_id": entry.get("id"),
+            "date": self._entry_date(entry),
+            "last_edited_time": entry.get("last_edited_time", ""),
+            "food_items": self._page_food_items(entry)
+        }
+    
+    def _fetch_children(self, block_id: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        分页获取一个块（或页面）的全部直接子块
+        
+        Args:
+            block_id: 块ID或页面ID
+            
+        Returns:
+            Optional[List[Dict[str, Any]]]: 子块列表，请求失败时返回None
+        """
+        children = []
+        params = {"page_size": MAX_PAGE_SIZE}
+        while True:
+            try:
+                response = self._request("GET", f"/blocks/{block_id}/children", params=params)
+                if response.status_code != 200:
+                    raise RuntimeError(f"HTTP {response.status_code}, {response.text}")
+            except Exception as e:
+                print(f"获取子块失败: {e}")
+                return None
+            
+            data = response.json()
+            children.extend(data.get("results", []))
+            if not data.get("has_more") or not data.get("next_cursor"):
+                return children
+            params["start_cursor"] = data["next_cursor"]
+    
+    def _cached_block_tree(self, page_id: str, last_edited_time: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        if not last_edited_time:
+            return None
+        cached = self._block_trees.get(page_id)
+        if cached and cached[0] == last_edited_time:
+            return cached[1]
+        if self.mirror is not None:
+            return self.mirror.get_block_tree(page_id, last_edited_time)
+        return None
+    
+    def get_block_trees(self, pages: List[Tuple[str, Optional[str]]]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        获取多个页面的块树
+        
+        按层遍历：同一层所有块的子块并发获取（并发数为 block_concurrency），请求经过共享限流器。
+        块树按（页面ID, 最后编辑时间）缓存，页面未编辑过时直接返回缓存。
+        
+        Args:
+            pages: (页面ID, 最后编辑时间) 列表，最后编辑时间为None时不使用缓存
+            
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: 页面ID到块树的映射，子块保存在每个块的 children 字段中
+        """
+        return self._get_block_trees(pages)[0]
+    
+    def _get_block_trees(self, pages: List[Tuple[str, Optional[str]]]) -> Tuple[Dict[str, List[Dict[str, Any]]], Set[str]]:
+        """
+        获取多个页面的块树，同时返回有子块获取失败的页面
+        
+        Args:
+            pages: (页面ID, 最后编辑时间) 列表
+            
+        Returns:
+            Tuple[Dict[str, List[Dict[str, Any]]], Set[str]]: 页面ID到块树的映射，以及块树不完整的页面ID
+        """
+        result = {}
+        failed_pages = set()
+        missing = []
+        for page_id, last_edited_time in pages:
+            tree = self._cached_block_tree(page_id, last_edited_time)
+            if tree is not None:
+                result[page_id] = tree
             else:
-                print(f"获取日记条目失败: HTTP {response.status_code}, {response.text}")
+                missing.append((page_id, last_edited_time))
+        if not missing:
+            return result, failed_pages
+        
+        with self._block_lock:
+            if self._block_executor is None:
+                self._block_executor = ThreadPoolExecutor(max_workers=self.block_concurrency,
+                                                          thread_name_prefix="notion-blocks")
+        
+        # 逐层并发获取子块
+        children = {}
+        frontier = [page_id for page_id, _ in missing]
+        while frontier:
+            fetched = list(self._block_executor.map(self._fetch_children, frontier))
+            next_frontier = []
+            for block_id, blocks in zip(frontier, fetched):
+                children[block_id] = blocks
+                for block in blocks or []:
+                    if block.get("has_children") and block.get("type") not in SKIP_CHILDREN_TYPES:
+                        next_frontier.append(block["id"])
+            frontier = next_frontier
+        
+        def build(block_id: str, failed: List[str]) -> List[Dict[str, Any]]:
+            blocks = children.get(block_id)
+            if blocks is None:
+                failed.append(block_id)
                 return []
-        except Exception as e:
-            print(f"Notion API请求失败: {e}")
-            return []
+            tree = []
+            for block in blocks:
+                node = compact_block(block)
+                if block["id"] in children:
+                    node["children"] = build(block["id"], failed)
+                tree.append(node)
+            return tree
+        
+        for page_id, last_edited_time in missing:
+            failed = []
+            tree = build(page_id, failed)
+            result[page_id] = tree
+            # 有子块获取失败时不缓存，下次重新获取
+            if failed:
+                failed_pages.add(page_id)
+                continue
+            if not last_edited_time:
+                continue
+            self._block_trees[page_id] = (last_edited_time, tree)
+            if self.mirror is not None:
+                self.mirror.put_block_tree(page_id, last_edited_time, tree)
+        
+        return result, failed_pages
+    
+    def get_block_tree(self, page_id: str, last_edited_time: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        获取页面的块树
+        
+        Args:
+            page_id: 页面ID
+            last_edited_time: 页面最后编辑时间，用于判断缓存是否有效
+            
+        Returns:
+            List[Dict[str, Any]]: 块树
+        """
+        return self.get_block_trees([(page_id, last_edited_time)])[page_id]
+    
+    def _needs_body(self, entry: Dict[str, Any]) -> bool:
+        if self.food_source == "body":
+            return True
+        return self.food_source == "auto" and not self._extract_food_items(entry)
+    
+    def _prefetch_block_trees(self, entries: List[Dict[str, Any]]) -> Set[str]:
+        """
+        并发获取需要从正文读取饮食信息的页面的块树
+        
+        Args:
+            entries: 页面对象列表
+            
+        Returns:
+            Set[str]: 块树获取失败（不完整）的页面ID
+        """
+        pages = [(entry["id"], entry.get("last_edited_time")) for entry in entries
+                 if entry.get("id") and self._needs_body(entry)]
+        if pages:
+            return self._get_block_trees(pages)[1]
+        return set()
+    
+    def _page_food_items(self, entry: Dict[str, Any]) -> List[str]:
+        """
+        按 food_source 从页面属性或正文中提取饮食信息
+        
+        Args:
+            entry: 页面对象
+            
+        Returns:
+            List[str]: 饮食项目列表，从正文读取时每项带有餐次名称，如 "早餐: 燕麦"
+        """
+        if not entry.get("id") or not self._needs_body(entry):
+            return self._extract_food_items(entry)
+        tree = self.get_block_tree(entry["id"], entry.get("last_edited_time"))
+        return meal_items(extract_meals(tree))
+    
+    def _mirror_sync_query(self, full: bool = False) -> Dict[str, Any]:
+        """
+        构建镜像同步的查询，默认只查询上次同步之后编辑过的页面
+        
+        Args:
+            full: 是否全量同步；从未同步或距离上次全量同步超过 mirror_full_sync_interval 时自动全量同步
+            
+        Returns:
+            Dict[str, Any]: 查询参数（query）、是否全量同步（full）、同步前的水位（watermark）和开始时间（started_at）
+        """
+        watermark = self.mirror.get_meta("last_edited_time")
+        last_full_sync = float(self.mirror.get_meta("last_full_sync") or 0)
+        if not watermark or time.time() - last_full_sync > self.mirror_full_sync_interval:
+            full = True
+        
+        query = {"sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}]}
+        if not full:
+            # Notion的last_edited_time精确到分钟，使用on_or_after重新获取同一分钟内编辑的页面
+            query["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": watermark}}
+        
+        return {"query": query, "full": full, "watermark": watermark, "started_at": time.time()}
+    
+    def _mirror_pages(self, entries: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+        """
+        将查询返回的页面转换为镜像中保存的结构，需要读取正文时先并发获取块树
+        
+        Args:
+            entries: 页面对象列表
+            
+        Returns:
+            Tuple[List[Dict[str, Any]], Dict[str, str]]: 镜像页面列表，以及正文获取失败的页面ID到最后编辑时间的映射
+                （这些页面不在镜像页面列表中）
+        """
+        entries = [entry for entry in entries if not entry.get("archived") and not entry.get("in_trash")]
+        failed_ids = self._prefetch_block_trees(entries)
+        failed = {entry["id"]: entry.get("last_edited_time", "") for entry in entries if entry.get("id") in failed_ids}
+        if failed:
+            print(f"获取{len(failed)}个页面的正文失败，下次同步重新获取")
+        pages = [self._to_mirror_page(entry) for entry in entries if entry.get("id") not in failed]
+        return pages, failed
+    
+    def _apply_mirror_sync(self, sync: Dict[str, Any], entries: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        将同步查询返回的页面写入镜像，全量同步时删除Notion中已不存在的页面
+        
+        正文获取失败的页面不写入镜像（保留镜像中原有的内容），水位停在这些页面的最后编辑时间之前，
+        下次增量同步会重新获取。
+        
+        Args:
+            sync: _mirror_sync_query 的返回值
+            entries: 查询返回的全部页面对象
+            
+        Returns:
+            Dict[str, int]: 更新的页面数（updated）、删除的页面数（deleted）和正文获取失败的页面数（failed）
+        """
+        pages, failed = self._mirror_pages(entries)
+        self.mirror.upsert_pages(pages)
+        
+        deleted = []
+        if sync["full"]:
+            # 正文获取失败的页面仍存在于Notion中，不删除
+            seen = {page["page_id"] for page in pages} | set(failed)
+            deleted = [page_id for page_id in self.mirror.page_ids() if page_id not in seen]
+            self.mirror.delete_pages(deleted)
+            self.mirror.set_meta("last_full_sync", str(sync["started_at"]))
+        
+        edited_times = [page["last_edited_time"] for page in pages]
+        if failed:
+            ceiling = min(failed.values())
+            edited_times = [edited_time for edited_time in edited_times if edited_time < ceiling]
+        if edited_times:
+            latest = max(edited_times)
+            if not sync["watermark"] or latest > sync["watermark"]:
+                self.mirror.set_meta("last_edited_time", latest)
+        
+        return {"updated": len(pages), "deleted": len(deleted), "failed": len(failed)}
+    
+    def sync_mirror(self, full: bool = False) -> Dict[str, int]:
+        """
+        同步本地镜像，默认只获取上次同步之后编辑过的页面
+        
+        Args:
+            full: 是否全量同步，全量同步会删除镜像中Notion已不存在的页面
+            
+        Returns:
+            Dict[str, int]: 更新的页面数（updated）、删除的页面数（deleted）和正文获取失败的页面数（failed）
+        """
+        sync = self._mirror_sync_query(full)
+        entries = list(self._iter_query(sync["query"], raise_errors=True))
+        return self._apply_mirror_sync(sync, entries)
+    
+    def _ensure_mirror(self, force: bool = False) -> bool:
+        """
+        距离上次同步超过 mirror_sync_interval 时增量同步镜像
+        
+        读取时同步失败可以继续使用本地数据；写入前需要传入force强制同步，
+        同步失败时不能根据镜像判断页面是否已存在（其他进程可能刚创建了页面），调用方不应写入。
+        
+        Args:
+            force: 是否忽略同步间隔强制同步
+            
+        Returns:
+            bool: 镜像是否已是最新（本次同步成功或在同步间隔内）
+        """
+        with self._mirror_lock:
+            if not force and time.time() - self._mirror_checked_at < self.mirror_sync_interval:
+                return True
+            try:
+                self.sync_mirror()
+            except Exception as e:
+                print(f"同步Notion镜像失败: {e}")
+                return False
+            self._mirror_checked_at = time.time()
+            return True
     
     def get_food_data(self, date: Optional[datetime] = None) -> Dict[str, Any]:
         """
@@ -100,6 +535,11 @@ class NotionClient:
         if date is None:
             date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         
+        # 使用本地镜像
+        if self.mirror is not None:
+            data = self.get_food_data_range(date, date)
+            return data[0] if data else {"date": date.strftime("%Y-%m-%d"), "items": []}
+        
         # 获取日记条目
         entries = self.get_diary_entries(date, date)
         
@@ -107,20 +547,21 @@ class NotionClient:
         if not entries:
             return {"date": date.strftime("%Y-%m-%d"), "items": []}
         
-        # 提取第一个条目（假设每天只有一个日记条目）
+        # 提取第一个条目（同一天有多个条目时为最后编辑的条目）
         entry = entries[0]
         
         # 提取饮食信息
-        food_items = self._extract_food_items(entry)
+        food_items = self._page_food_items(entry)
         
         return {
             "date": date.strftime("%Y-%m-%d"),
             "items": food_items
         }
     
+    @single_flight
     def get_food_data_range(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
         """
-        获取指定日期范围内的饮食数据
+        获取指定日期范围内的饮食数据，相同日期范围的并发请求（包括正文块的获取）合并为一次
         
         Args:
             start_date: 开始日期
@@ -129,17 +570,42 @@ class NotionClient:
         Returns:
             List[Dict[str, Any]]: 饮食数据列表
         """
-        # 获取日记条目
-        entries = self.get_diary_entries(start_date, end_date)
+        # 使用本地镜像
+        if self.mirror is not None:
+            self._ensure_mirror()
+            pages = self.mirror.get_range(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
+            return [{"date": page["date"], "items": page["food_items"]} for page in pages]
+        
+        # 逐页获取日记条目并提取每个条目的饮食信息
+        return self._food_data_from_entries(list(self.iter_diary_entries(start_date, end_date)))
+    
+    def _food_data_from_entries(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        提取日记条目的日期和饮食信息，需要读取正文时先并发获取全部页面的块树
         
-        # 提取每个条目的饮食信息
+        Args:
+            entries: 按 DIARY_QUERY_SORTS 排序的日记条目列表，同一天只使用第一个（最后编辑的）条目
+            
+        Returns:
+            List[Dict[str, Any]]: 饮食数据列表，每天一项
+        """
+        seen = set()
+        unique_entries = []
+        for entry in entries:
+            date_str = self._extract_date(entry)
+            if date_str not in seen:
+                seen.add(date_str)
+                unique_entries.append(entry)
+        entries = unique_entries
+        
+        self._prefetch_block_trees(entries)
         result = []
         for entry in entries:
             # 提取日期
             date_str = self._extract_date(entry)
             
             # 提取饮食信息
-            food_items = self._extract_food_items(entry)
+            food_items = self._page_food_items(entry)
             
             result.append({
                 "date": date_str,
@@ -223,19 +689,18 @@ class NotionClient:
             print(f"提取饮食信息失败: {e}")
             return []
     
-    def create_diary_entry(self, date: datetime, food_items: List[str]) -> bool:
+    def _build_properties(self, date: datetime, food_items: List[str]) -> Dict[str, Any]:
         """
-        创建或更新日记条目
+        构建日记页面属性
         
         Args:
             date: 日期
             food_items: 饮食项目列表
             
         Returns:
-            bool: 是否成功
+            Dict[str, Any]: 页面属性
         """
-        # 构建页面属性
-        properties = {
+        return {
             "Date": {  # 假设日期属性名为"Date"
                 "date": {
                     "start": date.strftime("%Y-%m-%d")
@@ -252,24 +717,34 @@ class NotionClient:
                 ]
             }
         }
+    
+    def _write_diary_entry(self, date: datetime, food_items: List[str], page_id: Optional[str]) -> bool:
+        """
+        更新已有的日记页面，或在page_id为空时创建新页面
         
-        # 检查是否已存在该日期的条目
-        entries = self.get_diary_entries(date, date)
+        Args:
+            date: 日期
+            food_items: 饮食项目列表
+            page_id: 已有页面的ID
+            
+        Returns:
+            bool: 是否成功
+        """
+        properties = self._build_properties(date, food_items)
         
         try:
-            if entries:
+            if page_id:
                 # 更新现有条目
-                page_id = entries[0].get("id")
-                response = requests.patch(
-                    f"{self.base_url}/pages/{page_id}",
-                    headers=self.headers,
+                response = self._request(
+                    "PATCH",
+                    f"/pages/{page_id}",
                     json={"properties": properties}
                 )
             else:
                 # 创建新条目
-                response = requests.post(
-                    f"{self.base_url}/pages",
-                    headers=self.headers,
+                response = self._request(
+                    "POST",
+                    "/pages",
                     json={
                         "parent": {"database_id": self.database_id},
                         "properties": properties
@@ -278,6 +753,9 @@ class NotionClient:
             
             # 检查响应
             if response.status_code in [200, 201]:
+                # 写入本地镜像
+                if self.mirror is not None:
+                    self.mirror.upsert_pages([self._to_mirror_page(response.json())])
                 return True
             else:
                 print(f"创建/更新日记条目失败: HTTP {response.status_code}, {response.text}")
@@ -285,4 +763,98 @@ class NotionClient:
         
         except Exception as e:
             print(f"Notion API请求失败: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def create_diary_entry(self, date: datetime, food_items: List[str]) -> bool:
+        """
+        创建或更新日记条目
+        
+        Args:
+            date: 日期
+            food_items: 饮食项目列表
+            
+        Returns:
+            bool: 是否成功
+        """
+        # 检查是否已存在该日期的条目，有本地镜像时先增量同步再从镜像查找
+        if self.mirror is not None:
+            if not self._ensure_mirror(force=True):
+                # 无法确定已有页面时不写入，避免创建重复页面
+                print("无法同步Notion镜像，未写入日记条目")
+                return False
+            page_id = self.mirror.page_id_for_date(date.strftime("%Y-%m-%d"))
+        else:
+            try:
+                entries = list(self.iter_diary_entries(date, date, raise_errors=True))
+            except Exception as e:
+                # 无法确定已有页面时不写入，避免创建重复页面
+                print(f"查询已有日记条目失败: {e}")
+                return False
+            page_id = entries[0].get("id") if entries else None
+        
+        return self._write_diary_entry(date, food_items, page_id)
+    
+    def create_diary_entries_bulk(self, entries: Dict[datetime, List[str]]) -> Dict[str, bool]:
+        """
+        批量创建或更新日记条目
+        
+        整个日期范围内已有页面的ID只查询一次（有本地镜像时先增量同步再从镜像读取），
+        然后并发发送创建/更新请求，并发数为 write_concurrency，所有请求经过共享限流器。
+        
+        Args:
+            entries: 日期到饮食项目列表的映射
+            
+        Returns:
+            Dict[str, bool]: 每个日期（YYYY-MM-DD）是否写入成功
+        """
+        if not entries:
+            return {}
+        
+        dates = sorted(entries)
+        start_str, end_str = dates[0].strftime("%Y-%m-%d"), dates[-1].strftime("%Y-%m-%d")
+        
+        # 一次查询整个日期范围内已有的页面
+        page_ids = {}
+        if self.mirror is not None:
+            if not self._ensure_mirror(force=True):
+                # 无法确定已有页面时不写入，避免创建重复页面
+                print("无法同步Notion镜像，未写入日记条目")
+                return {date.strftime("%Y-%m-%d"): False for date in dates}
+            # 同一天有多个页面时使用最后编辑的页面，与 create_diary_entry 一致
+            for page in self.mirror.get_range(start_str, end_str):
+                page_ids[page["date"]] = page["page_id"]
+        else:
+            try:
+                for entry in self.iter_diary_entries(dates[0], dates[-1], raise_errors=True):
+                    date_str = self._entry_date(entry)
+                    if date_str:
+                        # 查询结果中同一天最后编辑的页面排在前面
+                        page_ids.setdefault(date_str, entry.get("id"))
+            except Exception as e:
+                # 无法确定已有页面时不写入，避免创建重复页面
+                print(f"查询已有日记条目失败: {e}")
+                return {date.strftime("%Y-%m-%d"): False for date in dates}
+        
+        with ThreadPoolExecutor(max_workers=min(self.write_concurrency, len(dates))) as executor:
+            futures = {
+                date.strftime("%Y-%m-%d"): executor.submit(
+                    self._write_diary_entry, date, entries[date], page_ids.get(date.strftime("%Y-%m-%d"))
+                )
+                for date in dates
+            }
+            results = {date_str: future.result() for date_str, future in futures.items()}
+        
+        failed = sum(1 for success in results.values() if not success)
+        if failed:
+            print(f"批量写入日记条目: 成功{len(results) - failed}条，失败{failed}条")
+        return results
+    
+    def close(self):
+        """
+        关闭HTTP会话和本地镜像
+        """
+        self.session.close()
+        if self._block_executor is not None:
+            self._block_executor.shutdown(wait=False)
+        if self.mirror is not None:
+            self.mirror.close()
@@ -0,0 +1,7 @@
+# 数据同步模块初始化文件
+
+from .backfill import GarminBackfill, NotionBackfill, BACKFILL_METRICS, NOTION_BACKFILL_METRIC
+from .state import SyncState
+from .incremental import GarminSync
+
+__all__ = ['GarminBackfill', 'NotionBackfill', 'BACKFILL_METRICS', 'NOTION_BACKFILL_METRIC', 'SyncState', 'GarminSync']
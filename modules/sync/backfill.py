@@ -0,0 +1,310 @@
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from datetime import datetime, timedelta
+import json
+import os
+import time
+
+from ..garmin.cache_store import ENTRY_ERROR
+
+# 可回填的指标：名称 -> (缓存指标名, 是否按区间请求, 获取函数)
+# 按区间请求的指标每个分块只调用一次Garmin接口，其余指标逐日请求
+BACKFILL_METRICS: Dict[str, Tuple[str, bool, Callable]] = {
+    "activities": ("activities", True, lambda client, start, end: client.get_activities_range(start, end)),
+    "daily_steps": ("daily_steps", True, lambda client, start, end: client._get_steps_range(start, end)),
+    "weight": ("weight", True, lambda client, start, end: client.get_weigh_ins_range(start, end)),
+    "steps": ("steps", False, lambda client, day: client.get_steps_data(day)),
+    "heart_rate": ("heart_rate", False, lambda client, day: client.get_heart_rate(day)),
+    "sleep": ("sleep", False, lambda client, day: client.get_sleep_data(day)),
+    "stress": ("stress", False, lambda client, day: client.get_stress_data(day, False)),
+    "stats": ("stats", False, lambda client, day: client._get_daily_summary(day.strftime("%Y-%m-%d"))),
+}
+
+# 默认回填的指标（steps包含分时段数据，每天一次请求，需要时再显式指定）
+DEFAULT_BACKFILL_METRICS = ["activities", "daily_steps", "weight", "heart_rate", "sleep", "stress", "stats"]
+
+# 回填Notion日记（写入本地镜像）的指标名称
+NOTION_BACKFILL_METRIC = "notion"
+
+
+class CheckpointedBackfill:
+    """
+    分块回填的公共部分：每个分块完成后写入检查点，中断后再次运行同样的任务会从上次停下的位置继续
+    """
+
+    def __init__(self, checkpoint_path: str, chunk_days: int = 30):
+        """
+        初始化回填任务
+
+        Args:
+            checkpoint_path: 检查点文件路径
+            chunk_days: 每个分块的天数
+        """
+        self.checkpoint_path = checkpoint_path
+        self.chunk_days = max(1, int(chunk_days))
+
+    def _load_checkpoint(self, job: Dict[str, Any]) -> Optional[str]:
+        """
+        读取检查点，只有任务参数相同时才继续
+
+        Returns:
+            Optional[str]: 下一个要处理的日期，没有可用检查点时返回None
+        """
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except Exception as e:
+            print(f"读取回填检查点失败: {e}")
+            return None
+
+        if checkpoint.get("job") != job:
+            print("检查点属于其他回填任务，从头开始")
+            return None
+        return checkpoint.get("next_date")
+
+    def _save_checkpoint(self, job: Dict[str, Any], next_date: str, report: Dict[str, Any]):
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"job": job, "next_date": next_date, "report": report}, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _remove_checkpoint(self):
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def _update_throughput(self, report: Dict[str, Any], calls: int, started_at: float):
+        report["calls"] = calls
+        elapsed = max(time.time() - started_at, 1e-6)
+        report["elapsed"] = round(elapsed, 1)
+        report["days_per_sec"] = round(report["days"] / elapsed, 2)
+        report["calls_per_sec"] = round(report["calls"] / elapsed, 2)
+
+
+class GarminBackfill(CheckpointedBackfill):
+    """
+    Garmin历史数据回填
+
+    按分块遍历日期范围，每个分块完成后写入检查点，中断后再次运行同样的范围会从上次停下的位置继续。
+    已经在缓存中不可变（永不过期）的日期直接跳过；所有请求经过GarminClient的限流器。
+    """
+
+    def __init__(self, garmin_client, checkpoint_path: Optional[str] = None, chunk_days: int = 30):
+        """
+        初始化回填任务
+
+        Args:
+            garmin_client: GarminClient实例
+            checkpoint_path: 检查点文件路径，默认为缓存目录下的 backfill_checkpoint.json
+            chunk_days: 每个分块的天数
+        """
+        super().__init__(
+            checkpoint_path or os.path.join(garmin_client.cache_dir, 'backfill_checkpoint.json'), chunk_days
+        )
+        self.client = garmin_client
+
+    def _pending_dates(self, cache_metric: str, date_strs: List[str]) -> List[str]:
+        """
+        过滤掉缓存中已不可变的日期
+
+        Args:
+            cache_metric: 缓存指标名
+            date_strs: 日期字符串列表
+
+        Returns:
+            List[str]: 仍需请求的日期
+        """
+        entries = self.client.cache_store.get_entries(cache_metric, date_strs)
+        return [
+            date_str for date_str in date_strs
+            if date_str not in entries
+            or entries[date_str].expires_at is not None
+            or entries[date_str].kind == ENTRY_ERROR
+        ]
+
+    def fetch_metric(self, metric: str, date_strs: List[str]) -> Dict[str, Any]:
+        """
+        获取一个指标在若干连续日期的数据，缓存中已不可变的日期跳过
+
+        Args:
+            metric: 回填指标名称
+            date_strs: 按顺序排列的连续日期字符串
+
+        Returns:
+            Dict[str, Any]: 请求的天数（fetched）、跳过的天数（skipped）和失败的日期列表（failed_dates）
+        """
+        cache_metric, is_range, fetch = BACKFILL_METRICS[metric]
+        pending = self._pending_dates(cache_metric, date_strs)
+        result = {"fetched": 0, "skipped": len(date_strs) - len(pending), "failed_dates": []}
+        if not pending:
+            return result
+
+        if is_range:
+            fetch(self.client, datetime.strptime(pending[0], "%Y-%m-%d"), datetime.strptime(pending[-1], "%Y-%m-%d"))
+        else:
+            executor = self.client._get_executor()
+            futures = [executor.submit(fetch, self.client, datetime.strptime(date_str, "%Y-%m-%d")) for date_str in pending]
+            for future in futures:
+                future.result()
+
+        # 请求失败的日期在缓存中记录为错误条目，下次运行时会重新请求；
+        # 获取后缓存中仍没有条目的日期（如未登录时返回的默认数据）同样视为失败
+        entries = self.client.cache_store.get_entries(cache_metric, pending)
+        result["failed_dates"] = [
+            date_str for date_str in pending
+            if date_str not in entries or entries[date_str].kind == ENTRY_ERROR
+        ]
+        result["fetched"] = len(pending) - len(result["failed_dates"])
+        return result
+
+    def run(self, start_date: datetime, end_date: datetime, metrics: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        执行回填
+
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期（包含）
+            metrics: 要回填的指标，默认为 DEFAULT_BACKFILL_METRICS
+
+        Returns:
+            Dict[str, Any]: 回填报告，包含处理天数、跳过数、请求数、失败数和吞吐量
+
+        Raises:
+            RuntimeError: Garmin登录失败，此时不写入检查点
+        """
+        metrics = metrics or DEFAULT_BACKFILL_METRICS
+        unknown = [metric for metric in metrics if metric not in BACKFILL_METRICS]
+        if unknown:
+            raise ValueError(f"不支持的回填指标: {', '.join(unknown)}，可选: {', '.join(BACKFILL_METRICS)}")
+
+        job = {
+            "from": start_date.strftime("%Y-%m-%d"),
+            "to": end_date.strftime("%Y-%m-%d"),
+            "metrics": sorted(metrics)
+        }
+        report = {"days": 0, "fetched": 0, "skipped": 0, "failed": 0, "calls": 0}
+
+        resume_from = self._load_checkpoint(job)
+        current = start_date
+        if resume_from:
+            current = datetime.strptime(resume_from, "%Y-%m-%d")
+            print(f"从检查点继续回填: {resume_from}")
+
+        # 未登录时获取函数只返回默认数据，继续执行会把整个范围记为已完成
+        if self.client.client is None:
+            raise RuntimeError("Garmin登录失败，已停止回填")
+
+        calls_before = self.client.rate_limiter.calls
+        started_at = time.time()
+
+        while current <= end_date:
+            chunk_end = min(current + timedelta(days=self.chunk_days - 1), end_date)
+            days = self.client._iter_dates(current, chunk_end)
+            date_strs = [day.strftime("%Y-%m-%d") for day in days]
+
+            for metric in metrics:
+                result = self.fetch_metric(metric, date_strs)
+                report["skipped"] += result["skipped"]
+                report["fetched"] += result["fetched"]
+                report["failed"] += len(result["failed_dates"])
+
+            report["days"] += len(days)
+            self._update_throughput(report, self.client.rate_limiter.calls - calls_before, started_at)
+
+            current = chunk_end + timedelta(days=1)
+            self._save_checkpoint(job, current.strftime("%Y-%m-%d"), report)
+            print(f"已回填至 {date_strs[-1]}: {report['days']}天, 请求{report['calls']}次, "
+                  f"{report['days_per_sec']}天/秒, {report['calls_per_sec']}次/秒, 失败{report['failed']}")
+
+        # 全部完成后删除检查点
+        self._remove_checkpoint()
+
+        return report
+
+
+class NotionBackfill(CheckpointedBackfill):
+    """
+    Notion日记回填
+
+    按分块查询日期范围内的日记页面，提取饮食信息（需要时获取正文块树）后写入本地镜像，
+    之后查询这段时间的饮食数据只读取镜像。检查点与Garmin回填相同；镜像已完成过全量同步时
+    已包含所有日期，只做一次增量同步。页面的块树按最后编辑时间缓存在镜像中，未修改的页面不再获取正文。
+    """
+
+    def __init__(self, notion_client, checkpoint_path: Optional[str] = None, chunk_days: int = 30):
+        """
+        初始化回填任务
+
+        Args:
+            notion_client: 启用了本地镜像的NotionClient实例
+            checkpoint_path: 检查点文件路径，默认为镜像所在目录下的 notion_backfill_checkpoint.json
+            chunk_days: 每个分块的天数
+        """
+        if notion_client.mirror is None:
+            raise ValueError("Notion回填需要启用本地镜像（use_mirror）")
+        super().__init__(
+            checkpoint_path or os.path.join(
+                os.path.dirname(os.path.abspath(notion_client.mirror.db_path)), 'notion_backfill_checkpoint.json'
+            ),
+            chunk_days
+        )
+        self.client = notion_client
+
+    def run(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """
+        执行回填
+
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期（包含）
+
+        Returns:
+            Dict[str, Any]: 回填报告，fetched为写入镜像的页面数，failed为正文获取失败的页面数，其余与Garmin回填相同
+
+        Raises:
+            Exception: 查询Notion失败，此时检查点停在失败的分块之前
+        """
+        job = {
+            "source": "notion",
+            "from": start_date.strftime("%Y-%m-%d"),
+            "to": end_date.strftime("%Y-%m-%d")
+        }
+        report = {"days": 0, "fetched": 0, "skipped": 0, "failed": 0, "calls": 0}
+        calls_before = self.client.rate_limiter.calls
+        started_at = time.time()
+
+        mirror = self.client.mirror
+        if mirror.get_meta("last_full_sync") and mirror.get_meta("last_edited_time"):
+            # 全量同步过的镜像已包含所有日期，增量同步后整个范围都可以从镜像读取
+            result = self.client.sync_mirror()
+            report["days"] = report["skipped"] = (end_date - start_date).days + 1
+            report["fetched"] = result["updated"]
+            report["failed"] = result["failed"]
+            self._update_throughput(report, self.client.rate_limiter.calls - calls_before, started_at)
+            return report
+
+        resume_from = self._load_checkpoint(job)
+        current = start_date
+        if resume_from:
+            current = datetime.strptime(resume_from, "%Y-%m-%d")
+            print(f"从检查点继续回填: {resume_from}")
+
+        while current <= end_date:
+            chunk_end = min(current + timedelta(days=self.chunk_days - 1), end_date)
+            entries = list(self.client.iter_diary_entries(current, chunk_end, raise_errors=True))
+            pages, failed = self.client._mirror_pages(entries)
+            mirror.upsert_pages(pages)
+
+            report["fetched"] += len(pages)
+            report["failed"] += len(failed)
+            report["days"] += (chunk_end - current).days + 1
+            self._update_throughput(report, self.client.rate_limiter.calls - calls_before, started_at)
+
+            current = chunk_end + timedelta(days=1)
+            self._save_checkpoint(job, current.strftime("%Y-%m-%d"), report)
+            print(f"已回填Notion日记至 {chunk_end.strftime('%Y-%m-%d')}: {report['days']}天, "
+                  f"页面{report['fetched']}个, 请求{report['calls']}次, {report['days_per_sec']}天/秒, "
+                  f"失败{report['failed']}")
+
+        self._remove_checkpoint()
+        return report
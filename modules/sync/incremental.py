@@ -0,0 +1,113 @@
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta
+import time
+
+from .backfill import GarminBackfill, BACKFILL_METRICS, DEFAULT_BACKFILL_METRICS
+from .state import SyncState
+
+SOURCE_GARMIN = "garmin"
+
+
+class GarminSync:
+    """
+    Garmin增量同步
+
+    每个指标记录已完整同步到的日期（高水位），每次只请求高水位之后的日期，
+    另外重新检查最近几天（手表可能延迟同步），因此每天定时运行的工作量与历史长度无关。
+    """
+
+    def __init__(self, garmin_client, state: SyncState, recheck_days: int = 2, initial_days: int = 30):
+        """
+        初始化增量同步
+
+        Args:
+            garmin_client: GarminClient实例
+            state: 同步状态存储
+            recheck_days: 高水位之前重新检查的天数
+            initial_days: 从未同步过的指标首次同步的天数
+        """
+        self.client = garmin_client
+        self.state = state
+        self.recheck_days = max(0, int(recheck_days))
+        self.initial_days = max(1, int(initial_days))
+        self.fetcher = GarminBackfill(garmin_client)
+
+    def _sync_window(self, metric: str, today: datetime) -> datetime:
+        """
+        计算某个指标本次同步的开始日期
+
+        Args:
+            metric: 指标名称
+            today: 今天的日期
+
+        Returns:
+            datetime: 开始日期
+        """
+        state = self.state.get(SOURCE_GARMIN, metric)
+        if not state or not state.get("last_synced_date"):
+            return today - timedelta(days=self.initial_days - 1)
+
+        high_water = datetime.strptime(state["last_synced_date"], "%Y-%m-%d")
+        return min(high_water + timedelta(days=1), today) - timedelta(days=self.recheck_days)
+
+    def run(self, metrics: Optional[List[str]] = None, today: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        执行增量同步
+
+        Args:
+            metrics: 要同步的指标，默认为 DEFAULT_BACKFILL_METRICS
+            today: 今天的日期，默认为当前日期
+
+        Returns:
+            Dict[str, Any]: 每个指标的同步范围、请求数、失败数和新的高水位，以及总的Garmin调用次数
+
+        Raises:
+            RuntimeError: Garmin登录失败，此时不更新高水位也不使缓存过期
+        """
+        metrics = metrics or DEFAULT_BACKFILL_METRICS
+        unknown = [metric for metric in metrics if metric not in BACKFILL_METRICS]
+        if unknown:
+            raise ValueError(f"不支持的同步指标: {', '.join(unknown)}，可选: {', '.join(BACKFILL_METRICS)}")
+
+        # 未登录时获取函数只返回默认数据，继续执行会把高水位推进到昨天
+        if self.client.client is None:
+            raise RuntimeError("Garmin登录失败，已停止同步")
+
+        today = (today or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        calls_before = self.client.rate_limiter.calls
+        started_at = time.time()
+        report = {"metrics": {}}
+
+        for metric in metrics:
+            start = self._sync_window(metric, today)
+            days = self.client._iter_dates(start, today)
+            date_strs = [day.strftime("%Y-%m-%d") for day in days]
+
+            # 重新检查窗口内的缓存标记为过期，强制重新请求；过期数据在请求失败时仍可使用
+            cache_metric = BACKFILL_METRICS[metric][0]
+            self.client.cache_store.expire(cache_metric, date_strs)
+
+            result = self.fetcher.fetch_metric(metric, date_strs)
+
+            # 今天的数据还会变化，高水位最多到昨天；有失败的日期时高水位停在第一个失败日期之前
+            high_water = (today - timedelta(days=1)).strftime("%Y-%m-%d")
+            if result["failed_dates"]:
+                first_failed = datetime.strptime(result["failed_dates"][0], "%Y-%m-%d")
+                high_water = (first_failed - timedelta(days=1)).strftime("%Y-%m-%d")
+
+            previous = self.state.get(SOURCE_GARMIN, metric) or {}
+            if not previous.get("last_synced_date") or high_water >= date_strs[0]:
+                self.state.update(SOURCE_GARMIN, metric, last_synced_date=high_water,
+                                  last_modified=datetime.now().isoformat(timespec='seconds'))
+
+            report["metrics"][metric] = {
+                "from": date_strs[0],
+                "to": date_strs[-1],
+                "fetched": result["fetched"],
+                "failed": len(result["failed_dates"]),
+                "last_synced_date": (self.state.get(SOURCE_GARMIN, metric) or {}).get("last_synced_date")
+            }
+
+        report["calls"] = self.client.rate_limiter.calls - calls_before
+        report["elapsed"] = round(time.time() - started_at, 1)
+        return report
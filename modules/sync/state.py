@@ -0,0 +1,114 @@
+from typing import Dict, Any, List, Optional
+import os
+import sqlite3
+import threading
+import time
+
+
+class SyncState:
+    """
+    同步状态存储，按数据源和指标记录已完整同步到的日期（高水位）和最后修改时间
+
+    数据保存在SQLite数据库中，默认与Garmin缓存放在同一目录。
+    """
+
+    def __init__(self, db_path: str):
+        """
+        初始化同步状态存储
+
+        Args:
+            db_path: SQLite数据库文件路径
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sync_state ("
+            "source TEXT NOT NULL, "
+            "metric TEXT NOT NULL, "
+            "last_synced_date TEXT, "
+            "last_modified TEXT, "
+            "updated_at REAL NOT NULL, "
+            "PRIMARY KEY (source, metric))"
+        )
+        self._conn.commit()
+
+    def get(self, source: str, metric: str) -> Optional[Dict[str, Any]]:
+        """
+        读取某个指标的同步状态
+
+        Args:
+            source: 数据源，如garmin、notion
+            metric: 指标名称
+
+        Returns:
+            Optional[Dict[str, Any]]: 同步状态，从未同步过时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_synced_date, last_modified, updated_at FROM sync_state WHERE source = ? AND metric = ?",
+                (source, metric)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"last_synced_date": row[0], "last_modified": row[1], "updated_at": row[2]}
+
+    def update(self, source: str, metric: str, last_synced_date: Optional[str] = None,
+               last_modified: Optional[str] = None):
+        """
+        更新同步状态，参数为None的字段保持不变
+
+        Args:
+            source: 数据源
+            metric: 指标名称
+            last_synced_date: 已完整同步到的日期（YYYY-MM-DD）
+            last_modified: 数据源中最后修改的时间
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sync_state (source, metric, last_synced_date, last_modified, updated_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(source, metric) DO UPDATE SET "
+                "last_synced_date = COALESCE(excluded.last_synced_date, last_synced_date), "
+                "last_modified = COALESCE(excluded.last_modified, last_modified), "
+                "updated_at = excluded.updated_at",
+                (source, metric, last_synced_date, last_modified, time.time())
+            )
+            self._conn.commit()
+
+    def reset(self, source: str, metric: Optional[str] = None):
+        """
+        清除同步状态，下次同步时重新从初始范围开始
+
+        Args:
+            source: 数据源
+            metric: 指标名称，None表示该数据源的全部指标
+        """
+        with self._lock:
+            if metric is None:
+                self._conn.execute("DELETE FROM sync_state WHERE source = ?", (source,))
+            else:
+                self._conn.execute("DELETE FROM sync_state WHERE source = ? AND metric = ?", (source, metric))
+            self._conn.commit()
+
+    def all(self) -> List[Dict[str, Any]]:
+        """
+        列出全部同步状态
+
+        Returns:
+            List[Dict[str, Any]]: 每个数据源和指标的同步状态
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, metric, last_synced_date, last_modified, updated_at FROM sync_state ORDER BY source, metric"
+            ).fetchall()
+        return [
+            {"source": row[0], "metric": row[1], "last_synced_date": row[2], "last_modified": row[3], "updated_at": row[4]}
+            for row in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
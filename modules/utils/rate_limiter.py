@@ -0,0 +1,263 @@
+from typing import Dict, Any, Callable, Optional, Tuple, Type
+import asyncio
+import random
+import threading
+import time
+
+
+class RateLimitExceeded(Exception):
+    """
+    多次重试后仍被限流
+    """
+
+
+class AdaptiveRateLimiter:
+    """
+    自适应令牌桶限流器
+
+    每次调用前获取一个令牌；被限流时速率减半并按指数退避（带随机抖动）暂停所有调用，
+    连续成功后速率逐步恢复，直到配置的最大速率（加性增、乘性减）。
+    """
+
+    def __init__(self, rate: float = 2.0, burst: int = 5, min_rate: float = 0.1,
+                 increase_step: float = 0.05, decrease_factor: float = 0.5,
+                 backoff_base: float = 5.0, backoff_max: float = 300.0, jitter: float = 0.25,
+                 max_retries: int = 3):
+        """
+        初始化限流器
+
+        Args:
+            rate: 最大速率（每秒请求数），也是初始速率
+            burst: 令牌桶容量，允许的瞬时突发请求数
+            min_rate: 被限流后速率的下限
+            increase_step: 每次成功调用后速率增加的值
+            decrease_factor: 被限流时速率乘以的系数
+            backoff_base: 第一次被限流后的暂停时间（秒）
+            backoff_max: 连续被限流时暂停时间的上限（秒）
+            jitter: 暂停时间的随机抖动比例
+            max_retries: 被限流后的最大重试次数
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_rate = min_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.max_retries = max_retries
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._consecutive_throttles = 0
+
+        # 统计信息
+        self.calls = 0
+        self.throttled = 0
+        self.retries = 0
+        self.failures = 0
+        self.wait_seconds = 0.0
+
+    def _try_acquire(self, waited: float) -> float:
+        """
+        尝试获取一个令牌
+
+        Args:
+            waited: 本次获取已经等待的时间，获取成功时计入统计
+
+        Returns:
+            float: 获取成功时返回0，否则返回需要等待的时间（秒）
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.calls += 1
+                self.wait_seconds += waited
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """
+        获取一个令牌，必要时阻塞等待
+        """
+        waited = 0.0
+        while True:
+            delay = self._try_acquire(waited)
+            if delay <= 0:
+                return
+            time.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self):
+        """
+        获取一个令牌，等待时不阻塞事件循环；与同步调用共用同一个令牌桶
+        """
+        waited = 0.0
+        while True:
+            delay = self._try_acquire(waited)
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def on_success(self):
+        """
+        调用成功，逐步恢复速率
+        """
+        with self._lock:
+            self._consecutive_throttles = 0
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttled(self) -> float:
+        """
+        被限流，降低速率并暂停所有调用
+
+        Returns:
+            float: 暂停时间（秒）
+        """
+        with self._lock:
+            self.throttled += 1
+            self._consecutive_throttles += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+
+            backoff = min(self.backoff_max, self.backoff_base * (2 ** (self._consecutive_throttles - 1)))
+            backoff *= 1 + random.uniform(-self.jitter, self.jitter)
+            self._paused_until = max(self._paused_until, time.monotonic() + backoff)
+            self._tokens = 0.0
+            return backoff
+
+    def call(self, func: Callable, *args, throttle_errors: Tuple[Type[BaseException], ...] = (), **kwargs) -> Any:
+        """
+        限流执行调用，被限流时退避后重试
+
+        Args:
+            func: 要执行的函数
+            *args: 位置参数
+            throttle_errors: 表示被限流的异常类型
+            **kwargs: 关键字参数
+
+        Returns:
+            Any: 函数返回值
+
+        Raises:
+            RateLimitExceeded: 超过最大重试次数后仍被限流
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except throttle_errors as e:
+                backoff = self.on_throttled()
+                if attempt >= self.max_retries:
+                    with self._lock:
+                        self.failures += 1
+                    raise RateLimitExceeded(f"请求被限流，已重试{self.max_retries}次: {e}") from e
+                with self._lock:
+                    self.retries += 1
+                print(f"请求被限流，速率降至{self.rate:.2f}次/秒，{backoff:.1f}秒后重试: {e}")
+                continue
+            self.on_success()
+            return result
+
+    def configure(self, rate: float = 2.0, burst: int = 5, min_rate: float = 0.1,
+                  backoff_base: float = 5.0, backoff_max: float = 300.0, jitter: float = 0.25,
+                  max_retries: int = 3):
+        """
+        更新限流参数，保留令牌桶、暂停时间和统计信息
+
+        当前速率因被限流而低于原最大速率时保持不变（不超过新的最大速率），否则使用新的最大速率。
+
+        Args:
+            rate: 最大速率（每秒请求数）
+            burst: 令牌桶容量
+            min_rate: 被限流后速率的下限
+            backoff_base: 第一次被限流后的暂停时间（秒）
+            backoff_max: 连续被限流时暂停时间的上限（秒）
+            jitter: 暂停时间的随机抖动比例
+            max_retries: 被限流后的最大重试次数
+        """
+        with self._lock:
+            self.rate = rate if self.rate >= self.max_rate else max(min_rate, min(self.rate, rate))
+            self.max_rate = rate
+            self.burst = max(1, burst)
+            self._tokens = min(self._tokens, self.burst)
+            self.min_rate = min_rate
+            self.backoff_base = backoff_base
+            self.backoff_max = backoff_max
+            self.jitter = jitter
+            self.max_retries = max_retries
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取限流统计信息
+
+        Returns:
+            Dict[str, Any]: 调用次数、被限流次数、重试次数、最终失败次数、累计等待时间和当前速率
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "failures": self.failures,
+                "wait_seconds": round(self.wait_seconds, 2),
+                "rate": round(self.rate, 3),
+                "max_rate": self.max_rate,
+                "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 2)
+            }
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiter_params: Dict[str, Dict[str, Any]] = {}
+_limiters_lock = threading.Lock()
+
+
+def _params_from_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "rate": config.get('rate', 2.0),
+        "burst": config.get('burst', 5),
+        "min_rate": config.get('min_rate', 0.1),
+        "backoff_base": config.get('backoff_base', 5.0),
+        "backoff_max": config.get('backoff_max', 300.0),
+        "jitter": config.get('jitter', 0.25),
+        "max_retries": config.get('max_retries', 3)
+    }
+
+
+def get_rate_limiter(key: str, config: Optional[Dict[str, Any]] = None) -> AdaptiveRateLimiter:
+    """
+    获取共享的限流器，同一个key（如同一账号）在进程内共用一个限流器
+
+    配置与该限流器当前的配置不同时（如重新加载了配置文件），就地更新限流参数，已有的使用方同样生效。
+
+    Args:
+        key: 限流器标识
+        config: 限流配置（rate、burst、min_rate、backoff_base、backoff_max、jitter、max_retries），
+            为None时使用已有限流器的配置
+
+    Returns:
+        AdaptiveRateLimiter: 限流器
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is not None and config is None:
+            return limiter
+
+        params = _params_from_config(config or {})
+        if limiter is None:
+            limiter = AdaptiveRateLimiter(**params)
+            _limiters[key] = limiter
+        elif params != _limiter_params.get(key):
+            print(f"限流配置已变化，更新限流器{key}: {params}")
+            limiter.configure(**params)
+        _limiter_params[key] = params
+        return limiter
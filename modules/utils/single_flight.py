@@ -0,0 +1,164 @@
+from typing import Dict, Any, Callable, Hashable
+from datetime import date
+import asyncio
+import functools
+import inspect
+import threading
+
+
+class _Call:
+    """
+    一次正在执行的调用
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    线程间的请求合并：相同key的调用在完成前只执行一次，其他线程等待并共享同一个结果（或异常）
+
+    只合并同时进行的调用，不缓存结果；调用完成后下一次调用会重新执行。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """
+        执行调用，相同key的并发调用合并为一次
+
+        Args:
+            key: 调用标识，如 ("garmin", "sleep", "2024-01-01")
+            func: 实际执行的函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            Any: 函数返回值
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                call.waiters += 1
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取统计信息
+
+        Returns:
+            Dict[str, int]: 实际执行次数、被合并的调用次数和正在执行的调用数
+        """
+        with self._lock:
+            return {"executed": self.executed, "shared": self.shared, "inflight": len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """
+    asyncio中的请求合并：相同key的协程在完成前只执行一次，其他调用者等待同一个任务
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """
+        执行协程函数，相同key的并发调用合并为一次
+
+        Args:
+            key: 调用标识
+            func: 协程函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            Any: 协程返回值
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._tasks[key] = task
+            self.executed += 1
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.shared += 1
+        # shield: 一个调用者被取消时不影响其他等待同一结果的调用者
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        return {"executed": self.executed, "shared": self.shared, "inflight": len(self._tasks)}
+
+
+def _key_value(value: Any) -> Hashable:
+    """
+    将参数转换为请求合并key中使用的值：日期和时间统一为YYYY-MM-DD，字典和列表转换为元组
+
+    Args:
+        value: 参数值
+
+    Returns:
+        Hashable: key中使用的值
+    """
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, dict):
+        return tuple(sorted((name, _key_value(item)) for name, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_key_value(item) for item in value)
+    return value
+
+
+def single_flight(method: Callable) -> Callable:
+    """
+    方法装饰器：同一实例上参数相同的并发调用合并为一次
+
+    实例需要有 _single_flight 属性（SingleFlight），没有时直接调用原方法。
+    key由类名、方法名和按方法签名绑定（补全默认值）后的参数组成，位置参数和关键字参数的调用方式得到相同的key；
+    date和datetime参数按日期（YYYY-MM-DD）比较，因此被装饰的方法只能按天使用日期参数。
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        flight = getattr(self, '_single_flight', None)
+        if flight is None:
+            return method(self, *args, **kwargs)
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = list(bound.arguments.items())[1:]
+        key = (type(self).__name__, method.__name__,
+               tuple((name, _key_value(value)) for name, value in arguments))
+        return flight.do(key, method, self, *args, **kwargs)
+    return wrapper
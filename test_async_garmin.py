@@ -0,0 +1,102 @@
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from modules.garmin.async_client import AsyncGarminClient
+
+
+@pytest.fixture
+def async_client(garmin_client):
+    client = AsyncGarminClient(garmin_client, max_concurrency=2)
+    yield client
+    client.close()
+
+
+def _slow(garmin_client, method, delay=0.1):
+    """
+    让模拟客户端的某个方法变慢，便于制造并发请求
+    """
+    original = getattr(garmin_client.client, method)
+
+    def slow(*args, **kwargs):
+        time.sleep(delay)
+        return original(*args, **kwargs)
+
+    setattr(garmin_client.client, method, slow)
+
+
+def test_identical_requests_are_coalesced(garmin_client, async_client):
+    """
+    相同的并发请求只执行一次，所有调用者得到同一个结果
+    """
+    _slow(garmin_client, "get_weigh_ins")
+
+    async def main():
+        return await asyncio.gather(*[
+            async_client.get_weigh_ins_range(datetime(2024, 1, 1), datetime(2024, 1, 2)) for _ in range(3)
+        ], async_client.get_activities_range(datetime(2024, 1, 1), datetime(2024, 1, 2)))
+
+    *weigh_ins, activities = asyncio.run(main())
+
+    assert weigh_ins[0] is weigh_ins[1] is weigh_ins[2]
+    assert activities == {"2024-01-01": [], "2024-01-02": []}
+    assert [call[0] for call in garmin_client.client.calls].count("get_weigh_ins") == 1
+    assert async_client.get_cache_stats()["async_single_flight"] == {"executed": 2, "shared": 2, "inflight": 0}
+
+
+def test_sync_calls_do_not_block_event_loop(garmin_client, async_client):
+    """
+    同步请求在线程池中执行，等待期间事件循环继续运行其他协程
+    """
+    _slow(garmin_client, "get_weigh_ins", delay=0.2)
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.02)
+
+    async def main():
+        result, _ = await asyncio.gather(
+            async_client.get_weigh_ins_range(datetime(2024, 1, 1), datetime(2024, 1, 1)),
+            ticker()
+        )
+        return result
+
+    started = time.monotonic()
+    result = asyncio.run(main())
+
+    assert result["2024-01-01"][0]["weight"] == 70.0
+    assert len(ticks) == 5
+    assert ticks[-1] - started < 0.2
+
+
+def test_aclose_does_not_block_event_loop(garmin_client, async_client, monkeypatch):
+    """
+    aclose 在线程池中关闭同步客户端，等待期间事件循环继续运行其他协程
+    """
+    close = garmin_client.close
+
+    def slow_close():
+        time.sleep(0.2)
+        close()
+
+    monkeypatch.setattr(garmin_client, "close", slow_close)
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.02)
+
+    async def main():
+        await asyncio.gather(async_client.aclose(), ticker())
+
+    started = time.monotonic()
+    asyncio.run(main())
+
+    assert time.monotonic() - started >= 0.2
+    assert len(ticks) == 5
+    assert ticks[-1] - started < 0.2
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import threading
+from datetime import datetime
+
+import httpx
+import pytest
+
+from modules.notion.async_client import AsyncNotionClient
+
+
+def _transport(fake_notion):
+    """
+    把httpx请求转发给FakeNotion
+    """
+    def handler(request):
+        body = json.loads(request.content) if request.content else None
+        path = request.url.path[len("/v1"):]
+        status, data, headers = fake_notion.handle(request.method, path, body, dict(request.url.params))
+        return httpx.Response(status, json=data, headers=headers)
+    return httpx.MockTransport(handler)
+
+
+def _async_client(client, fake_notion, monkeypatch):
+    transport = _transport(fake_notion)
+    async_client_class = httpx.AsyncClient
+    monkeypatch.setattr(httpx, "AsyncClient", lambda **kwargs: async_client_class(transport=transport, **kwargs))
+    return AsyncNotionClient(client, max_concurrency=2, http2=False)
+
+
+@pytest.fixture
+def async_notion(notion_client, fake_notion, monkeypatch):
+    return _async_client(notion_client, fake_notion, monkeypatch)
+
+
+@pytest.fixture
+def async_mirror(mirror_client, fake_notion, monkeypatch):
+    return _async_client(mirror_client, fake_notion, monkeypatch)
+
+
+def _run(client, coro):
+    """
+    在新的事件循环中执行协程，结束后关闭连接池
+    """
+    async def main():
+        try:
+            return await coro
+        finally:
+            if client._http is not None:
+                await client._http.aclose()
+                client._http = None
+    return asyncio.run(main())
+
+
+def test_food_data_range_paginates(async_notion, fake_notion):
+    """
+    分页查询全部条目并提取饮食信息
+    """
+    for day in range(1, 6):
+        fake_notion.add_page(f"2024-01-0{day}", f"米饭{day}")
+
+    data = _run(async_notion, async_notion.get_food_data_range(datetime(2024, 1, 1), datetime(2024, 1, 5)))
+
+    assert [item["items"] for item in data] == [[f"米饭{day}"] for day in range(1, 6)]
+    assert fake_notion.count("POST", "/databases/") == 3
+
+
+def test_retry_on_server_error(async_notion, fake_notion):
+    """
+    服务端错误时按Retry-After等待后重试，请求经过共享限流器
+    """
+    fake_notion.add_page("2024-01-01", "面条")
+    fake_notion.errors[("POST", "/databases/")] = [503]
+    calls_before = async_notion.client.rate_limiter.calls
+
+    data = _run(async_notion, async_notion.get_food_data(datetime(2024, 1, 1)))
+
+    assert data["items"] == ["面条"]
+    assert fake_notion.count("POST", "/databases/") == 2
+    assert async_notion.client.rate_limiter.calls - calls_before == 2
+
+
+def test_concurrent_identical_reads_are_coalesced(async_notion, fake_notion):
+    """
+    相同日期范围的并发读取只查询一次
+    """
+    fake_notion.add_page("2024-01-01", "面条")
+
+    async def main():
+        return await asyncio.gather(*[
+            async_notion.get_food_data_range(datetime(2024, 1, 1), datetime(2024, 1, 1)) for _ in range(3)
+        ])
+
+    results = _run(async_notion, main())
+
+    assert results == [[{"date": "2024-01-01", "items": ["面条"]}]] * 3
+    assert fake_notion.count("POST", "/databases/") == 1
+
+
+def test_create_diary_entry_with_mirror(async_mirror, fake_notion):
+    """
+    有本地镜像时从镜像查找已有页面，写入结果写回镜像
+    """
+    page = fake_notion.add_page("2024-01-01", "燕麦")
+
+    async def main():
+        updated = await async_mirror.create_diary_entry(datetime(2024, 1, 1), ["燕麦", "牛奶"])
+        created = await async_mirror.create_diary_entry(datetime(2024, 1, 2), ["粥"])
+        return updated, created, await async_mirror.get_food_data_range(datetime(2024, 1, 1), datetime(2024, 1, 2))
+
+    updated, created, data = _run(async_mirror, main())
+
+    assert updated and created
+    assert fake_notion.count("PATCH", f"/pages/{page['id']}") == 1
+    assert fake_notion.count("POST", "/pages") == 1
+    assert data == [{"date": "2024-01-01", "items": ["燕麦", "牛奶"]}, {"date": "2024-01-02", "items": ["粥"]}]
+
+
+def test_food_extraction_runs_in_executor(async_notion, notion_client, fake_notion, monkeypatch):
+    """
+    提取饮食信息（可能需要同步请求块树）在线程池中执行，不阻塞事件循环
+    """
+    fake_notion.add_page("2024-01-01", "燕麦")
+    threads = []
+    page_food_items = notion_client._page_food_items
+
+    def record_thread(entry):
+        threads.append(threading.current_thread())
+        return page_food_items(entry)
+
+    monkeypatch.setattr(notion_client, "_page_food_items", record_thread)
+
+    data = _run(async_notion, async_notion.get_food_data_range(datetime(2024, 1, 1), datetime(2024, 1, 1)))
+
+    assert data == [{"date": "2024-01-01", "items": ["燕麦"]}]
+    assert threads and threading.main_thread() not in threads
+
+
+def test_create_requeries_after_server_error(async_notion, fake_notion):
+    """
+    创建页面遇到服务端错误时不直接重发，重新查询该日期后再创建
+    """
+    fake_notion.errors[("POST", "/pages")] = [503]
+
+    assert _run(async_notion, async_notion.create_diary_entry(datetime(2024, 1, 1), ["粥"]))
+
+    assert fake_notion.count("POST", "/pages") == 2
+    assert fake_notion.count("POST", "/databases/") == 2
+    assert len(fake_notion.pages) == 1
+
+
+def test_create_not_resent_when_page_was_created(async_notion, fake_notion, monkeypatch):
+    """
+    创建请求已经生效但返回服务端错误时，重新查询到该页面后改为更新，不产生重复页面
+    """
+    handle = fake_notion.handle
+    failed = []
+
+    def created_then_failed(method, path, body=None, params=None):
+        result = handle(method, path, body, params)
+        if method == "POST" and path == "/pages" and not failed:
+            failed.append(path)
+            return 502, {"message": "bad gateway"}, {"Retry-After": "0"}
+        return result
+
+    monkeypatch.setattr(fake_notion, "handle", created_then_failed)
+
+    assert _run(async_notion, async_notion.create_diary_entry(datetime(2024, 1, 1), ["粥"]))
+
+    assert len(fake_notion.pages) == 1
+    assert fake_notion.count("POST", "/pages") == 1
+    assert fake_notion.count("PATCH", "/pages/") == 1
+
+
+def test_create_refused_when_lookup_fails(async_notion, fake_notion):
+    """
+    无法查询当天已有页面时不写入
+    """
+    fake_notion.errors[("POST", "/databases/")] = [500] * 10
+
+    assert not _run(async_notion, async_notion.create_diary_entry(datetime(2024, 1, 1), ["粥"]))
+    assert fake_notion.count("POST", "/pages") == 0
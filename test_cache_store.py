@@ -0,0 +1,150 @@
+import json
+import os
+import time
+
+import pytest
+
+from modules.garmin.cache_store import (
+    CacheEntry, JsonFileCacheStore, MemoryCacheStore, SQLiteCacheStore, TieredCacheStore,
+    ENTRY_DATA, ENTRY_EMPTY, ENTRY_ERROR
+)
+
+
+@pytest.fixture(params=["sqlite", "json", "tiered"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        cache = SQLiteCacheStore(str(tmp_path / "cache.db"))
+    elif request.param == "json":
+        cache = JsonFileCacheStore(str(tmp_path))
+    else:
+        cache = TieredCacheStore(MemoryCacheStore(16), SQLiteCacheStore(str(tmp_path / "cache.db")))
+    yield cache
+    cache.close()
+
+
+def test_ttl_expiry(store):
+    """
+    过期的条目不再返回，永不过期的条目一直有效
+    """
+    store.put("steps", "2024-01-01", {"steps": 1}, ttl=-1)
+    store.put("steps", "2024-01-02", {"steps": 2}, ttl=None)
+    store.put("steps", "2024-01-03", {"steps": 3}, ttl=3600)
+
+    assert store.get("steps", "2024-01-01") is None
+    assert store.get_many("steps", ["2024-01-01", "2024-01-02", "2024-01-03"]) == {
+        "2024-01-02": {"steps": 2},
+        "2024-01-03": {"steps": 3}
+    }
+    # 过期的数据保留，可在请求失败时使用
+    assert store.get_entries("steps", ["2024-01-01"], include_expired=True)["2024-01-01"].data == {"steps": 1}
+
+
+def test_get_range_only_returns_hits(store):
+    """
+    日期范围查询包含两端，只返回命中的日期，不同指标互不影响
+    """
+    store.put_many("sleep", {"2024-01-01": 1, "2024-01-03": 3, "2024-01-05": 5}, ttl=None)
+    store.put("steps", "2024-01-02", 2, ttl=None)
+
+    assert store.get_range("sleep", "2024-01-01", "2024-01-03") == {"2024-01-01": 1, "2024-01-03": 3}
+
+
+def test_expire_keeps_data(store):
+    """
+    expire 将条目标记为过期但保留数据
+    """
+    store.put("sleep", "2024-01-01", {"duration": 7}, ttl=None)
+
+    store.expire("sleep", ["2024-01-01"])
+
+    assert store.get("sleep", "2024-01-01") is None
+    entry = store.get_entries("sleep", ["2024-01-01"], include_expired=True)["2024-01-01"]
+    assert entry.data == {"duration": 7}
+    assert entry.expires_at is not None
+
+
+def test_empty_and_error_entries(store):
+    """
+    无数据（负缓存）和请求失败的条目与正常数据一样命中，并保留条目类型和失败次数
+    """
+    store.put_many("activities", {"2024-01-01": []}, ttl=None, kind=ENTRY_EMPTY)
+    store.put_entries("activities", {"2024-01-02": CacheEntry([], time.time() + 60, ENTRY_ERROR, 2)})
+    store.put_many("activities", {"2024-01-03": [{"id": 1}]}, ttl=None)
+
+    entries = store.get_entries("activities", ["2024-01-01", "2024-01-02", "2024-01-03"])
+
+    assert entries["2024-01-01"].kind == ENTRY_EMPTY
+    assert entries["2024-01-01"].data == []
+    assert entries["2024-01-02"].kind == ENTRY_ERROR
+    assert entries["2024-01-02"].error_count == 2
+    assert entries["2024-01-03"].kind == ENTRY_DATA
+
+
+def test_migrate_json_files(tmp_path):
+    """
+    旧版JSON缓存文件只迁移一次，已有的数据库条目不被覆盖
+    """
+    json_dir = tmp_path / "json"
+    os.makedirs(json_dir)
+    (json_dir / "steps_2024-01-01.json").write_text(json.dumps({"steps": 1}))
+    (json_dir / "daily_steps_2024-01-02.json").write_text(json.dumps({"expires_at": None, "data": {"steps": 2}}))
+    (json_dir / "notes.json").write_text("{}")
+
+    store = SQLiteCacheStore(str(tmp_path / "cache.db"), default_ttl=None)
+    store.put("steps", "2024-01-01", {"steps": 10}, ttl=None)
+
+    assert store.migrate_json_files(str(json_dir)) == 2
+    assert store.migrate_json_files(str(json_dir)) == 0
+    assert store.get("steps", "2024-01-01") == {"steps": 10}
+    assert store.get("daily_steps", "2024-01-02") == {"steps": 2}
+    store.close()
+
+
+def test_memory_cache_lru_eviction():
+    """
+    超过容量时淘汰最久未使用的条目并调用 on_evict
+    """
+    evicted = []
+    memory = MemoryCacheStore(2, on_evict=lambda metric, date_str: evicted.append((metric, date_str)))
+
+    memory.put_many("steps", {"2024-01-01": 1, "2024-01-02": 2})
+    memory.get("steps", "2024-01-01")
+    memory.put_many("steps", {"2024-01-03": 3})
+
+    assert evicted == [("steps", "2024-01-02")]
+    assert memory.get_many("steps", ["2024-01-01", "2024-01-02", "2024-01-03"]) == {"2024-01-01": 1, "2024-01-03": 3}
+    assert memory.stats()["evictions"] == 1
+
+
+def test_tiered_cache_refills_memory_from_disk(tmp_path):
+    """
+    内存未命中时读取磁盘缓存并回填内存
+    """
+    disk = SQLiteCacheStore(str(tmp_path / "cache.db"))
+    disk.put("steps", "2024-01-01", {"steps": 1}, ttl=None)
+    memory = MemoryCacheStore(16)
+    tiered = TieredCacheStore(memory, disk)
+
+    assert tiered.get("steps", "2024-01-01") == {"steps": 1}
+    assert memory.get("steps", "2024-01-01") == {"steps": 1}
+    tiered.close()
+
+
+def test_memory_max_age_rereads_disk(tmp_path):
+    """
+    内存条目超过 max_age 后重新读取磁盘缓存，可以看到其他进程的更新
+    """
+    disk = SQLiteCacheStore(str(tmp_path / "cache.db"))
+    tiered = TieredCacheStore(MemoryCacheStore(16, max_age=0.05), disk)
+    tiered.put("steps", "2024-01-01", {"steps": 1}, ttl=None)
+
+    # 模拟其他进程直接修改磁盘缓存
+    other = SQLiteCacheStore(str(tmp_path / "cache.db"))
+    other.put("steps", "2024-01-01", {"steps": 2}, ttl=None)
+    assert tiered.get("steps", "2024-01-01") == {"steps": 1}
+
+    time.sleep(0.1)
+    assert tiered.get("steps", "2024-01-01") == {"steps": 2}
+
+    other.close()
+    tiered.close()
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import pytest
+
+from modules.diary import diary_parser
+from modules.diary.diary_parser import DiaryParser
+
+
+@pytest.fixture
+def vault(tmp_path):
+    vault_dir = tmp_path / "vault"
+    (vault_dir / "2024" / "01").mkdir(parents=True)
+    (vault_dir / "2024" / "01" / "2024-01-01.md").write_text("## 饮食\n- 燕麦\n", encoding="utf-8")
+    (vault_dir / "2024" / "01" / "2024-01-02.md").write_text("今天没有记录饮食\n", encoding="utf-8")
+    (vault_dir / "2024" / "2024-01.md").write_text(
+        "# 2024-01-02\n## 饮食\n- 重复的日期\n# 2024-01-03\n## 饮食\n- 饺子\n", encoding="utf-8"
+    )
+    (vault_dir / "notes.txt").write_text("# 2024-01-04\n## 饮食\n- 不匹配\n", encoding="utf-8")
+    return vault_dir
+
+
+@pytest.fixture
+def parser(tmp_path):
+    return DiaryParser({"index_dir": str(tmp_path / "diary_index")})
+
+
+def test_directory_is_read_as_one_diary(parser, vault):
+    """
+    目录中匹配的文件合并为一个日记，没有日期标题的文件使用文件名中的日期，重复的日期使用路径排序后的第一个文件
+    """
+    data = parser.get_food_data_range(str(vault), datetime(2024, 1, 1), datetime(2024, 1, 4))
+
+    assert data == [
+        {"date": "2024-01-01", "items": ["燕麦"]},
+        {"date": "2024-01-02", "items": []},
+        {"date": "2024-01-03", "items": ["饺子"]}
+    ]
+    assert "没有记录饮食" in parser.read_date_content(str(vault), datetime(2024, 1, 2))
+
+
+def test_only_changed_files_are_parsed(parser, vault, monkeypatch):
+    """
+    再次读取时只重新解析新增或修改的文件
+    """
+    parser.get_index(str(vault))
+    parsed = []
+    index_diary_file = diary_parser._index_diary_file
+    monkeypatch.setattr(diary_parser, "_index_diary_file",
+                        lambda path, config: parsed.append(path) or index_diary_file(path, config))
+
+    new_file = vault / "2024" / "01" / "2024-01-05.md"
+    new_file.write_text("## 饮食\n- 面条\n", encoding="utf-8")
+
+    assert parser.get_food_data(str(vault), datetime(2024, 1, 5))["items"] == ["面条"]
+    assert parsed == [str(new_file)]
+
+
+def test_persisted_corpus_index_is_reused(tmp_path, vault, monkeypatch):
+    """
+    新的解析器实例使用已保存的各文件索引，不重新解析
+    """
+    config = {"index_dir": str(tmp_path / "diary_index")}
+    DiaryParser(config).get_index(str(vault))
+
+    def parse(path, config):
+        raise AssertionError("不应重新解析")
+    monkeypatch.setattr(diary_parser, "_index_diary_file", parse)
+
+    assert DiaryParser(config).get_food_data(str(vault), datetime(2024, 1, 3))["items"] == ["饺子"]
+
+
+def test_parallel_parsing(tmp_path, monkeypatch):
+    """
+    需要解析的文件较多时使用进程池，结果与逐个解析相同
+    """
+    vault_dir = tmp_path / "vault"
+    vault_dir.mkdir()
+    for day in range(1, 5):
+        (vault_dir / f"2024-01-0{day}.md").write_text(f"## 饮食\n- 第{day}天\n", encoding="utf-8")
+    monkeypatch.setattr(diary_parser, "PARALLEL_PARSE_THRESHOLD", 2)
+
+    parser = DiaryParser({"persist_index": False, "parse_workers": 2})
+    data = parser.get_food_data_range(str(vault_dir), datetime(2024, 1, 1), datetime(2024, 1, 4))
+
+    assert [day["items"] for day in data] == [["第1天"], ["第2天"], ["第3天"], ["第4天"]]
@@ -0,0 +1,103 @@
+from modules.diary.diary_index import DiaryIndex, INDEX_VERSION
+
+
+DIARY = "# 2024-01-01\n- 米饭\n# 2024-01-02\n- 面条\n".encode('utf-8')
+
+
+def test_build_and_read():
+    """
+    建立索引后按日期读取内容
+    """
+    index = DiaryIndex.build(DIARY)
+
+    assert index.dates() == ["2024-01-01", "2024-01-02"]
+    assert index.read(DIARY, "2024-01-01").strip() == "- 米饭"
+    assert index.read(DIARY, "2024-01-02").strip() == "- 面条"
+    assert index.read(DIARY, "2024-01-03") is None
+
+
+def test_update_tail_appends_new_date():
+    """
+    文件末尾追加新日期后，只有最后一段和新日期发生变化
+    """
+    index = DiaryIndex.build(DIARY)
+    data = DIARY + "- 鸡蛋\n# 2024-01-03\n- 饺子\n".encode('utf-8')
+
+    changed = index.update_tail(data)
+
+    assert sorted(changed) == ["2024-01-02", "2024-01-03"]
+    assert index.read(data, "2024-01-01").strip() == "- 米饭"
+    assert index.read(data, "2024-01-02").split() == ["-", "面条", "-", "鸡蛋"]
+    assert index.read(data, "2024-01-03").strip() == "- 饺子"
+    assert index.dates_between("2024-01-02", "2024-01-31") == ["2024-01-02", "2024-01-03"]
+
+
+def test_update_tail_keeps_first_occurrence():
+    """
+    追加的内容中出现已有日期时，保留第一次出现的内容
+    """
+    index = DiaryIndex.build(DIARY)
+    data = DIARY + "# 2024-01-01\n- 重复\n".encode('utf-8')
+
+    changed = index.update_tail(data)
+
+    assert "2024-01-01" not in changed
+    assert index.read(data, "2024-01-01").strip() == "- 米饭"
+
+
+def test_update_tail_without_changes():
+    """
+    内容没有变化时不返回任何日期
+    """
+    index = DiaryIndex.build(DIARY)
+
+    assert index.update_tail(DIARY) == []
+
+
+def test_round_trip_dict():
+    """
+    索引可以序列化为字典并还原
+    """
+    index = DiaryIndex.build(DIARY)
+    index.food_items = {"2024-01-01": ["米饭"]}
+
+    restored = DiaryIndex.from_dict(index.to_dict())
+
+    assert restored.sections == index.sections
+    assert restored.tail_start == index.tail_start
+    assert restored.food_items == {"2024-01-01": ["米饭"]}
+
+
+def test_build_keeps_first_occurrence():
+    """
+    同一日期出现多次时使用第一次出现的内容
+    """
+    data = DIARY + "## 2024-01-01\n- 重复\n".encode('utf-8')
+
+    index = DiaryIndex.build(data)
+
+    assert len(index) == 2
+    assert index.read(data, "2024-01-01").strip() == "- 米饭"
+
+
+def test_dates_between():
+    """
+    日期范围查询包含两端
+    """
+    index = DiaryIndex.build("# 2024-01-03\n# 2024-01-01\n# 2024-01-10\n".encode('utf-8'))
+
+    assert index.dates_between("2024-01-01", "2024-01-03") == ["2024-01-01", "2024-01-03"]
+    assert index.dates_between("2024-01-04", "2024-01-09") == []
+    assert "2024-01-10" in index
+
+
+def test_non_ascii_whitespace_in_heading():
+    """
+    标题中的全角空格和不换行空格与文本正则一样被接受
+    """
+    data = "#　2024-01-01\n- 米饭\n# 2024-01-02\n- 面条\n".encode('utf-8')
+
+    index = DiaryIndex.build(data)
+
+    assert index.dates() == ["2024-01-01", "2024-01-02"]
+    assert INDEX_VERSION >= 2
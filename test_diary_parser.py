@@ -0,0 +1,140 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from modules.diary.diary_index import DiaryIndex
+from modules.diary.diary_parser import DiaryParser
+
+DIARY = """# 2024-01-01
+今天很冷
+## 饮食
+- 燕麦
+- 牛奶
+# 2024-01-02
+## 饮食
+* 米饭
+# 2024-01-03
+没有记录饮食
+"""
+
+
+@pytest.fixture
+def parser(tmp_path):
+    return DiaryParser({"index_dir": str(tmp_path / "diary_index")})
+
+
+@pytest.fixture
+def diary_file(tmp_path):
+    path = tmp_path / "diary.md"
+    path.write_text(DIARY, encoding="utf-8")
+    return str(path)
+
+
+def test_food_data_range(parser, diary_file):
+    """
+    只返回范围内有内容的日期，按列表项拆分饮食信息
+    """
+
+    assert parser.get_food_data_range(diary_file, datetime(2023, 12, 31), datetime(2024, 1, 3)) == [
+        {"date": "2024-01-01", "items": ["燕麦", "牛奶"]},
+        {"date": "2024-01-02", "items": ["米饭"]},
+        {"date": "2024-01-03", "items": []}
+    ]
+    assert parser.get_food_data(diary_file, datetime(2024, 1, 5)) == {"date": "2024-01-05", "items": []}
+
+
+def test_index_rebuilt_after_file_changes(parser, diary_file):
+    """
+    文件未变化时复用索引，修改后重新建立
+    """
+    parser.get_food_data(diary_file, datetime(2024, 1, 1))
+
+    with open(diary_file, "a", encoding="utf-8") as f:
+        f.write("# 2024-01-04\n## 饮食\n- 饺子\n")
+    os.utime(diary_file, ns=(0, os.stat(diary_file).st_mtime_ns + 1000))
+
+    assert parser.get_food_data(diary_file, datetime(2024, 1, 4))["items"] == ["饺子"]
+
+
+def test_missing_file(parser, tmp_path):
+    """
+    文件不存在时返回空数据
+    """
+
+    assert parser.get_food_data_range(str(tmp_path / "missing.md"), datetime(2024, 1, 1), datetime(2024, 1, 2)) == []
+
+
+def _forbid_rebuild(monkeypatch):
+    def build(*args, **kwargs):
+        raise AssertionError("不应重新建立索引")
+    monkeypatch.setattr(DiaryIndex, "build", build)
+
+
+def test_persisted_index_is_reused(tmp_path, diary_file, monkeypatch):
+    """
+    新的解析器实例直接使用磁盘上的索引和饮食信息
+    """
+    config = {"index_dir": str(tmp_path / "diary_index")}
+    DiaryParser(config).get_food_data(diary_file, datetime(2024, 1, 1))
+    _forbid_rebuild(monkeypatch)
+
+    assert DiaryParser(config).get_food_data(diary_file, datetime(2024, 1, 2))["items"] == ["米饭"]
+
+    # 只有修改时间变化时通过内容哈希确认索引仍然有效
+    os.utime(diary_file, ns=(0, os.stat(diary_file).st_mtime_ns + 1000))
+    assert DiaryParser(config).get_food_data(diary_file, datetime(2024, 1, 1))["items"] == ["燕麦", "牛奶"]
+
+
+def test_appended_content_updates_index_incrementally(tmp_path, diary_file, monkeypatch):
+    """
+    只在末尾追加内容时增量更新最后一天和新增的日期
+    """
+    config = {"index_dir": str(tmp_path / "diary_index")}
+    DiaryParser(config).get_food_data(diary_file, datetime(2024, 1, 1))
+    with open(diary_file, "a", encoding="utf-8") as f:
+        f.write("## 饮食\n- 苹果\n# 2024-01-04\n## 饮食\n- 饺子\n")
+    _forbid_rebuild(monkeypatch)
+
+    data = DiaryParser(config).get_food_data_range(diary_file, datetime(2024, 1, 3), datetime(2024, 1, 4))
+
+    assert data == [{"date": "2024-01-03", "items": ["苹果"]}, {"date": "2024-01-04", "items": ["饺子"]}]
+
+
+def test_modified_content_rebuilds_index(tmp_path, diary_file):
+    """
+    修改了已有内容时重新建立索引
+    """
+    config = {"index_dir": str(tmp_path / "diary_index")}
+    DiaryParser(config).get_food_data(diary_file, datetime(2024, 1, 1))
+    with open(diary_file, "w", encoding="utf-8") as f:
+        f.write(DIARY.replace("燕麦", "面包"))
+
+    assert DiaryParser(config).get_food_data(diary_file, datetime(2024, 1, 1))["items"] == ["面包", "牛奶"]
+
+
+def test_iter_date_contents_skips_missing_days(parser, tmp_path):
+    """
+    逐天返回范围内有内容的日期，没有记录的日期被跳过
+    """
+    path = tmp_path / "diary.md"
+    path.write_text("# 2024-01-01\n早饭\n# 2024-01-03\n午饭\n", encoding="utf-8")
+
+    contents = list(parser.iter_date_contents(str(path), datetime(2024, 1, 1), datetime(2024, 1, 3)))
+
+    assert [date_str for date_str, _ in contents] == ["2024-01-01", "2024-01-03"]
+    assert "午饭" in contents[1][1]
+    assert parser.read_date_content(str(path), datetime(2024, 1, 3)) == contents[1][1]
+    assert parser.read_date_content(str(path), datetime(2024, 1, 2)) == ""
+
+
+def test_empty_file_is_not_mapped(parser, tmp_path):
+    """
+    空文件不能映射，按空内容处理
+    """
+    path = tmp_path / "empty.md"
+    path.write_bytes(b"")
+
+    with parser.open_mapped(str(path)) as data:
+        assert data == b""
+    assert parser.get_food_data_range(str(path), datetime(2024, 1, 1), datetime(2024, 1, 3)) == []
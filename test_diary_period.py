@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import pytest
+
+from modules.diary.diary_weekly_analyzer import DiaryWeeklyAnalyzer
+
+
+def test_week_crosses_year_end():
+    """
+    周报告的7天可以跨越年末
+    """
+    start, end = DiaryWeeklyAnalyzer.period_range("week", datetime(2024, 1, 2, 15, 30))
+
+    assert start == datetime(2023, 12, 27)
+    assert end == datetime(2024, 1, 2)
+
+
+def test_month_end_of_leap_february():
+    """
+    月报告覆盖整个自然月，闰年二月到29日
+    """
+    start, end = DiaryWeeklyAnalyzer.period_range("month", datetime(2024, 2, 10))
+
+    assert start == datetime(2024, 2, 1)
+    assert end == datetime(2024, 2, 29)
+
+
+def test_month_at_year_end():
+    """
+    十二月的月报告结束于12月31日
+    """
+    start, end = DiaryWeeklyAnalyzer.period_range("month", datetime(2023, 12, 31))
+
+    assert start == datetime(2023, 12, 1)
+    assert end == datetime(2023, 12, 31)
+
+
+def test_current_month_ends_today():
+    """
+    当前月份的月报告截至今天
+    """
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    start, end = DiaryWeeklyAnalyzer.period_range("month", today)
+
+    assert start == today.replace(day=1)
+    assert end == today
+
+
+def test_custom_range_across_years():
+    """
+    自定义范围可以跨年，时间部分被忽略
+    """
+    start, end = DiaryWeeklyAnalyzer.period_range("custom", datetime(2024, 1, 5, 8), datetime(2023, 12, 30, 20))
+
+    assert start == datetime(2023, 12, 30)
+    assert end == datetime(2024, 1, 5)
+
+
+def test_invalid_periods():
+    """
+    缺少开始日期、开始晚于结束或未知周期时抛出ValueError
+    """
+    with pytest.raises(ValueError):
+        DiaryWeeklyAnalyzer.period_range("custom", datetime(2024, 1, 5))
+    with pytest.raises(ValueError):
+        DiaryWeeklyAnalyzer.period_range("custom", datetime(2024, 1, 5), datetime(2024, 1, 6))
+    with pytest.raises(ValueError):
+        DiaryWeeklyAnalyzer.period_range("year", datetime(2024, 1, 5))
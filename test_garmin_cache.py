@@ -0,0 +1,100 @@
+import time
+from datetime import datetime, timedelta
+
+from modules.garmin.cache_store import ENTRY_EMPTY, ENTRY_ERROR, MemoryCacheStore, TieredCacheStore
+
+
+def _day(days_ago):
+    return (datetime.now() - timedelta(days=days_ago)).strftime("%Y-%m-%d")
+
+
+def test_cache_ttl_by_date_age(garmin_client):
+    """
+    当天使用 cache_ttl，昨天使用 cache_ttl_yesterday，更早的日期永不过期
+    """
+    garmin_client.cache_ttl = 60
+    garmin_client.cache_ttl_yesterday = 600
+    garmin_client.cache_immutable_after_days = 2
+
+    assert garmin_client._get_cache_ttl(_day(0)) == 60
+    assert garmin_client._get_cache_ttl(_day(1)) == 600
+    assert garmin_client._get_cache_ttl(_day(2)) is None
+    assert garmin_client._get_cache_ttl(_day(-1)) == 60
+    assert garmin_client._get_cache_ttl("unknown") == 60
+
+
+def test_save_many_groups_by_ttl(garmin_client):
+    """
+    批量写入时按各自日期的有效期保存
+    """
+    garmin_client.cache_ttl = -1
+    garmin_client.cache_ttl_yesterday = -1
+
+    garmin_client._save_many_to_cache("steps", {_day(0): {"steps": 1}, _day(1): {"steps": 2}, _day(5): {"steps": 3}})
+    time.sleep(0.01)
+
+    assert garmin_client.cache_store.get_many("steps", [_day(0), _day(1), _day(5)]) == {_day(5): {"steps": 3}}
+
+
+def test_empty_results_are_cached(garmin_client):
+    """
+    没有活动的日期作为空结果缓存，再次读取时不请求Garmin
+    """
+    garmin_client.get_activities_range(datetime(2024, 1, 1), datetime(2024, 1, 2))
+    garmin_client.client.calls.clear()
+
+    assert garmin_client.get_activities_range(datetime(2024, 1, 1), datetime(2024, 1, 2)) == {
+        "2024-01-01": [], "2024-01-02": []
+    }
+    assert garmin_client.client.calls == []
+    assert garmin_client.cache_store.get_entries("activities", ["2024-01-01"])["2024-01-01"].kind == ENTRY_EMPTY
+
+
+def test_failed_call_backs_off(garmin_client):
+    """
+    请求失败后在退避时间内不再请求，失败期间返回默认数据
+    """
+    garmin_client.error_cache_ttl = 60
+    garmin_client.client.failing_dates = {"2024-01-01"}
+
+    assert garmin_client._get_daily_summary("2024-01-01") == {}
+    assert garmin_client._get_daily_summary("2024-01-01") == {}
+    assert garmin_client.client.calls == [("get_stats", "2024-01-01")]
+
+    entry = garmin_client.cache_store.get_entries("stats", ["2024-01-01"])["2024-01-01"]
+    assert entry.kind == ENTRY_ERROR
+    assert entry.error_count == 1
+
+
+def test_repeated_failures_double_backoff_and_keep_data(garmin_client):
+    """
+    连续失败时退避时间加倍（不超过上限），并继续返回之前的数据
+    """
+    garmin_client.error_cache_ttl = 60
+    garmin_client.error_cache_max_ttl = 100
+    garmin_client.cache_store.put("stats", "2024-01-01", {"totalKilocalories": 1800}, ttl=-1)
+
+    assert garmin_client._handle_fetch_error("stats", ["2024-01-01"], {"2024-01-01": {}}) == {
+        "2024-01-01": {"totalKilocalories": 1800}
+    }
+    garmin_client._handle_fetch_error("stats", ["2024-01-01"], {"2024-01-01": {}})
+
+    entry = garmin_client.cache_store.get_entries("stats", ["2024-01-01"])["2024-01-01"]
+    assert entry.error_count == 2
+    assert entry.data == {"totalKilocalories": 1800}
+    assert 90 < entry.expires_at - time.time() <= 100
+
+
+def test_evictions_counted_by_metric(garmin_client):
+    """
+    内存缓存淘汰的条目按指标计入缓存统计
+    """
+    garmin_client.cache_store = TieredCacheStore(
+        MemoryCacheStore(1, on_evict=garmin_client._on_cache_evict), garmin_client.cache_store
+    )
+
+    garmin_client._save_to_cache("steps", "2024-01-01", {"steps": 1})
+    garmin_client._save_to_cache("steps", "2024-01-02", {"steps": 2})
+    garmin_client._save_to_cache("sleep", "2024-01-01", {"duration": 7})
+
+    assert garmin_client.get_cache_stats()["evictions_by_metric"] == {"steps": 2}
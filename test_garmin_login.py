@@ -0,0 +1,70 @@
+import os
+import time
+
+from modules.garmin.garmin_client import GarminClient
+
+
+def _client(tmp_path):
+    return GarminClient({"email": "test", "password": "", "token_store": str(tmp_path / "tokens")})
+
+
+def test_login_is_lazy_and_saves_tokens(tmp_path, fake_garmin):
+    """
+    创建客户端时不登录，首次访问时使用账号密码登录并保存令牌
+    """
+    client = _client(tmp_path)
+    assert fake_garmin.logins == []
+
+    assert client.client is client.client
+    assert fake_garmin.logins == [None]
+    assert os.listdir(client.token_store) == ["oauth2_token.json"]
+
+
+def test_resume_session_from_token_store(tmp_path, fake_garmin):
+    """
+    令牌存储中有令牌时直接恢复会话，不使用账号密码登录
+    """
+    _client(tmp_path).client
+    fake_garmin.logins.clear()
+
+    assert _client(tmp_path).client is not None
+    assert fake_garmin.logins == [str(tmp_path / "tokens")]
+
+
+def test_failed_resume_falls_back_to_credentials(tmp_path, fake_garmin, monkeypatch):
+    """
+    令牌无法使用时回退到账号密码登录
+    """
+    os.makedirs(tmp_path / "tokens")
+    (tmp_path / "tokens" / "oauth2_token.json").write_text("{}")
+    original_login = fake_garmin.login
+
+    def login(self, tokenstore=None):
+        if tokenstore:
+            fake_garmin.logins.append(tokenstore)
+            raise ValueError("令牌已失效")
+        original_login(self, tokenstore)
+
+    monkeypatch.setattr(fake_garmin, "login", login)
+
+    assert _client(tmp_path).client is not None
+    assert fake_garmin.logins == [str(tmp_path / "tokens"), None]
+
+
+def test_failed_login_retried_after_backoff(tmp_path, fake_garmin):
+    """
+    登录失败后在退避时间内不重复登录，退避结束后再次尝试
+    """
+    fake_garmin.login_error = ValueError("登录失败")
+    client = GarminClient({"email": "test", "password": "", "token_store": str(tmp_path / "tokens"),
+                           "login_retry_interval": 0.05})
+
+    assert client.client is None
+    assert client.client is None
+    assert fake_garmin.logins == [None]
+
+    time.sleep(0.06)
+    fake_garmin.login_error = None
+
+    assert client.client is not None
+    assert fake_garmin.logins == [None, None]
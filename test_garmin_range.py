@@ -0,0 +1,95 @@
+from datetime import datetime
+
+
+def _activity(start_time, type_key="running"):
+    return {
+        "startTimeLocal": start_time,
+        "activityType": {"typeKey": type_key},
+        "duration": 1800,
+        "calories": 300,
+        "distance": 5000
+    }
+
+
+def test_activities_range_splits_by_day(garmin_client):
+    """
+    区间接口只请求一次，活动按本地开始时间拆分到每一天，没有活动的日期为空列表
+    """
+    garmin_client.client.activities = [
+        _activity("2024-01-01 07:00:00"),
+        _activity("2024-01-03 18:30:00", "cycling"),
+        _activity("2024-01-03 20:00:00"),
+    ]
+
+    result = garmin_client.get_activities_range(datetime(2024, 1, 1), datetime(2024, 1, 3))
+
+    assert [call[0] for call in garmin_client.client.calls] == ["get_activities_by_date"]
+    assert result["2024-01-01"] == [{"type": "running", "duration": 30.0, "calories": 300, "distance": 5.0}]
+    assert result["2024-01-02"] == []
+    assert [activity["type"] for activity in result["2024-01-03"]] == ["cycling", "running"]
+
+
+def test_activities_range_only_requests_missing_dates(garmin_client):
+    """
+    已缓存的日期不再请求，区间只覆盖缺失的日期
+    """
+    garmin_client.client.activities = [_activity("2024-01-02 07:00:00")]
+    garmin_client.get_activities_range(datetime(2024, 1, 1), datetime(2024, 1, 2))
+    garmin_client.client.calls.clear()
+
+    result = garmin_client.get_activities_range(datetime(2024, 1, 2), datetime(2024, 1, 4))
+
+    assert garmin_client.client.calls == [("get_activities_by_date", "2024-01-03", "2024-01-04")]
+    assert len(result["2024-01-02"]) == 1
+
+
+def test_steps_range_uses_daily_steps(garmin_client):
+    """
+    每日步数通过区间接口一次获取，再次读取时使用缓存
+    """
+    result = garmin_client._get_steps_range(datetime(2024, 1, 1), datetime(2024, 1, 3))
+
+    assert result == {"2024-01-01": 1000, "2024-01-02": 1000, "2024-01-03": 1000}
+    assert garmin_client.client.calls == [("get_daily_steps", "2024-01-01", "2024-01-03")]
+
+    garmin_client.client.calls.clear()
+    assert garmin_client._get_steps_range(datetime(2024, 1, 1), datetime(2024, 1, 3)) == result
+    assert garmin_client.client.calls == []
+
+
+def test_steps_range_only_uses_daily_steps_cache(garmin_client):
+    """
+    区间步数只读写 daily_steps 缓存，与回填和增量同步检查的指标一致
+    """
+    garmin_client._save_to_cache("steps", "2024-01-01", {"steps": 5000})
+
+    garmin_client._get_steps_range(datetime(2024, 1, 1), datetime(2024, 1, 2))
+
+    assert garmin_client.client.calls == [("get_daily_steps", "2024-01-01", "2024-01-02")]
+    assert garmin_client.cache_store.get("daily_steps", "2024-01-01") is not None
+
+
+def test_weigh_ins_range_splits_by_summary_date(garmin_client):
+    """
+    体重数据按摘要日期拆分，没有测量的日期为空列表
+    """
+    garmin_client.client.failing_dates = {"2024-01-02"}
+
+    result = garmin_client.get_weigh_ins_range(datetime(2024, 1, 1), datetime(2024, 1, 3))
+
+    assert garmin_client.client.calls == [("get_weigh_ins", "2024-01-01", "2024-01-03")]
+    assert [entry["weight"] for entry in result["2024-01-01"]] == [70.0]
+    assert result["2024-01-02"] == []
+    assert result["2024-01-03"][0]["date"] == "2024-01-03"
+
+
+def test_range_without_client_returns_empty(garmin_client, fake_garmin):
+    """
+    客户端未登录时缺失日期返回空结果
+    """
+    fake_garmin.login_error = ValueError("登录失败")
+
+    assert garmin_client.get_activities_range(datetime(2024, 1, 1), datetime(2024, 1, 2)) == {
+        "2024-01-01": [], "2024-01-02": []
+    }
+    assert garmin_client._get_steps_range(datetime(2024, 1, 1), datetime(2024, 1, 1)) == {"2024-01-01": 0}
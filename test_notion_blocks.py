@@ -0,0 +1,135 @@
+from datetime import datetime
+
+from modules.notion.blocks import block_text, compact_block, extract_meals, meal_items
+
+
+def _block(block_type, text, children=None):
+    block = {"type": block_type, block_type: {"rich_text": [{"plain_text": text}]}}
+    if children:
+        block["has_children"] = True
+        block["children"] = children
+    return block
+
+
+def test_extract_meals_by_heading():
+    """
+    餐次标题之后的列表、待办和段落属于该餐次，直到同级或更高级的其他标题
+    """
+    blocks = [
+        _block("paragraph", "今天天气不错"),
+        _block("heading_2", "早餐"),
+        _block("bulleted_list_item", "燕麦"),
+        _block("to_do", "牛奶"),
+        _block("heading_3", "心情"),
+        _block("paragraph", "不错"),
+        _block("heading_2", "🍱 Lunch"),
+        _block("numbered_list_item", "米饭\n鸡腿"),
+        _block("heading_1", "运动"),
+        _block("bulleted_list_item", "跑步"),
+    ]
+
+    meals = extract_meals(blocks)
+
+    # 低一级的非餐次标题不结束餐次
+    assert meals == {"早餐": ["燕麦", "牛奶", "不错"], "🍱 Lunch": ["米饭", "鸡腿"]}
+    assert meal_items(meals) == ["早餐: 燕麦", "早餐: 牛奶", "早餐: 不错", "🍱 Lunch: 米饭", "🍱 Lunch: 鸡腿"]
+
+
+def test_extract_meals_reads_nested_children():
+    """
+    可折叠标题和嵌套列表的子块同样读取
+    """
+    blocks = [
+        _block("heading_2", "晚餐", children=[
+            _block("bulleted_list_item", "面条", children=[_block("bulleted_list_item", "加蛋")]),
+        ]),
+        _block("heading_2", "总结"),
+        _block("bulleted_list_item", "吃太多"),
+    ]
+
+    assert extract_meals(blocks) == {"晚餐": ["面条", "加蛋"]}
+
+
+def test_extract_meals_without_meal_headings():
+    """
+    没有餐次标题时不返回任何饮食项目
+    """
+    assert extract_meals([_block("paragraph", "随便写写"), _block("heading_2", "工作")]) == {}
+
+
+def test_compact_block_keeps_text():
+    """
+    精简后的块只保留id、类型、是否有子块和纯文本
+    """
+    block = {
+        "id": "b1",
+        "type": "paragraph",
+        "has_children": False,
+        "created_time": "2024-01-01T00:00:00.000Z",
+        "paragraph": {"rich_text": [{"plain_text": "米"}, {"plain_text": "饭", "annotations": {"bold": True}}]},
+    }
+
+    compact = compact_block(block)
+
+    assert compact == {"id": "b1", "type": "paragraph", "has_children": False,
+                       "paragraph": {"rich_text": [{"plain_text": "米饭"}]}}
+    assert block_text(compact) == "米饭"
+
+
+def test_food_items_read_from_page_body(notion_client, fake_notion):
+    """
+    饮食属性为空时读取页面正文，逐层获取嵌套子块，页面未编辑时使用缓存的块树
+    """
+    page = fake_notion.add_page("2024-01-01")
+    fake_notion.add_blocks(page["id"], [
+        _block("heading_2", "午餐", children=[_block("bulleted_list_item", "米饭", children=[_block("paragraph", "加辣")])]),
+        _block("heading_2", "晚餐"),
+        _block("bulleted_list_item", "面条"),
+    ])
+    fake_notion.add_page("2024-01-02", "燕麦")
+
+    data = notion_client.get_food_data_range(datetime(2024, 1, 1), datetime(2024, 1, 2))
+
+    assert data == [
+        {"date": "2024-01-01", "items": ["午餐: 米饭", "午餐: 加辣", "晚餐: 面条"]},
+        {"date": "2024-01-02", "items": ["燕麦"]}
+    ]
+    assert fake_notion.count("GET", "/blocks/") == 3
+
+    notion_client.get_food_data_range(datetime(2024, 1, 1), datetime(2024, 1, 2))
+    assert fake_notion.count("GET", "/blocks/") == 3
+
+
+def test_failed_block_fetch_is_not_cached(notion_client, fake_notion):
+    """
+    子块获取失败时不缓存块树，下次读取重新获取
+    """
+    page = fake_notion.add_page("2024-01-01")
+    fake_notion.add_blocks(page["id"], [_block("heading_2", "早餐"), _block("to_do", "鸡蛋")])
+    fake_notion.errors[("GET", "/blocks/")] = [500]
+
+    assert notion_client.get_food_data(datetime(2024, 1, 1))["items"] == []
+    assert notion_client.get_food_data(datetime(2024, 1, 1))["items"] == ["早餐: 鸡蛋"]
+
+
+def test_mirror_sync_skips_pages_with_failed_block_fetch(mirror_client, fake_notion):
+    """
+    正文获取失败的页面不写入镜像，水位停在该页面之前，下次同步重新获取
+    """
+    first = fake_notion.add_page("2024-01-01", "燕麦")
+    body = fake_notion.add_page("2024-01-02")
+    fake_notion.add_blocks(body["id"], [_block("heading_2", "午餐"), _block("bulleted_list_item", "米饭")])
+    last = fake_notion.add_page("2024-01-03", "面条")
+    fake_notion.errors[("GET", "/blocks/")] = [500]
+
+    report = mirror_client.sync_mirror()
+
+    assert report == {"updated": 2, "deleted": 0, "failed": 1}
+    assert body["id"] not in mirror_client.mirror.page_ids()
+    assert mirror_client.mirror.get_meta("last_edited_time") == first["last_edited_time"]
+
+    report = mirror_client.sync_mirror()
+
+    assert report["failed"] == 0
+    assert mirror_client.mirror.get_range("2024-01-02", "2024-01-02")[0]["food_items"] == ["午餐: 米饭"]
+    assert mirror_client.mirror.get_meta("last_edited_time") == last["last_edited_time"]
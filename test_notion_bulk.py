@@ -0,0 +1,71 @@
+from datetime import datetime
+
+
+def test_bulk_write_queries_existing_pages_once(notion_client, fake_notion):
+    """
+    整个日期范围只查询一次已有页面，已有页面更新，其余创建
+    """
+    existing = fake_notion.add_page("2024-01-02", "面条")
+
+    results = notion_client.create_diary_entries_bulk({
+        datetime(2024, 1, 1): ["燕麦"],
+        datetime(2024, 1, 2): ["米饭"],
+        datetime(2024, 1, 3): ["粥"],
+    })
+
+    assert results == {"2024-01-01": True, "2024-01-02": True, "2024-01-03": True}
+    assert fake_notion.count("POST", "/databases/") == 1
+    assert fake_notion.count("PATCH", f"/pages/{existing['id']}") == 1
+    assert fake_notion.count("POST", "/pages") == 2
+    assert [data["items"] for data in notion_client.get_food_data_range(datetime(2024, 1, 1), datetime(2024, 1, 3))] == [
+        ["燕麦"], ["米饭"], ["粥"]
+    ]
+
+
+def test_bulk_write_reports_failed_dates(notion_client, fake_notion):
+    """
+    单个写入失败只影响该日期
+    """
+    fake_notion.errors[("POST", "/pages")] = [400]
+
+    results = notion_client.create_diary_entries_bulk({datetime(2024, 1, 1): ["燕麦"]})
+
+    assert results == {"2024-01-01": False}
+
+
+def test_bulk_write_refuses_when_lookup_fails(notion_client, fake_notion):
+    """
+    无法查询已有页面时不写入，避免创建重复页面
+    """
+    fake_notion.errors[("POST", "/databases/")] = [500]
+
+    results = notion_client.create_diary_entries_bulk({datetime(2024, 1, 1): ["燕麦"], datetime(2024, 1, 2): ["粥"]})
+
+    assert results == {"2024-01-01": False, "2024-01-02": False}
+    assert fake_notion.count("POST", "/pages") == 0
+
+
+def test_bulk_write_uses_mirror(mirror_client, fake_notion):
+    """
+    有本地镜像时从镜像读取已有页面
+    """
+    existing = fake_notion.add_page("2024-01-01", "燕麦")
+
+    results = mirror_client.create_diary_entries_bulk({datetime(2024, 1, 1): ["燕麦", "牛奶"], datetime(2024, 1, 2): ["粥"]})
+
+    assert results == {"2024-01-01": True, "2024-01-02": True}
+    assert fake_notion.count("PATCH", f"/pages/{existing['id']}") == 1
+    assert [page["date"] for page in mirror_client.mirror.get_range("2024-01-01", "2024-01-02")] == ["2024-01-01", "2024-01-02"]
+
+
+def test_bulk_write_refuses_when_mirror_sync_fails(mirror_client, fake_notion):
+    """
+    使用镜像时同步失败则不写入任何日期
+    """
+    mirror_client.sync_mirror()
+    fake_notion.errors[("POST", "/databases/")] = [500]
+
+    results = mirror_client.create_diary_entries_bulk({datetime(2024, 1, 1): ["燕麦"], datetime(2024, 1, 2): ["粥"]})
+
+    assert results == {"2024-01-01": False, "2024-01-02": False}
+    assert fake_notion.count("POST", "/pages") == 0
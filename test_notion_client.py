@@ -0,0 +1,126 @@
+import threading
+import time
+from datetime import datetime
+
+
+def test_query_follows_cursor(notion_client, fake_notion):
+    """
+    超过一页的结果按next_cursor翻页，全部返回并按日期排序
+    """
+    for day in [5, 1, 3, 2, 4]:
+        fake_notion.add_page(f"2024-01-0{day}", f"米饭{day}")
+
+    entries = notion_client.get_diary_entries(datetime(2024, 1, 1), datetime(2024, 1, 5))
+
+    assert [notion_client._extract_date(entry) for entry in entries] == [
+        "2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"
+    ]
+    queries = [body for method, _, body in fake_notion.requests if method == "POST"]
+    assert len(queries) == 3
+    assert [query.get("start_cursor") for query in queries] == [None, "2", "4"]
+
+
+def test_food_data_range(notion_client, fake_notion):
+    """
+    饮食属性按行拆分为饮食项目
+    """
+    fake_notion.add_page("2024-01-01", "燕麦\n牛奶")
+    fake_notion.add_page("2024-01-02")
+
+    assert notion_client.get_food_data_range(datetime(2024, 1, 1), datetime(2024, 1, 2)) == [
+        {"date": "2024-01-01", "items": ["燕麦", "牛奶"]},
+        {"date": "2024-01-02", "items": []}
+    ]
+
+
+def test_retry_after_throttle(notion_client, fake_notion):
+    """
+    被限流（HTTP 429）时按Retry-After等待后重试
+    """
+    fake_notion.add_page("2024-01-01", "面条")
+    fake_notion.errors[("POST", "/databases/")] = [429]
+
+    data = notion_client.get_food_data(datetime(2024, 1, 1))
+
+    assert data["items"] == ["面条"]
+    assert fake_notion.count("POST", "/databases/") == 2
+
+
+def test_failed_query_returns_no_entries(notion_client, fake_notion):
+    """
+    查询失败时打印错误并停止，不抛出异常
+    """
+    fake_notion.add_page("2024-01-01", "面条")
+    fake_notion.errors[("POST", "/databases/")] = [500]
+
+    assert notion_client.get_diary_entries(datetime(2024, 1, 1), datetime(2024, 1, 1)) == []
+
+
+def test_create_diary_entry_updates_existing_page(notion_client, fake_notion):
+    """
+    已有当天的页面时更新该页面，否则创建新页面
+    """
+    page = fake_notion.add_page("2024-01-01", "面条")
+
+    assert notion_client.create_diary_entry(datetime(2024, 1, 1), ["米饭", "鸡腿"])
+    assert notion_client.create_diary_entry(datetime(2024, 1, 2), ["粥"])
+
+    assert fake_notion.count("PATCH", f"/pages/{page['id']}") == 1
+    assert fake_notion.count("POST", "/pages") == 1
+    assert notion_client.get_food_data(datetime(2024, 1, 1))["items"] == ["米饭", "鸡腿"]
+    assert notion_client.get_food_data(datetime(2024, 1, 2))["items"] == ["粥"]
+
+
+def test_concurrent_range_reads_are_coalesced(notion_client, fake_notion, monkeypatch):
+    """
+    相同日期范围的并发读取只查询一次Notion
+    """
+    fake_notion.add_page("2024-01-01", "面条")
+    handle = fake_notion.handle
+
+    def slow_handle(*args):
+        time.sleep(0.05)
+        return handle(*args)
+
+    monkeypatch.setattr(fake_notion, "handle", slow_handle)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(
+            notion_client.get_food_data_range(datetime(2024, 1, 1), datetime(2024, 1, 2))
+        ))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [[{"date": "2024-01-01", "items": ["面条"]}]] * 3
+    assert fake_notion.count("POST", "/databases/") == 1
+
+
+def test_duplicate_pages_use_last_edited(notion_client, fake_notion):
+    """
+    同一天有多个页面时读取和写入都使用最后编辑的页面
+    """
+    fake_notion.add_page("2024-01-01", "旧的")
+    latest = fake_notion.add_page("2024-01-01", "新的")
+
+    assert notion_client.get_food_data(datetime(2024, 1, 1))["items"] == ["新的"]
+    assert notion_client.get_food_data_range(datetime(2024, 1, 1), datetime(2024, 1, 1)) == [
+        {"date": "2024-01-01", "items": ["新的"]}
+    ]
+
+    assert notion_client.create_diary_entry(datetime(2024, 1, 1), ["新的", "鸡蛋"])
+    assert fake_notion.count("PATCH", f"/pages/{latest['id']}") == 1
+
+
+def test_create_refused_when_lookup_fails(notion_client, fake_notion):
+    """
+    无法查询当天已有页面时不写入，避免创建重复页面
+    """
+    fake_notion.add_page("2024-01-01", "面条")
+    fake_notion.errors[("POST", "/databases/")] = [500]
+
+    assert not notion_client.create_diary_entry(datetime(2024, 1, 1), ["米饭"])
+    assert fake_notion.count("POST", "/pages") == 0
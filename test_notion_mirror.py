@@ -0,0 +1,122 @@
+from datetime import datetime
+
+
+def _queries(fake_notion):
+    return [body for method, path, body in fake_notion.requests if method == "POST" and path.startswith("/databases/")]
+
+
+def test_reads_are_served_from_mirror(mirror_client, fake_notion):
+    """
+    首次读取全量同步镜像，同步间隔内的读取不请求Notion
+    """
+    fake_notion.add_page("2024-01-01", "燕麦")
+    fake_notion.add_page("2024-01-02", "面条")
+
+    assert mirror_client.get_food_data_range(datetime(2024, 1, 1), datetime(2024, 1, 2)) == [
+        {"date": "2024-01-01", "items": ["燕麦"]},
+        {"date": "2024-01-02", "items": ["面条"]}
+    ]
+    assert "filter" not in _queries(fake_notion)[0]
+
+    fake_notion.requests.clear()
+    assert mirror_client.get_food_data(datetime(2024, 1, 2))["items"] == ["面条"]
+    assert fake_notion.requests == []
+
+
+def test_delta_sync_only_fetches_edited_pages(mirror_client, fake_notion):
+    """
+    增量同步只查询水位之后编辑过的页面
+    """
+    fake_notion.add_page("2024-01-01", "燕麦")
+    page = fake_notion.add_page("2024-01-02", "面条")
+    mirror_client.sync_mirror()
+    watermark = mirror_client.mirror.get_meta("last_edited_time")
+    assert watermark == page["last_edited_time"]
+
+    fake_notion.requests.clear()
+    edited = fake_notion.add_page("2024-01-03", "米饭")
+    report = mirror_client.sync_mirror()
+
+    assert _queries(fake_notion)[0]["filter"]["last_edited_time"] == {"on_or_after": watermark}
+    # 与水位同一时间编辑的页面会被重新获取
+    assert report["updated"] == 2
+    assert mirror_client.mirror.get_meta("last_edited_time") == edited["last_edited_time"]
+    assert mirror_client.mirror.count() == 3
+
+
+def test_full_sync_removes_deleted_pages(mirror_client, fake_notion):
+    """
+    全量同步删除Notion中已不存在的页面
+    """
+    fake_notion.add_page("2024-01-01", "燕麦")
+    removed = fake_notion.add_page("2024-01-02", "面条")
+    mirror_client.sync_mirror()
+
+    del fake_notion.pages[removed["id"]]
+    report = mirror_client.sync_mirror(full=True)
+
+    assert report["deleted"] == 1
+    assert mirror_client.mirror.page_ids() == ["page-1"]
+
+
+def test_mirror_is_served_when_notion_is_down(mirror_client, fake_notion):
+    """
+    同步失败时继续使用本地镜像
+    """
+    fake_notion.add_page("2024-01-01", "燕麦")
+    mirror_client.sync_mirror()
+    fake_notion.errors[("POST", "/databases/")] = [500]
+
+    assert mirror_client.get_food_data(datetime(2024, 1, 1))["items"] == ["燕麦"]
+
+
+def test_write_uses_mirror_page_id(mirror_client, fake_notion):
+    """
+    写入时从镜像查找已有页面，并把返回的页面写回镜像
+    """
+    page = fake_notion.add_page("2024-01-01", "燕麦")
+    mirror_client.sync_mirror()
+    fake_notion.requests.clear()
+
+    assert mirror_client.create_diary_entry(datetime(2024, 1, 1), ["燕麦", "鸡蛋"])
+
+    assert fake_notion.count("PATCH", f"/pages/{page['id']}") == 1
+    assert mirror_client.mirror.get_range("2024-01-01", "2024-01-01")[0]["food_items"] == ["燕麦", "鸡蛋"]
+
+
+def test_write_sees_pages_created_after_last_sync(mirror_client, fake_notion):
+    """
+    写入前强制增量同步，同步间隔内其他进程创建的页面也会被更新而不是重复创建
+    """
+    mirror_client.sync_mirror()
+    page = fake_notion.add_page("2024-01-01", "燕麦")
+
+    assert mirror_client.create_diary_entry(datetime(2024, 1, 1), ["燕麦", "鸡蛋"])
+
+    assert fake_notion.count("PATCH", f"/pages/{page['id']}") == 1
+    assert fake_notion.count("POST", "/pages") == 0
+
+
+def test_write_refused_when_mirror_sync_fails(mirror_client, fake_notion):
+    """
+    写入前无法同步镜像时不写入，避免创建重复页面
+    """
+    mirror_client.sync_mirror()
+    fake_notion.errors[("POST", "/databases/")] = [500]
+
+    assert not mirror_client.create_diary_entry(datetime(2024, 1, 1), ["粥"])
+    assert fake_notion.count("POST", "/pages") == 0
+
+
+def test_mirror_range_uses_last_edited_page(mirror_client, fake_notion):
+    """
+    镜像中同一天有多个页面时只返回最后编辑的页面，与写入时查找的页面一致
+    """
+    fake_notion.add_page("2024-01-01", "旧的")
+    latest = fake_notion.add_page("2024-01-01", "新的")
+    mirror_client.sync_mirror()
+
+    assert mirror_client.get_food_data_range(datetime(2024, 1, 1), datetime(2024, 1, 1)) == [
+        {"date": "2024-01-01", "items": ["新的"]}
+    ]
+    assert mirror_client.mirror.page_id_for_date("2024-01-01") == latest["id"]
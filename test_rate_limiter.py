@@ -0,0 +1,147 @@
+import asyncio
+import time
+
+import pytest
+
+from modules.utils.rate_limiter import AdaptiveRateLimiter, RateLimitExceeded, get_rate_limiter
+
+
+class Throttled(Exception):
+    pass
+
+
+def test_burst_then_rate():
+    """
+    令牌桶容量内的调用不等待，之后按速率放行
+    """
+    limiter = AdaptiveRateLimiter(rate=20, burst=3)
+
+    started = time.monotonic()
+    for _ in range(3):
+        limiter.acquire()
+    assert time.monotonic() - started < 0.05
+
+    limiter.acquire()
+    limiter.acquire()
+    assert time.monotonic() - started >= 0.08
+    assert limiter.calls == 5
+
+
+def test_throttle_decreases_rate_and_recovers():
+    """
+    被限流时速率减半（不低于下限），成功后逐步恢复且不超过最大速率
+    """
+    limiter = AdaptiveRateLimiter(rate=4, min_rate=1.5, increase_step=0.5, backoff_base=0.01, jitter=0)
+
+    limiter.on_throttled()
+    assert limiter.rate == 2
+    limiter.on_throttled()
+    assert limiter.rate == 1.5
+
+    for _ in range(10):
+        limiter.on_success()
+    assert limiter.rate == 4
+
+
+def test_call_retries_after_throttle():
+    """
+    call 在被限流后退避重试，成功后返回结果
+    """
+    limiter = AdaptiveRateLimiter(rate=100, burst=5, backoff_base=0.01, jitter=0, max_retries=3)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise Throttled("429")
+        return "ok"
+
+    assert limiter.call(flaky, throttle_errors=(Throttled,)) == "ok"
+    assert len(attempts) == 3
+    assert limiter.stats()["retries"] == 2
+    assert limiter.stats()["throttled"] == 2
+
+
+def test_call_gives_up_after_max_retries():
+    """
+    超过最大重试次数后抛出 RateLimitExceeded
+    """
+    limiter = AdaptiveRateLimiter(rate=100, burst=5, backoff_base=0.01, jitter=0, max_retries=1)
+
+    def always_throttled():
+        raise Throttled("429")
+
+    with pytest.raises(RateLimitExceeded):
+        limiter.call(always_throttled, throttle_errors=(Throttled,))
+    assert limiter.failures == 1
+
+
+def test_other_errors_are_not_retried():
+    """
+    非限流异常直接抛出，不重试
+    """
+    limiter = AdaptiveRateLimiter(rate=100, burst=5)
+
+    with pytest.raises(ValueError):
+        limiter.call(lambda: (_ for _ in ()).throw(ValueError("bad")), throttle_errors=(Throttled,))
+    assert limiter.retries == 0
+
+
+def test_acquire_async_shares_bucket():
+    """
+    异步获取与同步获取共用同一个令牌桶
+    """
+    limiter = AdaptiveRateLimiter(rate=50, burst=2)
+    limiter.acquire()
+
+    async def acquire_many():
+        for _ in range(3):
+            await limiter.acquire_async()
+
+    started = time.monotonic()
+    asyncio.run(acquire_many())
+    assert time.monotonic() - started >= 0.03
+    assert limiter.calls == 4
+
+
+def test_get_rate_limiter_is_shared():
+    """
+    同一个key返回同一个限流器，不传配置时保留已有的参数
+    """
+    first = get_rate_limiter("test:shared", {"rate": 7})
+    second = get_rate_limiter("test:shared")
+
+    assert first is second
+    assert second.max_rate == 7
+
+
+def test_get_rate_limiter_applies_changed_config():
+    """
+    配置变化时就地更新共享限流器的参数，保留统计信息
+    """
+    limiter = get_rate_limiter("test:reconfigure", {"rate": 7, "burst": 4})
+    limiter.acquire()
+
+    updated = get_rate_limiter("test:reconfigure", {"rate": 1, "burst": 2, "max_retries": 5})
+
+    assert updated is limiter
+    assert limiter.max_rate == 1
+    assert limiter.rate == 1
+    assert limiter.burst == 2
+    assert limiter.max_retries == 5
+    assert limiter.calls == 1
+
+
+def test_configure_keeps_throttled_rate():
+    """
+    被限流后降低的速率在更新配置后保持，不超过新的最大速率
+    """
+    limiter = AdaptiveRateLimiter(rate=4, backoff_base=0.01, jitter=0)
+    limiter.on_throttled()
+
+    limiter.configure(rate=8)
+    assert limiter.rate == 2
+    assert limiter.max_rate == 8
+
+    limiter.configure(rate=1)
+    assert limiter.rate == 1
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+from datetime import date, datetime
+
+import pytest
+
+from modules.utils.single_flight import SingleFlight, AsyncSingleFlight, single_flight
+
+
+def _run_concurrently(*funcs):
+    results = [None] * len(funcs)
+
+    def run(index, func):
+        results[index] = func()
+
+    threads = [threading.Thread(target=run, args=(index, func)) for index, func in enumerate(funcs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_calls_share_result():
+    """
+    相同key的并发调用只执行一次并共享结果
+    """
+    flight = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return len(calls)
+
+    results = _run_concurrently(*[lambda: flight.do("key", slow) for _ in range(5)])
+
+    assert results == [1] * 5
+    assert flight.stats() == {"executed": 1, "shared": 4, "inflight": 0}
+
+
+def test_error_is_shared_and_not_cached():
+    """
+    异常同样传给所有等待者，完成后下一次调用重新执行
+    """
+    flight = SingleFlight()
+    errors = []
+
+    def failing():
+        time.sleep(0.05)
+        raise RuntimeError("boom")
+
+    def call():
+        try:
+            flight.do("key", failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    _run_concurrently(call, call, call)
+    assert errors == ["boom"] * 3
+
+    assert flight.do("key", lambda: "ok") == "ok"
+    assert flight.stats()["executed"] == 2
+
+
+class _Client:
+    def __init__(self):
+        self._single_flight = SingleFlight()
+        self.calls = 0
+
+    @single_flight
+    def fetch(self, start_date, end_date=None, include_values=True):
+        self.calls += 1
+        time.sleep(0.1)
+        return self.calls
+
+
+def test_decorator_normalizes_arguments():
+    """
+    date、午夜datetime、非午夜datetime以及位置参数和关键字参数的调用方式得到相同的key
+    """
+    client = _Client()
+
+    results = _run_concurrently(
+        lambda: client.fetch(datetime(2024, 1, 1)),
+        lambda: client.fetch(date(2024, 1, 1)),
+        lambda: client.fetch(datetime(2024, 1, 1, 15, 30)),
+        lambda: client.fetch(start_date=datetime(2024, 1, 1), include_values=True),
+        lambda: client.fetch(datetime(2024, 1, 1), None, True),
+    )
+
+    assert results == [1] * 5
+    assert client.calls == 1
+
+
+def test_decorator_keeps_different_arguments_apart():
+    """
+    参数不同的调用分别执行
+    """
+    client = _Client()
+
+    _run_concurrently(
+        lambda: client.fetch(datetime(2024, 1, 1)),
+        lambda: client.fetch(datetime(2024, 1, 2)),
+        lambda: client.fetch(datetime(2024, 1, 1), include_values=False),
+    )
+
+    assert client.calls == 3
+
+
+def test_decorator_without_single_flight_attribute():
+    """
+    实例没有 _single_flight 时直接调用原方法
+    """
+    client = _Client()
+    client._single_flight = None
+
+    assert client.fetch(datetime(2024, 1, 1)) == 1
+    assert client.fetch(datetime(2024, 1, 1)) == 2
+
+
+def test_async_single_flight():
+    """
+    相同key的协程只执行一次，一个调用者被取消不影响其他调用者
+    """
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        cancelled = asyncio.ensure_future(flight.do("key", slow))
+        others = [asyncio.ensure_future(flight.do("key", slow)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        results = await asyncio.gather(*others)
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return results
+
+    assert asyncio.run(main()) == ["done"] * 3
+    assert len(calls) == 1
@@ -0,0 +1,92 @@
+from modules.garmin.sleep import summarize_sleep, reduce_sleep_nights, empty_sleep_summary
+from modules.garmin.timeseries import TimeSeries, series_from_records
+
+
+def _levels(records):
+    return TimeSeries.from_arrays(series_from_records(records, "startGMT", "activityLevel", end_key="endGMT"))
+
+
+def test_summarize_sleep_from_levels():
+    """
+    根据睡眠级别区间计算各阶段时长、效率和入睡后清醒时间
+    """
+    levels = _levels([
+        {"startGMT": "2024-01-01T22:00:00.0", "endGMT": "2024-01-01T22:30:00.0", "activityLevel": 3},
+        {"startGMT": "2024-01-01T22:30:00.0", "endGMT": "2024-01-02T00:30:00.0", "activityLevel": 1},
+        {"startGMT": "2024-01-02T00:30:00.0", "endGMT": "2024-01-02T01:00:00.0", "activityLevel": 3},
+        {"startGMT": "2024-01-02T01:00:00.0", "endGMT": "2024-01-02T03:00:00.0", "activityLevel": 0},
+        {"startGMT": "2024-01-02T03:00:00.0", "endGMT": "2024-01-02T04:00:00.0", "activityLevel": 2},
+        {"startGMT": "2024-01-02T04:00:00.0", "endGMT": "2024-01-02T04:30:00.0", "activityLevel": 3},
+    ])
+
+    result = summarize_sleep(levels)
+
+    assert result["deep"] == 2
+    assert result["light"] == 2
+    assert result["rem"] == 1
+    assert result["awake"] == 1.5
+    assert result["duration"] == 5
+    assert result["in_bed"] == 6.5
+    assert result["efficiency"] == 76.9
+    # 只有第一次入睡到最后一次醒来之间的清醒区间计入
+    assert result["waso"] == 30
+    assert result["sleep_end"] - result["sleep_start"] == 5.5 * 3600 * 1000
+
+
+def test_summarize_sleep_falls_back_to_daily_dto():
+    """
+    没有睡眠级别数据时使用 dailySleepDTO 中的时长
+    """
+    daily_sleep = {
+        "sleepTimeSeconds": 7 * 3600,
+        "deepSleepSeconds": 2 * 3600,
+        "lightSleepSeconds": 4 * 3600,
+        "remSleepSeconds": 3600,
+        "awakeSleepSeconds": 1800,
+        "sleepStartTimestampGMT": 0,
+        "sleepEndTimestampGMT": 0,
+    }
+
+    result = summarize_sleep(None, daily_sleep)
+
+    assert result["duration"] == 7
+    assert result["deep"] == 2
+    assert result["awake"] == 0.5
+    assert result["in_bed"] == 0
+    assert result["efficiency"] == 0
+
+
+def test_summarize_sleep_without_data():
+    """
+    没有任何数据时返回全为0的汇总
+    """
+    assert summarize_sleep(None) == empty_sleep_summary()
+
+
+def test_reduce_sleep_nights_skips_empty_nights():
+    """
+    没有睡眠记录的夜晚不参与平均
+    """
+    nights = [
+        dict(empty_sleep_summary(), duration=6, deep=1, efficiency=80, waso=20),
+        dict(empty_sleep_summary(), duration=8, deep=2, efficiency=90, waso=31),
+        empty_sleep_summary(),
+    ]
+
+    result = reduce_sleep_nights(nights)
+
+    assert result["night_count"] == 2
+    assert result["duration"] == 7
+    assert result["deep"] == 1.5
+    assert result["efficiency"] == 85
+    assert result["waso"] == 26
+
+
+def test_reduce_sleep_nights_without_records():
+    """
+    全部夜晚都没有记录时各字段为0
+    """
+    result = reduce_sleep_nights([empty_sleep_summary()])
+
+    assert result["night_count"] == 0
+    assert result["duration"] == 0
@@ -0,0 +1,103 @@
+from datetime import datetime
+
+import numpy as np
+
+from modules.garmin.stress import summarize_stress
+from modules.garmin.timeseries import TimeSeries, TimeSeriesStore
+
+# 2024-01-01 00:00:00 UTC
+DAY_START = 1704067200
+
+
+def _series(values, interval=180):
+    timestamps = np.arange(len(values), dtype='<u4') * interval
+    return TimeSeries(timestamps, np.array(values, dtype='<i2'))
+
+
+def test_summarize_stress_levels_and_body_battery():
+    """
+    统计只使用有效值，按压力等级累计时长，身体电量取首尾和极值
+    """
+    summary = summarize_stress(_series([10, 30, -1, 60, 80]), _series([80, 75, 90, 60]))
+
+    assert summary["avg"] == 45
+    assert summary["min"] == 10
+    assert summary["max"] == 80
+    assert summary["levels"] == {"rest": 3, "low": 3, "medium": 3, "high": 3}
+    assert summary["body_battery"] == {"start": 80, "end": 60, "max": 90, "min": 60}
+
+
+def test_summarize_stress_ignores_zero_values():
+    """
+    0值不参与平均/最大/最小压力的统计
+    """
+    summary = summarize_stress(_series([0, 0, 20, 40]))
+
+    assert summary["avg"] == 30
+    assert summary["min"] == 20
+    assert summary["max"] == 40
+
+
+def test_summarize_stress_without_data():
+    """
+    没有数据时返回全0的统计
+    """
+    summary = summarize_stress(None)
+
+    assert summary["avg"] == 0
+    assert summary["levels"] == {"rest": 0, "low": 0, "medium": 0, "high": 0}
+    assert summarize_stress(_series([-1, -2]))["max"] == 0
+
+
+def _stress_response():
+    return {
+        "stressValuesArray": [[(DAY_START + i * 180) * 1000, value] for i, value in enumerate([20, 40, 60])],
+        "bodyBatteryValuesArray": [[DAY_START * 1000, "MEASURED", 70, 2.0]]
+    }
+
+
+def test_get_stress_data_stores_series(garmin_client, tmp_path):
+    """
+    压力数据只缓存统计结果，逐点数据保存到时间序列存储，需要时从存储读取
+    """
+    garmin_client.timeseries_store = TimeSeriesStore(str(tmp_path / "timeseries"))
+    garmin_client.client.stress = {"2024-01-01": _stress_response()}
+
+    result = garmin_client.get_stress_data(datetime(2024, 1, 1), include_values=False)
+
+    assert result["avg"] == 40
+    assert result["body_battery"]["start"] == 70
+    assert "values" not in garmin_client.cache_store.get("stress", "2024-01-01")
+
+    cached = garmin_client.get_stress_data(datetime(2024, 1, 1))
+    assert [item["value"] for item in cached["values"]] == [20, 40, 60]
+    assert cached["values"][0]["timestamp"] == DAY_START * 1000
+    # 默认不附加格式化的时间字符串
+    assert "time" not in cached["values"][0]
+    assert "time" in garmin_client.get_stress_data(datetime(2024, 1, 1), format_time=True)["values"][0]
+    assert garmin_client.client.calls == [("get_stress_data", "2024-01-01")]
+
+
+def test_values_refetched_without_timeseries_store(garmin_client):
+    """
+    未启用时间序列存储时，需要逐点压力值的调用不使用只有统计信息的缓存
+    """
+    garmin_client.client.stress = {"2024-01-01": _stress_response()}
+    garmin_client.get_stress_data(datetime(2024, 1, 1), include_values=False)
+
+    result = garmin_client.get_stress_data(datetime(2024, 1, 1))
+
+    assert [item["value"] for item in result["values"]] == [20, 40, 60]
+    assert len(garmin_client.client.calls) == 2
+
+
+def test_failed_request_keeps_values_key(garmin_client):
+    """
+    请求失败时同样返回values字段
+    """
+    garmin_client.client.failing_dates = {"2024-01-01"}
+
+    result = garmin_client.get_stress_data(datetime(2024, 1, 1))
+
+    assert result["values"] == []
+    assert result["avg"] == 0
@@ -0,0 +1,230 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from modules.sync.backfill import GarminBackfill, NotionBackfill
+from modules.sync.incremental import GarminSync, SOURCE_GARMIN
+from modules.sync.state import SyncState
+
+TODAY = datetime(2024, 1, 10)
+
+
+@pytest.fixture
+def state(tmp_path):
+    sync_state = SyncState(str(tmp_path / "sync_state.db"))
+    yield sync_state
+    sync_state.close()
+
+
+def _high_water(state, metric):
+    return (state.get(SOURCE_GARMIN, metric) or {}).get("last_synced_date")
+
+
+def test_initial_sync_sets_high_water_to_yesterday(garmin_client, state):
+    """
+    首次同步请求 initial_days 天，高水位为昨天
+    """
+    report = GarminSync(garmin_client, state, recheck_days=2, initial_days=5).run(["stats"], today=TODAY)
+
+    assert report["metrics"]["stats"]["from"] == "2024-01-06"
+    assert report["metrics"]["stats"]["fetched"] == 5
+    assert _high_water(state, "stats") == "2024-01-09"
+
+
+def test_next_sync_only_requests_recent_days(garmin_client, state):
+    """
+    之后的同步只请求高水位之后的日期和重新检查的天数
+    """
+    sync = GarminSync(garmin_client, state, recheck_days=1, initial_days=5)
+    sync.run(["stats"], today=TODAY)
+    garmin_client.client.calls.clear()
+
+    report = sync.run(["stats"], today=TODAY + timedelta(days=2))
+
+    assert report["metrics"]["stats"]["from"] == "2024-01-09"
+    assert sorted(call[1] for call in garmin_client.client.calls) == ["2024-01-09", "2024-01-10", "2024-01-11", "2024-01-12"]
+    assert _high_water(state, "stats") == "2024-01-11"
+
+
+def test_failed_date_stops_high_water(garmin_client, state):
+    """
+    有失败的日期时高水位停在第一个失败日期之前，下次同步从该日期重新请求
+    """
+    garmin_client.client.failing_dates = {"2024-01-07", "2024-01-08"}
+    sync = GarminSync(garmin_client, state, recheck_days=0, initial_days=5)
+
+    report = sync.run(["stats"], today=TODAY)
+
+    assert report["metrics"]["stats"]["failed"] == 2
+    assert _high_water(state, "stats") == "2024-01-06"
+
+    # 同步窗口内的缓存（包括退避中的错误条目）会先被标记为过期，恢复后重新请求
+    garmin_client.client.failing_dates = set()
+    report = sync.run(["stats"], today=TODAY)
+
+    assert report["metrics"]["stats"]["from"] == "2024-01-07"
+    assert report["metrics"]["stats"]["failed"] == 0
+    assert _high_water(state, "stats") == "2024-01-09"
+
+
+def test_backfill_skips_cached_daily_steps(garmin_client):
+    """
+    回填后的 daily_steps 在缓存中不可变，再次回填时跳过
+    """
+    backfill = GarminBackfill(garmin_client, chunk_days=3)
+
+    first = backfill.run(datetime(2024, 1, 1), datetime(2024, 1, 5), ["daily_steps"])
+    second = backfill.run(datetime(2024, 1, 1), datetime(2024, 1, 5), ["daily_steps"])
+
+    assert first["fetched"] == 5
+    assert first["failed"] == 0
+    assert second["skipped"] == 5
+    assert second["fetched"] == 0
+    assert not os.path.exists(backfill.checkpoint_path)
+
+
+def test_backfill_resumes_from_checkpoint(garmin_client, monkeypatch):
+    """
+    中断后再次运行同样的范围，从检查点记录的分块继续
+    """
+    backfill = GarminBackfill(garmin_client, chunk_days=2)
+    original = garmin_client.client.get_daily_steps
+
+    def interrupted(start, end):
+        if start >= "2024-01-03":
+            raise KeyboardInterrupt
+        return original(start, end)
+
+    monkeypatch.setattr(garmin_client.client, "get_daily_steps", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        backfill.run(datetime(2024, 1, 1), datetime(2024, 1, 5), ["daily_steps"])
+
+    with open(backfill.checkpoint_path, encoding="utf-8") as f:
+        assert json.load(f)["next_date"] == "2024-01-03"
+
+    monkeypatch.setattr(garmin_client.client, "get_daily_steps", original)
+    garmin_client.client.calls.clear()
+    report = backfill.run(datetime(2024, 1, 1), datetime(2024, 1, 5), ["daily_steps"])
+
+    assert [call[1:] for call in garmin_client.client.calls] == [("2024-01-03", "2024-01-04"), ("2024-01-05", "2024-01-05")]
+    assert report["days"] == 3
+    assert not os.path.exists(backfill.checkpoint_path)
+
+
+def test_backfill_rejects_unknown_metric(garmin_client):
+    """
+    不支持的指标直接报错
+    """
+    with pytest.raises(ValueError):
+        GarminBackfill(garmin_client).run(datetime(2024, 1, 1), datetime(2024, 1, 2), ["calories"])
+
+
+def test_uncached_dates_count_as_failed(garmin_client, fake_garmin):
+    """
+    获取后缓存中仍没有条目的日期视为失败
+    """
+    backfill = GarminBackfill(garmin_client)
+    fake_garmin.login_error = ValueError("登录失败")
+
+    result = backfill.fetch_metric("stats", ["2024-01-01", "2024-01-02"])
+
+    assert result["fetched"] == 0
+    assert result["failed_dates"] == ["2024-01-01", "2024-01-02"]
+
+
+def test_backfill_aborts_when_login_failed(garmin_client, fake_garmin):
+    """
+    登录失败时停止回填，不写入检查点
+    """
+    backfill = GarminBackfill(garmin_client, chunk_days=2)
+    fake_garmin.login_error = ValueError("登录失败")
+
+    with pytest.raises(RuntimeError):
+        backfill.run(datetime(2024, 1, 1), datetime(2024, 1, 5), ["stats"])
+
+    assert not os.path.exists(backfill.checkpoint_path)
+
+
+def test_sync_aborts_when_login_failed(garmin_client, fake_garmin, state):
+    """
+    登录失败时停止同步，高水位不变
+    """
+    state.update(SOURCE_GARMIN, "stats", last_synced_date="2024-01-01")
+    fake_garmin.login_error = ValueError("登录失败")
+
+    with pytest.raises(RuntimeError):
+        GarminSync(garmin_client, state, initial_days=5).run(["stats"], today=TODAY)
+
+    assert _high_water(state, "stats") == "2024-01-01"
+
+
+def test_notion_backfill_writes_mirror_by_chunk(mirror_client, fake_notion):
+    """
+    Notion日记按分块查询后写入本地镜像，完成后删除检查点
+    """
+    for day in range(1, 6):
+        fake_notion.add_page(f"2024-01-0{day}", f"米饭{day}")
+    backfill = NotionBackfill(mirror_client, chunk_days=2)
+
+    report = backfill.run(datetime(2024, 1, 1), datetime(2024, 1, 5))
+
+    assert report["days"] == 5
+    assert report["fetched"] == 5
+    assert fake_notion.count("POST", "/databases/") == 3
+    assert mirror_client.mirror.count() == 5
+    assert not os.path.exists(backfill.checkpoint_path)
+
+
+def test_notion_backfill_resumes_from_checkpoint(mirror_client, fake_notion, monkeypatch):
+    """
+    查询失败时停止，检查点停在失败的分块之前，再次运行从该分块继续
+    """
+    for day in range(1, 6):
+        fake_notion.add_page(f"2024-01-0{day}", f"米饭{day}")
+    backfill = NotionBackfill(mirror_client, chunk_days=2)
+    query = mirror_client.iter_diary_entries
+
+    def failing_second_chunk(start_date, end_date, raise_errors=False):
+        if start_date >= datetime(2024, 1, 3):
+            raise RuntimeError("HTTP 500")
+        return query(start_date, end_date, raise_errors)
+
+    monkeypatch.setattr(mirror_client, "iter_diary_entries", failing_second_chunk)
+    with pytest.raises(RuntimeError):
+        backfill.run(datetime(2024, 1, 1), datetime(2024, 1, 5))
+
+    with open(backfill.checkpoint_path, encoding="utf-8") as f:
+        assert json.load(f)["next_date"] == "2024-01-03"
+
+    monkeypatch.setattr(mirror_client, "iter_diary_entries", query)
+    fake_notion.requests.clear()
+    report = backfill.run(datetime(2024, 1, 1), datetime(2024, 1, 5))
+
+    assert report["days"] == 3
+    assert fake_notion.count("POST", "/databases/") == 2
+    assert mirror_client.mirror.count() == 5
+
+
+def test_notion_backfill_after_full_sync_only_syncs_delta(mirror_client, fake_notion):
+    """
+    镜像已完成全量同步时只做一次增量同步，整个范围记为跳过
+    """
+    fake_notion.add_page("2024-01-01", "燕麦")
+    mirror_client.sync_mirror(full=True)
+    fake_notion.requests.clear()
+
+    report = NotionBackfill(mirror_client).run(datetime(2024, 1, 1), datetime(2024, 1, 31))
+
+    assert report["skipped"] == 31
+    assert fake_notion.count("POST", "/databases/") == 1
+    assert "last_edited_time" in json.dumps(fake_notion.requests[0][2]["filter"])
+
+
+def test_notion_backfill_requires_mirror(notion_client):
+    """
+    未启用本地镜像时无法回填
+    """
+    with pytest.raises(ValueError):
+        NotionBackfill(notion_client)
@@ -0,0 +1,124 @@
+import threading
+
+import numpy as np
+
+from modules.garmin.timeseries import TimeSeries, TimeSeriesStore, series_from_pairs, series_from_records
+
+# 2024-01-01 00:00:00 UTC
+DAY_START = 1704067200
+
+
+def test_series_from_pairs_sorts_and_marks_missing():
+    """
+    采样点按时间排序，空值记为缺失，小数按缩放倍数保存为整数
+    """
+    timestamps, values = series_from_pairs([
+        [(DAY_START + 120) * 1000, 1.25],
+        [DAY_START * 1000, None],
+        [(DAY_START + 60) * 1000, 2.5],
+        [None, 3],
+    ], scale=100)
+
+    assert timestamps.tolist() == [DAY_START, DAY_START + 60, DAY_START + 120]
+    assert values.tolist() == [-1, 250, 125]
+    assert series_from_pairs([]) is None
+
+
+def test_series_from_records_with_intervals():
+    """
+    GMT时间字符串转换为秒级时间戳，区间数据包含结束时间
+    """
+    starts, ends, values = series_from_records([
+        {"startGMT": "2024-01-01T00:10:00.0", "endGMT": "2024-01-01T00:20:00.0", "activityLevel": 2},
+        {"startGMT": "2024-01-01T00:00:00.0", "endGMT": "2024-01-01T00:10:00.0", "activityLevel": 1},
+    ], "startGMT", "activityLevel", end_key="endGMT")
+
+    assert starts.tolist() == [DAY_START, DAY_START + 600]
+    assert ends.tolist() == [DAY_START + 600, DAY_START + 1200]
+    assert values.tolist() == [1, 2]
+
+
+def test_statistics_skip_missing_values():
+    """
+    统计时不计入缺失值，截取按时间范围进行
+    """
+    series = TimeSeries(
+        np.array([0, 60, 120, 180], dtype='<u4'),
+        np.array([10, -1, 30, 20], dtype='<i2')
+    )
+
+    assert series.min() == 10
+    assert series.max() == 30
+    assert series.mean() == 20
+    assert len(series.valid()) == 3
+    assert series.between(60, 180).values.tolist() == [-1, 30]
+    assert TimeSeries(np.array([0], dtype='<u4'), np.array([-1], dtype='<i2')).mean() is None
+
+
+def test_store_save_and_load_range(tmp_path):
+    """
+    按天保存后可按范围读取，跨月拼接，覆盖某天时保留同月其他日期
+    """
+    store = TimeSeriesStore(str(tmp_path))
+    store.save("stress", "2024-01-31", (np.array([1, 2], dtype='<u4'), np.array([10, 20], dtype='<i2')))
+    store.save("stress", "2024-02-01", (np.array([3], dtype='<u4'), np.array([30], dtype='<i2')))
+    store.save("stress", "2024-01-30", (np.array([0], dtype='<u4'), np.array([5], dtype='<i2')))
+    store.save("stress", "2024-01-31", (np.array([2], dtype='<u4'), np.array([25], dtype='<i2')))
+
+    assert store.has("stress", "2024-01-30")
+    assert not store.has("stress", "2024-01-29")
+    assert store.load("stress", "2024-01-31").values.tolist() == [25]
+
+    series = store.load_range("stress", "2024-01-29", "2024-02-02")
+    assert series.timestamps.tolist() == [0, 2, 3]
+    assert series.values.tolist() == [5, 25, 30]
+
+    # 每个月只保留一个数据文件
+    data_files = [path.name for path in (tmp_path / "stress").iterdir() if path.suffix == ".npy"]
+    assert len([name for name in data_files if name.startswith("2024-01.")]) == 1
+    assert store.load_range("stress", "2023-12-01", "2023-12-31") is None
+
+
+def test_store_applies_metric_scale(tmp_path):
+    """
+    读取时按指标的缩放倍数换算实际值
+    """
+    store = TimeSeriesStore(str(tmp_path))
+    store.save("respiration", "2024-01-01", series_from_pairs([[DAY_START * 1000, 14.5]], scale=10))
+
+    assert store.load("respiration", "2024-01-01").values.tolist() == [14.5]
+
+
+def test_concurrent_writers_keep_every_day(tmp_path):
+    """
+    多个存储实例（如不同进程）同时写入同一个月时，每天的数据都保留
+    """
+    stores = [TimeSeriesStore(str(tmp_path)) for _ in range(2)]
+
+    def write(store, days):
+        for day in days:
+            store.save("stress", f"2024-01-{day:02d}", (np.array([day], dtype='<u4'), np.array([day], dtype='<i2')))
+
+    threads = [threading.Thread(target=write, args=(store, range(offset + 1, 29, 2))) for offset, store in enumerate(stores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert stores[0].load_range("stress", "2024-01-01", "2024-01-31").values.tolist() == list(range(1, 29))
+
+
+def test_load_retries_when_data_file_replaced(tmp_path, monkeypatch):
+    """
+    读取索引后数据文件被其他写入方替换时，重新读取索引再打开一次
+    """
+    store = TimeSeriesStore(str(tmp_path))
+    store.save("stress", "2024-01-01", (np.array([1], dtype='<u4'), np.array([10], dtype='<i2')))
+    stale = store._load_index("stress", "2024-01")
+    store.save("stress", "2024-01-02", (np.array([2], dtype='<u4'), np.array([20], dtype='<i2')))
+
+    load_index = store._load_index
+    indexes = [stale]
+    monkeypatch.setattr(store, "_load_index", lambda metric, month: indexes.pop() if indexes else load_index(metric, month))
+
+    assert store.load_range("stress", "2024-01-01", "2024-01-02").values.tolist() == [10, 20]